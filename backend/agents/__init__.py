@@ -4,6 +4,8 @@ from .enhancer_agent import create_enhancer_agent
 from .evaluator_agent import create_evaluator_agent
 from .optimizer_agent import create_optimizer_agent
 from .playground_agent import create_playground_agent
+from .judge_agent import create_judge_agent
+from .grader_agent import create_grader_agent
 from .coordinator import create_coordinator_agent
 
 __all__ = [
@@ -12,5 +14,7 @@ __all__ = [
     "create_evaluator_agent",
     "create_optimizer_agent",
     "create_playground_agent",
+    "create_judge_agent",
+    "create_grader_agent",
     "create_coordinator_agent",
 ]
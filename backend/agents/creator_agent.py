@@ -1,11 +1,17 @@
 """Creator Agent for generating prompts from goals."""
 from google.adk.agents import Agent
+from pydantic import BaseModel
 from google.adk.tools import google_search
 from config.settings import get_settings
 from models.model_factory import get_model
+from typing import Optional, Type
 
 
-def create_creator_agent(use_search: bool = False, model: str = None) -> Agent:
+def create_creator_agent(
+    use_search: bool = False,
+    model: str = None,
+    output_schema: Optional[Type[BaseModel]] = None,
+) -> Agent:
     """
     Creates the Creator Agent responsible for generating initial prompts
     based on user goals, audience, and constraints.
@@ -13,6 +19,7 @@ def create_creator_agent(use_search: bool = False, model: str = None) -> Agent:
     Args:
         use_search: Whether to enable Google Search tool for grounding
         model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
         
     Returns:
         Configured LlmAgent for prompt creation
@@ -55,4 +62,5 @@ Always prioritize clarity, specificity, and actionability.
         """.strip(),
         description="Generates structured prompts from high-level goals and requirements",
         tools=tools,
+        output_schema=output_schema,
     )
@@ -1,37 +1,69 @@
 """Enhancer Agent for structuring and improving prompts."""
 from google.adk.agents import Agent
+from pydantic import BaseModel
 from config.settings import get_settings
 from models.model_factory import get_model
+from typing import Optional, Type
 
+# Block taxonomy used to structure prompts (also used by the local prompt analyzer)
+BLOCK_TYPES = {
+    "ROLE": "Defines the persona or role the LLM should adopt",
+    "TASK": "Describes the main objective or task to accomplish",
+    "INSTRUCTION": "Specific step-by-step instructions or guidelines",
+    "CONTEXT": "Background information or situational context",
+    "EXAMPLE": "Concrete examples demonstrating the expected behavior",
+    "OUTPUT_FORMAT": "Specification of how the output should be formatted",
+    "GUARDRAIL": "Safety constraints, limitations, or boundaries",
+}
 
-def create_enhancer_agent(model: str = None) -> Agent:
+
+def create_enhancer_agent(model: str = None, output_schema: Optional[Type[BaseModel]] = None) -> Agent:
     """
     Creates the Enhancer Agent that breaks down prompts into structured blocks
     and provides rationales for improvements.
     
     Args:
         model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
 
     Returns:
         Configured Agent for prompt enhancement
     """
     settings = get_settings()
+    block_types = "\n".join(f"- {name}: {description}" for name, description in BLOCK_TYPES.items())
+    if output_schema is not None:
+        # Matches the enforced schema (EnhancerOutput), so instructions and decoding agree
+        response_format = """Return your response as a JSON object with this structure:
+{
+  "blocks": [
+    {
+      "type": "ROLE",
+      "content": "The block content...",
+      "rationale": "Why this block improves the prompt..."
+    },
+    ...
+  ]
+}"""
+    else:
+        response_format = """Return your response as a JSON array of blocks with this structure:
+[
+  {
+    "type": "ROLE",
+    "content": "The block content...",
+    "rationale": "Why this block improves the prompt..."
+  },
+  ...
+]"""
     
     return Agent(
         name="enhancer_agent",
         model=get_model(model_name=model),
-        instruction="""
+        instruction=f"""
 You are a prompt structure specialist. Analyze LLM prompts and break them 
 down into well-organized blocks with clear rationales.
 
 Block Types Available:
-- ROLE: Defines the persona or role the LLM should adopt
-- TASK: Describes the main objective or task to accomplish
-- INSTRUCTION: Specific step-by-step instructions or guidelines
-- CONTEXT: Background information or situational context
-- EXAMPLE: Concrete examples demonstrating the expected behavior
-- OUTPUT_FORMAT: Specification of how the output should be formatted
-- GUARDRAIL: Safety constraints, limitations, or boundaries
+{block_types}
 
 For each block you create:
 1. Identify the most appropriate block type
@@ -42,16 +74,9 @@ For each block you create:
 Your goal is to transform unstructured or poorly organized prompts into clear, 
 modular, and highly effective components that any LLM can easily understand.
 
-Return your response as a JSON array of blocks with this structure:
-[
-  {
-    "type": "ROLE",
-    "content": "The block content...",
-    "rationale": "Why this block improves the prompt..."
-  },
-  ...
-]
+{response_format}
         """.strip(),
         description="Structures and enhances prompt organization into logical blocks",
         tools=[],
+        output_schema=output_schema,
     )
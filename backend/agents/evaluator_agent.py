@@ -1,11 +1,18 @@
 """Evaluator Agent for scoring and assessing prompts."""
 from google.adk.agents import Agent
+from pydantic import BaseModel
 from config.settings import get_settings
 from models.model_factory import get_model
-from typing import Optional
+from typing import Optional, Type
 
+DEFAULT_RUBRIC = "Clarity, Specificity, Safety, Testability, Efficiency"
 
-def create_evaluator_agent(custom_rubric: Optional[str] = None, model: str = None) -> Agent:
+
+def create_evaluator_agent(
+    custom_rubric: Optional[str] = None,
+    model: str = None,
+    output_schema: Optional[Type[BaseModel]] = None,
+) -> Agent:
     """
     Creates the Evaluator Agent that scores prompts against evaluation criteria
     and identifies risks and optimization opportunities.
@@ -13,12 +20,13 @@ def create_evaluator_agent(custom_rubric: Optional[str] = None, model: str = Non
     Args:
         custom_rubric: Custom evaluation criteria (if None, uses default)
         model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
         
     Returns:
         Configured Agent for prompt evaluation
     """
     settings = get_settings()
-    rubric = custom_rubric or "Clarity, Specificity, Safety, Testability, Efficiency"
+    rubric = custom_rubric or DEFAULT_RUBRIC
     
     return Agent(
         name="evaluator_agent",
@@ -58,4 +66,5 @@ Return a JSON object with this EXACT structure:
         """.strip(),
         description=f"Evaluates prompts using rubric: {rubric}",
         tools=[],
+        output_schema=output_schema,
     )
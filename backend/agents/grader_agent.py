@@ -0,0 +1,55 @@
+"""Grader Agent for scoring LLM outputs produced by a prompt."""
+from google.adk.agents import Agent
+from pydantic import BaseModel
+from models.model_factory import get_model
+from typing import Optional, Type
+
+
+def create_grader_agent(
+    criteria: Optional[str] = None,
+    model: str = None,
+    output_schema: Optional[Type[BaseModel]] = None,
+) -> Agent:
+    """
+    Creates the Grader Agent that scores a model response against the
+    prompt that produced it.
+
+    Args:
+        criteria: What the grade should focus on (if None, overall quality)
+        model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
+
+    Returns:
+        Configured Agent for output grading
+    """
+    focus = criteria or "Task completion, correctness, instruction following and format compliance"
+
+    return Agent(
+        name="grader_agent",
+        model=get_model(model_name=model),
+        instruction=f"""
+You are a strict, consistent grader of LLM responses. You will be given the
+exact prompt a model received and the response it produced.
+
+Grade the response on: {focus}
+
+### Scoring Guidelines
+- **90-100**: Fully satisfies every instruction, correct and well formatted.
+- **70-89**: Satisfies the task with minor omissions or format slips.
+- **50-69**: Partially satisfies the task; notable gaps or errors.
+- **<50**: Misses the task, ignores instructions or is wrong.
+
+Grade the response only, not the prompt. Be consistent: equally good
+responses must receive equal scores.
+
+### Output Format
+Return a JSON object with this EXACT structure:
+{{
+  "score": 82,
+  "rationale": "Answers the question correctly but ignores the 50-word limit."
+}}
+        """.strip(),
+        description=f"Grades LLM responses on: {focus}",
+        tools=[],
+        output_schema=output_schema,
+    )
@@ -0,0 +1,53 @@
+"""Judge Agent for pairwise prompt comparisons."""
+from google.adk.agents import Agent
+from pydantic import BaseModel
+from models.model_factory import get_model
+from typing import Optional, Type
+
+
+def create_judge_agent(
+    criteria: Optional[str] = None,
+    model: str = None,
+    output_schema: Optional[Type[BaseModel]] = None,
+) -> Agent:
+    """
+    Creates the Judge Agent that compares two prompt variations head to head
+    and picks the stronger one.
+
+    Args:
+        criteria: What the comparison should focus on (if None, overall quality)
+        model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
+
+    Returns:
+        Configured Agent for pairwise judging
+    """
+    focus = criteria or "Overall effectiveness: clarity, specificity, safety and testability"
+
+    return Agent(
+        name="judge_agent",
+        model=get_model(model_name=model),
+        instruction=f"""
+You are an impartial prompt engineering judge. You will be shown two prompt
+variations, labelled A and B, written for the same purpose.
+
+Judge them on: {focus}
+
+### Judging Rules
+1. Compare the prompts only on the stated criteria; ignore their order and length.
+2. Decide which prompt would make a target LLM produce better results.
+3. Answer "tie" only if neither is meaningfully better.
+4. Give your confidence from 0.0 (coin flip) to 1.0 (certain).
+
+### Output Format
+Return a JSON object with this EXACT structure:
+{{
+  "winner": "A",
+  "confidence": 0.8,
+  "rationale": "B leaves the output format unspecified while A defines a JSON schema."
+}}
+        """.strip(),
+        description=f"Judges prompt variations pairwise on: {focus}",
+        tools=[],
+        output_schema=output_schema,
+    )
@@ -1,26 +1,50 @@
 """Optimizer Agent for generating improved prompt variations."""
 from google.adk.agents import Agent
+from pydantic import BaseModel
 from config.settings import get_settings
 from models.model_factory import get_model
+from typing import Optional, Type
 
 
-def create_optimizer_agent(model: str = None) -> Agent:
+def create_optimizer_agent(model: str = None, output_schema: Optional[Type[BaseModel]] = None) -> Agent:
     """
     Creates the Optimizer Agent that generates improved prompt variations
     based on evaluation feedback.
     
     Args:
         model: Optional model ID to use
+        output_schema: Optional response schema enforced by the provider
 
     Returns:
         Configured Agent for prompt optimization
     """
     settings = get_settings()
+    if output_schema is not None:
+        # Matches the enforced schema (OptimizerOutput), so instructions and decoding agree
+        response_format = """Return your response as a JSON object with this structure:
+{
+  "variations": [
+    {
+      "prompt": "The full text of the optimized prompt variation...",
+      "rationale": "Brief explanation of the key improvements made..."
+    },
+    ...
+  ]
+}"""
+    else:
+        response_format = """Return your response as a JSON array with this structure:
+[
+  {
+    "prompt": "The full text of the optimized prompt variation...",
+    "rationale": "Brief explanation of the key improvements made..."
+  },
+  ...
+]"""
     
     return Agent(
         name="optimizer_agent",
         model=get_model(use_thinking_model=True, model_name=model),
-        instruction="""
+        instruction=f"""
 You are a prompt optimization specialist. Generate improved variations of 
 prompts based on expert evaluation feedback.
 
@@ -35,15 +59,9 @@ Optimization Strategy:
 Focus on meaningful, substantive improvements rather than superficial changes.
 Each variation should offer a genuinely different approach to solving the same problem.
 
-Return your response as a JSON array with this structure:
-[
-  {
-    "prompt": "The full text of the optimized prompt variation...",
-    "rationale": "Brief explanation of the key improvements made..."
-  },
-  ...
-]
+{response_format}
         """.strip(),
         description="Generates optimized prompt variations based on feedback",
         tools=[],
+        output_schema=output_schema,
     )
@@ -3,12 +3,14 @@ from .models import (
     CreatePromptRequest,
     EnhancePromptRequest,
     EvaluatePromptRequest,
+    FastEvaluateRequest,
     OptimizePromptRequest,
     TestPromptRequest,
     GenerateFewShotRequest,
     PromptBlock,
     EvaluationScore,
     EvaluationResult,
+    FastEvaluateResponse,
     OptimizerResult,
     FewShotExample,
 )
@@ -17,12 +19,14 @@ __all__ = [
     "CreatePromptRequest",
     "EnhancePromptRequest",
     "EvaluatePromptRequest",
+    "FastEvaluateRequest",
     "OptimizePromptRequest",
     "TestPromptRequest",
     "GenerateFewShotRequest",
     "PromptBlock",
     "EvaluationScore",
     "EvaluationResult",
+    "FastEvaluateResponse",
     "OptimizerResult",
     "FewShotExample",
 ]
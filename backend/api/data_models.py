@@ -1,7 +1,7 @@
 """API models for prompts and templates management."""
 
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Literal, Optional, List
 from datetime import datetime
 
 
@@ -24,6 +24,18 @@ class PromptResponse(BaseModel):
     tags: Optional[List[str]]
 
 
+class PromptSummary(BaseModel):
+    """Prompt in a list view; GET /prompts/{id} has the full text."""
+    id: int
+    agent_type: str
+    created_at: datetime
+    tags: Optional[List[str]]
+    prompt_preview: str
+    prompt_chars: int
+    result_preview: Optional[str]
+    result_chars: Optional[int]
+
+
 class TemplateCreate(BaseModel):
     """Create template request."""
     name: str
@@ -52,3 +64,84 @@ class TemplateResponse(BaseModel):
     is_public: bool
     created_at: datetime
     updated_at: datetime
+
+
+class TemplateSummary(BaseModel):
+    """Template in a list view; GET /templates/{id} has the full text."""
+    id: int
+    user_id: str
+    name: str
+    description: Optional[str]
+    category: Optional[str]
+    is_public: bool
+    created_at: datetime
+    updated_at: datetime
+    template_preview: str
+    template_chars: int
+
+
+class ExperimentCreate(BaseModel):
+    """Create experiment request."""
+    name: Optional[str] = None
+    variants: List[str] = Field(..., min_length=2, max_length=5, description="Prompt templates; the first is the control")
+    rows: List[Dict[str, str]] = Field(..., min_length=1, max_length=1000, description="Variable values per dataset row")
+    model: Optional[str] = None
+    grader_model: Optional[str] = None
+    criteria: Optional[str] = None
+
+
+class ExperimentResponse(BaseModel):
+    """Experiment response."""
+    id: str
+    user_id: str
+    name: Optional[str]
+    status: str
+    job_id: Optional[str]
+    model: Optional[str]
+    grader_model: Optional[str]
+    criteria: Optional[str]
+    variant_count: int
+    row_count: int
+    completed_cells: int
+    failed_cells: int
+    summary: Optional[Dict[str, Any]]
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+
+
+class ExperimentResultResponse(BaseModel):
+    """Experiment cell response."""
+    row_index: int
+    variant_index: int
+    output: Optional[str]
+    score: Optional[float]
+    rationale: Optional[str]
+    error: Optional[str]
+    latency_ms: Optional[float]
+
+
+class JobCreate(BaseModel):
+    """Submit job request."""
+    kind: Literal["optimize_tournament", "rank", "evaluate_batch"]
+    payload: Dict[str, Any] = Field(..., description="Parameters of the job, as for the matching interactive endpoint")
+    max_attempts: Optional[int] = Field(None, ge=1, le=10)
+
+
+class JobResponse(BaseModel):
+    """Job response."""
+    id: str
+    user_id: str
+    kind: str
+    status: str
+    progress: float
+    progress_message: Optional[str]
+    result: Optional[Any]
+    error: Optional[str]
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
@@ -1,15 +1,25 @@
 """API routes for prompts and templates management."""
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, Query
+from typing import List, Literal, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db, crud
 from api.data_models import (
     PromptCreate,
     PromptResponse,
+    PromptSummary,
     TemplateCreate,
     TemplateUpdate,
     TemplateResponse,
+    TemplateSummary,
+)
+from api.responses import (
+    PRIVATE_REVALIDATE,
+    FastJSONResponse,
+    etag_matches,
+    not_modified,
+    rows_as,
+    strong_etag,
 )
 
 router = APIRouter()
@@ -37,20 +47,49 @@ async def create_prompt(
     return db_prompt
 
 
-@router.get("/prompts", response_model=List[PromptResponse])
+@router.get("/prompts", response_model=Union[List[PromptResponse], List[PromptSummary]])
 async def get_prompts(
     agent_type: Optional[str] = None,
     limit: int = 50,
+    view: Literal["full", "summary"] = "full",
+    preview_chars: int = Query(200, ge=0, le=2000),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get user's prompts, optionally filtered by agent type."""
+    """
+    Get user's prompts, optionally filtered by agent type.
+
+    ``view=summary`` returns previews of the prompt and result (the first
+    ``preview_chars`` characters) with their full lengths, read without
+    loading the full text; GET /prompts/{id} returns a full prompt.
+
+    The ETag comes from the user's prompt collection version, so an
+    unchanged list is answered with 304 without reading any prompt.
+    """
+    # Read before the rows: a write in between makes the ETag older than the body, never newer
+    version = await crud.get_collection_version(db, DEFAULT_USER_ID, "prompts")
+    headers = {
+        "ETag": strong_etag("prompts", version, agent_type, limit, view, preview_chars),
+        "Cache-Control": PRIVATE_REVALIDATE,
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    if view == "summary":
+        rows = await crud.get_prompt_summaries(
+            db=db,
+            user_id=DEFAULT_USER_ID,
+            agent_type=agent_type,
+            limit=limit,
+            preview_chars=preview_chars
+        )
+        return FastJSONResponse(rows, headers=headers)
     prompts = await crud.get_prompts(
         db=db,
         user_id=DEFAULT_USER_ID,
         agent_type=agent_type,
         limit=limit
     )
-    return prompts
+    return FastJSONResponse(rows_as(prompts, PromptResponse), headers=headers)
 
 
 @router.get("/prompts/{prompt_id}", response_model=PromptResponse)
@@ -97,20 +136,51 @@ async def create_template(
     return db_template
 
 
-@router.get("/templates", response_model=List[TemplateResponse])
+@router.get("/templates", response_model=Union[List[TemplateResponse], List[TemplateSummary]])
 async def get_templates(
     category: Optional[str] = None,
     include_public: bool = True,
+    view: Literal["full", "summary"] = "full",
+    preview_chars: int = Query(200, ge=0, le=2000),
+    if_none_match: Optional[str] = Header(None),
     db: AsyncSession = Depends(get_db)
 ):
-    """Get user's templates, optionally filtered by category."""
+    """
+    Get user's templates, optionally filtered by category.
+
+    ``view=summary`` returns a preview of the template text (the first
+    ``preview_chars`` characters) with its full length instead of the
+    text; GET /templates/{id} returns a full template.
+
+    The ETag comes from the versions of the user's templates and (with
+    ``include_public``) of public templates, so an unchanged list is
+    answered with 304 without reading any template.
+    """
+    versions = [await crud.get_collection_version(db, DEFAULT_USER_ID, "templates")]
+    if include_public:
+        versions.append(await crud.get_collection_version(db, crud.PUBLIC_USER_ID, "templates"))
+    headers = {
+        "ETag": strong_etag("templates", versions, category, view, preview_chars),
+        "Cache-Control": PRIVATE_REVALIDATE,
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    if view == "summary":
+        rows = await crud.get_template_summaries(
+            db=db,
+            user_id=DEFAULT_USER_ID,
+            category=category,
+            include_public=include_public,
+            preview_chars=preview_chars
+        )
+        return FastJSONResponse(rows, headers=headers)
     templates = await crud.get_templates(
         db=db,
         user_id=DEFAULT_USER_ID,
         category=category,
         include_public=include_public
     )
-    return templates
+    return FastJSONResponse(rows_as(templates, TemplateResponse), headers=headers)
 
 
 @router.get("/templates/{template_id}", response_model=TemplateResponse)
@@ -0,0 +1,99 @@
+"""Debug routes for runtime diagnostics."""
+
+import asyncio
+import threading
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from api.middleware import is_admin_token
+from config.settings import get_settings
+from services.loop_monitor import get_loop_monitor
+from services.profiler import MAX_PROFILE_SECONDS, Profile, ProfilerBusy, profiles, sample_stacks
+from services.stream_buffer import streams
+
+router = APIRouter()
+
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Allow only requests carrying X-Admin-Token: <ADMIN_TOKEN>."""
+    if not get_settings().admin_token:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (set ADMIN_TOKEN to enable it)")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _render(profile: Profile, format: str):
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "pstats":
+        if profile.pstats_text is None:
+            raise HTTPException(status_code=400, detail="Only request profiles have pstats output")
+        return PlainTextResponse(profile.pstats_text)
+    return profile.summary()
+
+
+@router.get("/debug/loop")
+async def loop_health(stacks: bool = True, x_admin_token: Optional[str] = Header(None)):
+    """
+    Event loop health: lag percentiles over the last minute, loop blocking
+    per route (total, worst stall and per request), and the most recent
+    stalls with the stack that was blocking the loop. Stacks include source
+    lines, so they are only returned to admins (X-Admin-Token).
+    """
+    return get_loop_monitor().snapshot(stacks=stacks and is_admin_token(x_admin_token))
+
+
+@router.get("/debug/streams")
+async def stream_buffers():
+    """
+    Output buffered for clients still reading agent streams: memory in use
+    against the budget, bytes spilled to disk, streams spilled or dropped so
+    far, and the live streams holding the most.
+    """
+    return streams.snapshot()
+
+
+@router.post("/debug/profile", dependencies=[Depends(require_admin)])
+async def profile_worker(
+    seconds: float = 10.0,
+    interval_ms: float = 5.0,
+    all_threads: bool = False,
+    format: Literal["collapsed", "json"] = "collapsed",
+):
+    """
+    Sample the stacks of this worker for a while.
+    
+    By default only the event loop thread is sampled. Every stack is rooted
+    at the route of the request it serves. Returns collapsed stacks, which
+    flamegraph.pl, speedscope and inferno read, or a JSON summary with
+    samples per route and the hottest functions.
+    """
+    if seconds > MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {MAX_PROFILE_SECONDS:.0f}")
+    loop_thread = None if all_threads else threading.get_ident()
+    try:
+        profile = await asyncio.to_thread(sample_stacks, seconds, interval_ms, loop_thread)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _render(profile, format)
+
+
+@router.get("/debug/profiles", dependencies=[Depends(require_admin)])
+async def list_profiles():
+    """
+    Recent profiles, including per-request cProfiles taken with the
+    X-Profile header.
+    """
+    return profiles.list()
+
+
+@router.get("/debug/profiles/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_profile(profile_id: str, format: Literal["collapsed", "pstats", "json"] = "collapsed"):
+    """
+    A stored profile as collapsed stacks, a pstats table (request profiles)
+    or a JSON summary.
+    """
+    profile = profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _render(profile, format)
@@ -0,0 +1,115 @@
+"""API routes for A/B prompt experiments."""
+
+import asyncio
+import uuid
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, crud
+from database.models import Experiment, ExperimentResult
+from api.data_models import (
+    ExperimentCreate,
+    ExperimentResponse,
+    ExperimentResultResponse,
+)
+from services.experiments import summarize_experiment
+from services.jobs import submit_job
+
+router = APIRouter()
+
+# Default user ID for now (can be replaced with auth later)
+DEFAULT_USER_ID = "default_user"
+
+
+async def _to_response(experiment: Experiment, results: List[ExperimentResult]) -> ExperimentResponse:
+    """Build an experiment response with progress and a live summary."""
+    summary = experiment.summary
+    if experiment.status != "completed" and any(cell.score is not None for cell in results):
+        summary = await asyncio.to_thread(summarize_experiment, experiment, results)
+    return ExperimentResponse(
+        id=experiment.id,
+        user_id=experiment.user_id,
+        name=experiment.name,
+        status=experiment.status,
+        job_id=experiment.job_id,
+        model=experiment.model,
+        grader_model=experiment.grader_model,
+        criteria=experiment.criteria,
+        variant_count=len(experiment.variants),
+        row_count=len(experiment.rows),
+        completed_cells=sum(1 for cell in results if cell.score is not None),
+        failed_cells=sum(1 for cell in results if cell.error),
+        summary=summary,
+        error=experiment.error,
+        created_at=experiment.created_at,
+        updated_at=experiment.updated_at,
+    )
+
+
+async def _start(db: AsyncSession, experiment: Experiment) -> Experiment:
+    """Queue a job that runs (or resumes) an experiment."""
+    job = await submit_job(db, experiment.user_id, "experiment", {"experiment_id": experiment.id})
+    return await crud.update_experiment_status(db, experiment.id, "pending", job_id=job.id)
+
+
+@router.post("/experiments", response_model=ExperimentResponse)
+async def create_experiment(
+    experiment: ExperimentCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Create an experiment and queue it as a background job."""
+    db_experiment = await crud.create_experiment(
+        db=db,
+        experiment_id=str(uuid.uuid4()),
+        user_id=DEFAULT_USER_ID,
+        variants=experiment.variants,
+        rows=experiment.rows,
+        name=experiment.name,
+        model=experiment.model,
+        grader_model=experiment.grader_model,
+        criteria=experiment.criteria
+    )
+    db_experiment = await _start(db, db_experiment)
+    return await _to_response(db_experiment, [])
+
+
+@router.get("/experiments/{experiment_id}", response_model=ExperimentResponse)
+async def get_experiment(
+    experiment_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get an experiment's status, progress and summary statistics."""
+    experiment = await crud.get_experiment(db, experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    results = await crud.get_experiment_results(db, experiment_id)
+    return await _to_response(experiment, results)
+
+
+@router.get("/experiments/{experiment_id}/results", response_model=List[ExperimentResultResponse])
+async def get_experiment_results(
+    experiment_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the per-row outputs and grades of an experiment."""
+    experiment = await crud.get_experiment(db, experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    return await crud.get_experiment_results(db, experiment_id)
+
+
+@router.post("/experiments/{experiment_id}/resume", response_model=ExperimentResponse)
+async def resume_experiment(
+    experiment_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Resume an interrupted, failed or cancelled experiment; only unscored cells are re-run."""
+    experiment = await crud.get_experiment(db, experiment_id)
+    if not experiment:
+        raise HTTPException(status_code=404, detail="Experiment not found")
+    job = await crud.get_job(db, experiment.job_id) if experiment.job_id else None
+    if job and job.status in crud.ACTIVE_JOB_STATUSES:
+        raise HTTPException(status_code=409, detail="Experiment is already queued or running")
+    experiment = await _start(db, experiment)
+    results = await crud.get_experiment_results(db, experiment_id)
+    return await _to_response(experiment, results)
@@ -0,0 +1,107 @@
+"""API routes for background jobs."""
+
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, crud
+from database.connection import AsyncSessionLocal
+from api.data_models import JobCreate, JobResponse
+from api.sse import SSE_HEADERS, sse_event
+from config.settings import get_settings
+from services.jobs import JOB_PAYLOAD_MODELS, TERMINAL_JOB_STATUSES, submit_job
+
+router = APIRouter()
+
+# Default user ID for now (can be replaced with auth later)
+DEFAULT_USER_ID = "default_user"
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(
+    job: JobCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Queue a long-running job (optimizer tournament, ranking or batch evaluation)."""
+    try:
+        payload = JOB_PAYLOAD_MODELS[job.kind](**job.payload)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    return await submit_job(db, DEFAULT_USER_ID, job.kind, payload, job.max_attempts)
+
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 50,
+    db: AsyncSession = Depends(get_db)
+):
+    """List jobs, newest first."""
+    return await crud.get_user_jobs(db, DEFAULT_USER_ID, status, limit)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a job's status, progress and result."""
+    job = await crud.get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db)
+):
+    """Cancel a job; a running job stops at its worker's next heartbeat."""
+    job = await crud.cancel_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Stream a job's progress as SSE.
+    
+    Emits a 'progress' event whenever status or progress changes and ends
+    with a 'succeeded', 'failed' or 'cancelled' event carrying the job, or a
+    'deleted' event if the job disappears. Works from any server process,
+    since progress is read from the database; each poll uses its own
+    session, so a watcher holds no connection between polls.
+    """
+    async with AsyncSessionLocal() as db:
+        if not await crud.get_job(db, job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def event_stream():
+        interval = get_settings().job_poll_seconds
+        last = None
+        while True:
+            async with AsyncSessionLocal() as db:
+                job = await crud.get_job(db, job_id)
+            if job is None:
+                yield sse_event("deleted", {"id": job_id})
+                return
+            state = (job.status, job.progress, job.progress_message, job.attempts)
+            if job.status in TERMINAL_JOB_STATUSES:
+                yield sse_event(job.status, JobResponse.model_validate(job, from_attributes=True))
+                return
+            if state != last:
+                last = state
+                yield sse_event("progress", {
+                    "status": job.status,
+                    "progress": job.progress,
+                    "message": job.progress_message,
+                    "attempts": job.attempts,
+                })
+            await asyncio.sleep(interval)
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
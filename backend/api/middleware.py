@@ -0,0 +1,154 @@
+"""ASGI middleware applied to every API request."""
+import json
+import math
+import secrets
+import sys
+import time
+import uuid
+from typing import Optional
+from config.settings import get_settings
+from services.deadlines import deadline_scope, request_budget
+from services.load_shedder import get_load_shedder
+from services.loop_monitor import get_loop_monitor, mark_route, route_label, unmark_route
+from services.profiler import request_profiler
+
+# Agent endpoints whose work a user is waiting on interactively
+INTERACTIVE_PATHS = {"/api/agents/create", "/api/agents/test", "/api/agents/test/compare"}
+# Agent endpoints that never call a model
+LOCAL_PATHS = {"/api/agents/evaluate/fast"}
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Whether a token matches ADMIN_TOKEN (always False when no token is configured)."""
+    admin_token = get_settings().admin_token
+    return bool(admin_token and token) and secrets.compare_digest(token, admin_token)
+
+
+def shed_priority(method: str, path: str) -> Optional[str]:
+    """
+    Priority class of a request for load shedding, or None if it is always served.
+
+    Only POSTs that start agent work can be shed; health, metadata, job and
+    experiment control, and the prompt/template CRUD routes are cheap and
+    always served. (Queued jobs are held back by the job worker instead.)
+    """
+    path = path.rstrip("/")
+    if method != "POST" or not path.startswith("/api/agents/") or path in LOCAL_PATHS:
+        return None
+    return "interactive" if path in INTERACTIVE_PATHS else "standard"
+
+
+class DeadlineMiddleware:
+    """
+    Sets each request's deadline from X-Latency-Budget-Ms or the per-endpoint defaults.
+
+    The deadline lives in a context variable, so it covers the handler and,
+    for streaming responses, the body as well.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        header = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-latency-budget-ms":
+                header = value.decode("latin-1")
+                break
+        with deadline_scope(request_budget(scope["path"], header)):
+            await self.app(scope, receive, send)
+
+
+class LoadSheddingMiddleware:
+    """Rejects new agent requests with 503 while the load shedder reports overload."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not get_settings().load_shedding_enabled:
+            await self.app(scope, receive, send)
+            return
+        priority = shed_priority(scope["method"], scope["path"])
+        shedder = get_load_shedder()
+        if priority is None or not shedder.should_shed(priority):
+            await self.app(scope, receive, send)
+            return
+        body = json.dumps({"detail": "Server is overloaded, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(shedder.interval_ms / 1000)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+class LoopMonitorMiddleware:
+    """Labels each request so event loop stalls can be attributed to its route."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = route_label(scope["method"], scope["path"])
+        get_loop_monitor().count_request(route)
+        # This coroutine's frame is on the stack whenever the request's code runs
+        frame = sys._getframe()
+        mark_route(frame, route)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            unmark_route(frame)
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request with cProfile when it carries X-Profile: <ADMIN_TOKEN>.
+
+    The response gets an X-Profile-Id header; the profile is then available
+    from GET /api/debug/profiles/{id}. Requests without the header pay only
+    for the header lookup.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-profile":
+                token = value.decode("latin-1")
+                break
+        if token is None or not is_admin_token(token):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = request_profiler.begin()
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+        profile_id = str(uuid.uuid4())
+        started = time.monotonic()
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_profiler.end(profiler, profile_id, route_label(scope["method"], scope["path"]), started)
@@ -1,6 +1,9 @@
 """Pydantic models for API requests and responses."""
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import Annotated, List, Dict, Literal, Optional
+
+# Longest prompt the local analyzer scores (characters)
+MAX_FAST_EVAL_PROMPT_CHARS = 20_000
 
 
 # Request Models
@@ -11,12 +14,22 @@ class CreatePromptRequest(BaseModel):
     constraints: str = Field(default="", description="Constraints and requirements")
     use_search: bool = Field(default=False, description="Enable Google Search grounding")
     model: Optional[str] = Field(None, description="Model ID to use (e.g., 'ollama/llama3')")
+    stream_format: Literal["text", "sse"] = Field(
+        "text",
+        description="'text' streams the raw prompt text; 'sse' sends 'chunk' events and a final 'done' event",
+    )
+    speculate: bool = Field(
+        False,
+        description="Start enhancing the result as soon as it is complete; the 'done' event carries its handle (SSE only)",
+    )
+    save: bool = Field(False, description="Save the result to the prompt history once complete")
 
 
 class EnhancePromptRequest(BaseModel):
     """Request model for enhancing/structuring a prompt."""
     prompt: str = Field(..., description="Prompt to enhance", min_length=1)
     model: Optional[str] = Field(None, description="Model ID to use")
+    speculation_handle: Optional[str] = Field(None, description="enhance_handle from an /agents/create 'done' event")
 
 
 class EvaluatePromptRequest(BaseModel):
@@ -24,6 +37,29 @@ class EvaluatePromptRequest(BaseModel):
     prompt: str = Field(..., description="Prompt to evaluate", min_length=1)
     custom_rubric: Optional[str] = Field(None, description="Custom evaluation criteria")
     model: Optional[str] = Field(None, description="Model ID to use")
+    mode: Literal["llm", "fast", "fast_then_llm", "per_criterion"] = Field(
+        "llm",
+        description=(
+            "'fast' scores locally only, 'fast_then_llm' calls the evaluator only if the local score passes, "
+            "'per_criterion' scores each rubric criterion concurrently"
+        ),
+    )
+    variables: Optional[Dict[str, str]] = Field(None, description="Variable values used to find unresolved placeholders")
+
+
+class EvaluateBatchRequest(BaseModel):
+    """Request model for evaluating many prompts in a background job."""
+    prompts: List[str] = Field(..., min_length=1, max_length=500, description="Prompts to evaluate")
+    custom_rubric: Optional[str] = Field(None, description="Custom evaluation criteria")
+    model: Optional[str] = Field(None, description="Model ID to use")
+    mode: Literal["llm", "per_criterion"] = Field("llm", description="Evaluation mode per prompt")
+
+
+class FastEvaluateRequest(BaseModel):
+    """Request model for local batch triage of prompts."""
+    prompts: List[Annotated[str, Field(max_length=MAX_FAST_EVAL_PROMPT_CHARS)]] = Field(
+        ..., min_length=1, max_length=500, description="Prompts to score locally"
+    )
 
 
 class OptimizePromptRequest(BaseModel):
@@ -34,11 +70,53 @@ class OptimizePromptRequest(BaseModel):
     model: Optional[str] = Field(None, description="Model ID to use")
 
 
+class OptimizeTournamentRequest(BaseModel):
+    """Request model for an optimizer tournament."""
+    prompt: str = Field(..., description="Prompt to optimize", min_length=1)
+    suggestions: List[str] = Field(default_factory=list, description="Optimization suggestions from evaluation")
+    count: int = Field(4, ge=1, le=10, description="Variations generated per round")
+    rounds: int = Field(1, ge=1, le=5, description="Number of rounds")
+    top_k: int = Field(2, ge=1, le=5, description="Candidates kept between rounds")
+    scorer: Literal["fast", "llm"] = Field("fast", description="Local pre-scorer or Evaluator Agent")
+    model: Optional[str] = Field(None, description="Model ID to use")
+
+
+class RankPromptsRequest(BaseModel):
+    """Request model for pairwise ranking of prompt variations."""
+    prompts: List[str] = Field(..., min_length=2, max_length=50, description="Prompt variations to rank")
+    criteria: Optional[str] = Field(None, description="What the judge should compare on")
+    top_k: int = Field(3, ge=1, le=10, description="Size of the top set that must stabilize")
+    max_rounds: Optional[int] = Field(None, ge=1, le=20, description="Override the Swiss round limit")
+    model: Optional[str] = Field(None, description="Model ID to use")
+
+
 class TestPromptRequest(BaseModel):
     """Request model for testing a prompt with variables."""
     prompt: str = Field(..., description="Prompt to test", min_length=1)
     variables: Dict[str, str] = Field(default_factory=dict, description="Variable values for interpolation")
     model: Optional[str] = Field(None, description="Model ID to use")
+    stream_format: Literal["text", "sse"] = Field(
+        "text",
+        description="'text' streams the raw output; 'sse' sends 'chunk' events and a final 'done' event",
+    )
+    save: bool = Field(False, description="Save the result to the prompt history once complete")
+
+
+class CompareModelsRequest(BaseModel):
+    """Request model for running one prompt against several models at once."""
+    prompt: str = Field(..., description="Prompt to test", min_length=1)
+    variables: Dict[str, str] = Field(default_factory=dict, description="Variable values for interpolation")
+    models: List[str] = Field(..., min_length=2, max_length=6, description="Model IDs to compare")
+
+class ModelRunStats(BaseModel):
+    """Timing and size of one model's run in a comparison."""
+    model: str = Field(..., description="Model ID")
+    warm: Optional[bool] = Field(None, description="Whether the Ollama model was already loaded (None for other providers)")
+    ttft_ms: Optional[float] = Field(None, description="Time to first token in milliseconds")
+    latency_ms: float = Field(..., description="Total latency in milliseconds")
+    output_chars: int = Field(0, description="Length of the output in characters")
+    chunks: int = Field(0, description="Number of streamed chunks")
+    error: Optional[str] = Field(None, description="Error message if the run failed")
 
 
 class GenerateFewShotRequest(BaseModel):
@@ -71,6 +149,11 @@ class EvaluationResult(BaseModel):
     suggestions: List[str] = Field(..., description="Actionable optimization suggestions")
 
 
+class FastEvaluateResponse(BaseModel):
+    """Local evaluation results, in request order."""
+    results: List[EvaluationResult]
+
+
 class OptimizerResult(BaseModel):
     """An optimized prompt variation."""
     id: str = Field(..., description="Unique identifier")
@@ -78,12 +161,55 @@ class OptimizerResult(BaseModel):
     rationale: str = Field(..., description="Explanation of improvements")
 
 
+class TournamentCandidate(BaseModel):
+    """A scored candidate in an optimizer tournament."""
+    id: str = Field(..., description="Unique identifier")
+    prompt: str = Field(..., description="Candidate prompt text")
+    rationale: str = Field("", description="Explanation of improvements")
+    score: float = Field(..., description="Mean criterion score (0-100)")
+    round: int = Field(..., description="Round that produced the candidate (0 for the original)")
+    parent_id: Optional[str] = Field(None, description="Candidate this one was derived from")
+    evaluation: Optional[EvaluationResult] = Field(None, description="Full evaluation")
+
+
 class FewShotExample(BaseModel):
     """A few-shot learning example."""
     input: str = Field(..., description="Example input")
     output: str = Field(..., description="Example output")
 
 
+class PairwiseJudgment(BaseModel):
+    """Outcome of one pairwise judge comparison."""
+    winner: Literal["A", "B", "tie"] = Field(..., description="Winning prompt label")
+    confidence: float = Field(0.5, ge=0, le=1, description="Judge confidence")
+    rationale: str = Field("", description="Why the winner is better")
+
+
+class OutputGrade(BaseModel):
+    """Grade of one model response."""
+    score: int = Field(..., ge=0, le=100, description="Score from 0-100")
+    rationale: str = Field("", description="Explanation of the score")
+
+
+class RankedPrompt(BaseModel):
+    """A prompt variation with its pairwise ranking statistics."""
+    index: int = Field(..., description="Position in the request")
+    prompt: str = Field(..., description="Prompt text")
+    rating: float = Field(..., description="Elo rating")
+    strength: float = Field(..., description="Bradley-Terry strength (mean 1.0)")
+    wins: float = Field(..., description="Wins (ties count half)")
+    comparisons: int = Field(..., description="Judge comparisons played")
+
+
+class RankPromptsResponse(BaseModel):
+    """Ranking produced by adaptive pairwise judging."""
+    ranking: List[RankedPrompt]
+    comparisons: int = Field(..., description="Judge comparisons that produced a verdict")
+    failed_comparisons: int = Field(0, description="Judge calls that failed and were not scored")
+    rounds: int = Field(..., description="Swiss rounds played")
+    converged: bool = Field(..., description="Whether the top-k stabilized before the round limit")
+
+
 # Additional Response Models
 class EnhancePromptResponse(BaseModel):
     """Response for prompt enhancement."""
@@ -100,6 +226,30 @@ class GenerateFewShotResponse(BaseModel):
     examples: List[FewShotExample]
 
 
+# Structured Output Models (schemas the agents are asked to produce)
+class PromptBlockDraft(BaseModel):
+    """A prompt block as produced by the Enhancer Agent, before an ID is assigned."""
+    type: str = Field("UNKNOWN", description="Block type (ROLE, TASK, INSTRUCTION, etc.)")
+    content: str = Field("", description="Block content")
+    rationale: Optional[str] = Field(None, description="Rationale for this block")
+
+
+class EnhancerOutput(BaseModel):
+    """Structured output of the Enhancer Agent."""
+    blocks: List[PromptBlockDraft]
+
+
+class OptimizerVariation(BaseModel):
+    """A prompt variation as produced by the Optimizer Agent, before an ID is assigned."""
+    prompt: str = Field("", description="Optimized prompt text")
+    rationale: str = Field("", description="Explanation of improvements")
+
+
+class OptimizerOutput(BaseModel):
+    """Structured output of the Optimizer Agent."""
+    variations: List[OptimizerVariation]
+
+
 class ErrorResponse(BaseModel):
     """Error response model."""
     error: str = Field(..., description="Error message")
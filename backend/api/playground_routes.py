@@ -0,0 +1,205 @@
+"""WebSocket playground: repeated prompt runs over one connection, with cancellation."""
+import asyncio
+import math
+import time
+import uuid
+from contextlib import suppress
+from typing import Dict, Optional
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from agents import create_playground_agent
+from config.settings import get_settings
+from models.model_router import route_request
+from services.agent_runner import ERROR_PREFIX, AgentSession, stream_agent_response
+from services.deadlines import deadline_scope, request_budget
+from services.load_shedder import get_load_shedder
+from services.ollama_residency import residency_headers
+from tools.variable_tool import find_missing_variables, interpolate_variables
+
+router = APIRouter()
+
+# Optional fields of client messages, and the JSON types each may hold
+_FIELD_TYPES = {
+    "id": (str, int),
+    "prompt": (str,),
+    "model": (str,),
+    "variables": (dict,),
+    "latency_budget_ms": (int, float),
+}
+
+
+def _message_error(message: dict) -> Optional[str]:
+    """Why a client message is malformed, or None if its fields have the expected types."""
+    for field, types in _FIELD_TYPES.items():
+        value = message.get(field)
+        if value is not None and (not isinstance(value, types) or isinstance(value, bool)):
+            return f"'{field}' has the wrong type"
+    for name, value in (message.get("variables") or {}).items():
+        if isinstance(value, (dict, list)):
+            return f"Variable '{name}' must be a string, number or null"
+    return None
+
+
+class PlaygroundConnection:
+    """
+    State of one playground WebSocket: the draft being edited, the cached
+    agents and ADK session, and the runs in flight by ID.
+    """
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.session = AgentSession(create_playground_agent)
+        self.prompt = ""
+        self.variables: Dict[str, str] = {}
+        self.model: Optional[str] = None
+        self.runs: Dict[str, asyncio.Task] = {}
+        self._send_lock = asyncio.Lock()
+
+    async def send(self, message: dict) -> None:
+        """Send a message; runs share the socket, so sends are serialized."""
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    def edit(self, message: dict) -> None:
+        """Apply a draft edit: a new prompt, model, or variable values (merged; None removes one)."""
+        if "prompt" in message:
+            self.prompt = message["prompt"] or ""
+        if "model" in message:
+            self.model = message["model"] or None
+        for name, value in (message.get("variables") or {}).items():
+            if value is None:
+                self.variables.pop(name, None)
+            else:
+                self.variables[name] = str(value)
+
+    async def start(self, message: dict) -> None:
+        """Start a run of the draft, with any fields in the message overriding it for this run."""
+        run_id = str(message.get("id") or uuid.uuid4())
+        if run_id in self.runs:
+            await self.send({"type": "error", "id": run_id, "detail": "A run with this ID is in progress"})
+            return
+        if len(self.runs) >= get_settings().ws_max_concurrent_runs:
+            await self.send({"type": "error", "id": run_id, "detail": "Too many concurrent runs on this connection"})
+            return
+        prompt = message.get("prompt") or self.prompt
+        variables = {**self.variables, **{k: str(v) for k, v in (message.get("variables") or {}).items()}}
+        if not prompt:
+            await self.send({"type": "error", "id": run_id, "detail": "No prompt to run"})
+            return
+        missing = find_missing_variables(prompt, variables)
+        if missing:
+            await self.send({"type": "error", "id": run_id, "detail": f"Missing required variables: {', '.join(missing)}"})
+            return
+        shedder = get_load_shedder()
+        if get_settings().load_shedding_enabled and shedder.should_shed("interactive"):
+            await self.send({
+                "type": "error",
+                "id": run_id,
+                "detail": "Server is overloaded, please retry shortly",
+                "retry_after": math.ceil(shedder.interval_ms / 1000),
+            })
+            return
+        task = asyncio.create_task(self._run(
+            run_id,
+            interpolate_variables(prompt, variables),
+            message.get("model", self.model),
+            message.get("latency_budget_ms"),
+        ))
+        self.runs[run_id] = task
+        task.add_done_callback(lambda _: self.runs.pop(run_id, None))
+
+    async def _run(self, run_id: str, prompt: str, model: Optional[str], budget_ms: Optional[int]) -> None:
+        started = time.perf_counter()
+        budget = request_budget("/api/agents/test", str(budget_ms) if budget_ms else None)
+        with deadline_scope(budget):
+            try:
+                model, route_headers = route_request("playground", prompt, model, budget_ms)
+                route_headers.update(await residency_headers(model))
+                agent = self.session.agent(model)
+                await self.send({"type": "start", "id": run_id, "model": model, "route": route_headers})
+                chars = 0
+                async for chunk in stream_agent_response(agent, prompt, priority="interactive", session=self.session):
+                    if not chunk:
+                        continue
+                    if chunk.startswith(ERROR_PREFIX):
+                        await self.send({"type": "error", "id": run_id, "detail": chunk[len(ERROR_PREFIX):].rstrip("]")})
+                        return
+                    chars += len(chunk)
+                    await self.send({"type": "chunk", "id": run_id, "text": chunk})
+                await self.send({
+                    "type": "done",
+                    "id": run_id,
+                    "chars": chars,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                })
+            except Exception as e:
+                with suppress(Exception):  # The socket may be gone
+                    await self.send({"type": "error", "id": run_id, "detail": str(e)})
+
+    async def cancel(self, run_id: str) -> None:
+        """Stop a run; the model stream is closed and its slot freed before 'cancelled' is sent."""
+        task = self.runs.get(run_id)
+        if task is None:
+            await self.send({"type": "error", "id": run_id, "detail": "No run in progress with this ID"})
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await self.send({"type": "cancelled", "id": run_id})
+
+    async def close(self) -> None:
+        """Cancel every run and delete the session."""
+        tasks = list(self.runs.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            await self.session.close()
+        except Exception as e:
+            print(f"[DEBUG] Could not delete playground session {self.session.session_id}: {e}")
+
+
+@router.websocket("/agents/test/ws")
+async def playground_socket(websocket: WebSocket):
+    """
+    Interactive playground over one WebSocket.
+
+    The connection keeps its agents and ADK session, so repeated runs skip
+    per-request setup. Client messages (JSON, by ``type``):
+
+    - ``edit``: update the draft ``prompt``, ``model`` and/or ``variables``
+    - ``run``: run the draft; ``id`` tags the run (generated if omitted) and
+      ``prompt``, ``variables``, ``model`` or ``latency_budget_ms`` override
+      the draft for this run only
+    - ``cancel``: stop the run with ``id`` immediately
+
+    Several runs can be in flight at once. Server messages carry the run's
+    ``id``: ``start`` (chosen model and routing details), ``chunk``,
+    ``done``, ``cancelled`` or ``error``. A ``ready`` message with the
+    session ID is sent first.
+    """
+    await websocket.accept()
+    connection = PlaygroundConnection(websocket)
+    try:
+        await connection.session.open()
+        await connection.send({"type": "ready", "session_id": connection.session.session_id})
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                await connection.send({"type": "error", "detail": "Messages must be JSON"})
+                continue
+            kind = message.get("type") if isinstance(message, dict) else None
+            error = _message_error(message) if kind in ("edit", "run", "cancel") else None
+            if error:
+                await connection.send({"type": "error", "id": message.get("id"), "detail": error})
+            elif kind == "edit":
+                connection.edit(message)
+            elif kind == "run":
+                await connection.start(message)
+            elif kind == "cancel":
+                await connection.cancel(str(message.get("id")))
+            else:
+                await connection.send({"type": "error", "detail": f"Unknown message type: {kind}"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await connection.close()
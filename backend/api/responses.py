@@ -0,0 +1,55 @@
+"""Response classes and conditional-GET helpers for list endpoints."""
+import hashlib
+from typing import Any, Dict, Iterable, List, Optional, Type
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+# Cache-Control of per-user lists: cacheable by the browser only, revalidated on every use
+PRIVATE_REVALIDATE = "private, no-cache"
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response encoded with orjson.
+
+    Return it for data the endpoint has already shaped (plain dicts of
+    column values), so rows skip Pydantic validation and the standard
+    library encoder. Datetimes are encoded as ISO 8601, as Pydantic does.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_as(objects: Iterable[Any], model: Type[BaseModel]) -> List[dict]:
+    """Plain dicts of the attributes ``model`` declares, read straight from ORM objects."""
+    fields = list(model.model_fields)
+    return [{name: getattr(obj, name) for name in fields} for obj in objects]
+
+
+def strong_etag(*parts: Any) -> str:
+    """Quoted strong ETag for a representation, derived from everything it depends on."""
+    digest = hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_NON_STR_KEYS)).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches an ETag.
+
+    Uses weak comparison, as If-None-Match does, so a tag a proxy marked
+    weak (e.g. nginx after gzipping) still matches.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    """Empty 304 response carrying the validator and caching headers of the full one."""
+    return Response(status_code=304, headers=headers)
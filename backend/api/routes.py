@@ -1,214 +1,212 @@
 """API routes for agent endpoints."""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Response
 from fastapi.responses import StreamingResponse
-from google.genai.types import Content, Part
-from google.adk.runners import Runner
-from database import DatabaseSessionService
 from agents import (
     create_creator_agent,
     create_enhancer_agent,
-    create_evaluator_agent,
     create_optimizer_agent,
     create_playground_agent,
 )
 from api.models import (
+    CompareModelsRequest,
     CreatePromptRequest,
     EnhancePromptRequest,
     EvaluatePromptRequest,
+    FastEvaluateRequest,
     OptimizePromptRequest,
+    OptimizeTournamentRequest,
+    RankPromptsRequest,
+    RankPromptsResponse,
     TestPromptRequest,
     GenerateFewShotRequest,
     EnhancePromptResponse,
     EvaluationResult,
+    FastEvaluateResponse,
     OptimizePromptResponse,
     GenerateFewShotResponse,
     PromptBlock,
     OptimizerResult,
-    FewShotExample,
+    EnhancerOutput,
+    OptimizerOutput,
 )
+from api.responses import FastJSONResponse, etag_matches, not_modified, strong_etag
+from api.sse import SSE_HEADERS, sse_event
+from config.settings import get_settings
+from models.model_router import all_stats, route_request
+from services.adaptive_limiter import limiter_metrics
+from services.agent_runner import ERROR_PREFIX, stream_agent_response
+from services.capture import save_prompt_later
+from services.deadlines import DeadlineExceeded
+from services.evaluation_service import evaluate_per_criterion, evaluate_with_llm
+from services.model_compare import compare_models
+from services.ollama_residency import get_scheduler, residency, residency_headers
+from services.priority_scheduler import get_priority_scheduler
+from services.prompt_analyzer import analyze_prompt, overall_score
+from services.load_shedder import get_load_shedder
+from services.ranking import rank_prompts
+from services.speculation import get_enhancement_speculation
+from services.stream_framing import encode_stream
+from services.structured_output import StructuredOutputError, run_structured, schema_for
+from services.tournament import run_tournament
 from tools.variable_tool import interpolate_variables, find_missing_variables
-import json
+from typing import AsyncIterator, Callable, Dict, Optional
 import asyncio
-import uuid
-from typing import AsyncGenerator
+import time
 
 router = APIRouter()
 
-# Global database-backed session service - persists across restarts!
-_session_service = DatabaseSessionService()
 
-async def get_session_service() -> DatabaseSessionService:
-    """Get the global session service."""
-    return _session_service
+from services.model_service import get_available_models
 
-async def stream_agent_response(agent, prompt: str) -> AsyncGenerator[str, None]:
+@router.get("/models")
+async def list_models(if_none_match: Optional[str] = Header(None)):
     """
-    Stream response from an agent using ADK Runner.
-    
-    Args:
-        agent: ADK agent instance
-        prompt: Prompt to send to the agent
-        
-    Yields:
-        Text chunks from the agent's response
+    List available models from configured providers.
+
+    Clients may reuse the list for MODELS_CACHE_SECONDS; after that, a
+    request with the previous ETag gets 304 while the list is unchanged.
     """
-    try:
-        print(f"[DEBUG] stream_agent_response: Starting with prompt length {len(prompt)}")
-        
-        # Yield initial data to flush the buffer and establish streaming connection
-        yield ""
-        
-        session_service = await get_session_service()
-        runner = Runner(agent=agent, session_service=session_service, app_name="prompt_agent")
-        
-        # Run agent asynchronously and collect events
-        full_text = ""
-        user_id = "default_user"
-        # Use a consistent session ID for the user or generate new one?
-        # For now, generate new one per request to avoid state pollution between requests
-        # unless we want to support multi-turn chat later.
-        session_id = str(uuid.uuid4())
-        
-        await session_service.create_session(user_id=user_id, session_id=session_id, app_name="prompt_agent")
-        print(f"[DEBUG] Session created: {session_id}")
-        
-        message = Content(role="user", parts=[Part(text=prompt)])
-        
-        print(f"[DEBUG] Starting run_async...")
-        event_count = 0
-        last_event = None
-        async for event in runner.run_async(new_message=message, user_id=user_id, session_id=session_id):
-            event_count += 1
-            last_event = event
-            event_type = type(event).__name__
-            print(f"[DEBUG] Event {event_count}: {event_type}")
-            
-            text_chunk = None
-            
-            # Try multiple methods to extract text from event
-            # Method 1: content.parts
-            if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
-                for part in event.content.parts:
-                    if hasattr(part, 'text') and part.text:
-                        text_chunk = part.text
-                        print(f"[DEBUG] Found text via content.parts: {len(text_chunk)} chars")
-                        break
-            
-            # Method 2: data.text
-            if not text_chunk and hasattr(event, 'data') and event.data and hasattr(event.data, 'text') and event.data.text:
-                text_chunk = event.data.text
-                print(f"[DEBUG] Found text via data.text: {len(text_chunk)} chars")
-            
-            # Method 3: direct text attribute
-            if not text_chunk and hasattr(event, 'text') and event.text:
-                text_chunk = event.text
-                print(f"[DEBUG] Found text via text attr: {len(text_chunk)} chars")
-            
-            # Method 4: Check for response attribute (some ADK versions)
-            if not text_chunk and hasattr(event, 'response') and event.response:
-                if hasattr(event.response, 'text') and event.response.text:
-                    text_chunk = event.response.text
-                    print(f"[DEBUG] Found text via response.text: {len(text_chunk)} chars")
-                elif isinstance(event.response, str):
-                    text_chunk = event.response
-                    print(f"[DEBUG] Found text via response (str): {len(text_chunk)} chars")
-            
-            # If still no text, log the event structure for debugging
-            if not text_chunk:
-                print(f"[DEBUG] No text found in event. Event attrs: {dir(event)}")
-                if hasattr(event, 'content'):
-                    print(f"[DEBUG] Event.content: {event.content}")
-                if hasattr(event, 'data'):
-                    print(f"[DEBUG] Event.data: {event.data}")
-            
-            # Yield the text if we found any
-            if text_chunk:
-                full_text += text_chunk
-                yield text_chunk
-                
-        print(f"[DEBUG] Stream completed. Total events: {event_count}, Total text: {len(full_text)} chars")
-        
-        # If no streaming occurred, try to get response from last event
-        if not full_text and last_event:
-            print(f"[DEBUG] No text extracted, checking last_event for fallback")
-            if hasattr(last_event, 'response') and last_event.response:
-                fallback_text = str(last_event.response)
-                if fallback_text and fallback_text != "None":
-                    print(f"[DEBUG] Using last_event.response fallback: {len(fallback_text)} chars")
-                    full_text = fallback_text
-                    chunk_size = 200
-                    for i in range(0, len(full_text), chunk_size):
-                        yield full_text[i:i + chunk_size]
-                        await asyncio.sleep(0.01)
-                        
-    except Exception as e:
-        print(f"[DEBUG] stream_agent_response error: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        yield f"\n\n[Error: {str(e)}]"
+    models = await get_available_models()
+    headers = {
+        "ETag": strong_etag(models),
+        "Cache-Control": f"public, max-age={get_settings().models_cache_seconds}",
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return not_modified(headers)
+    return FastJSONResponse(models, headers=headers)
+
+
+@router.get("/models/stats")
+async def model_stats():
+    """
+    Rolling per-model latency statistics used by the model router.
+    """
+    return all_stats()
 
 
-async def run_agent(agent, prompt: str) -> str:
+@router.get("/models/limits")
+async def model_limits():
     """
-    Run agent and return full text response using ADK Runner.
-    Ensures app_name is passed to Runner initialization.
+    Adaptive concurrency limits of LiteLLM models: current limit, load and
+    latency gradient (baseline / recent latency; below 1.0 means queueing).
     """
-    try:
-        session_service = await get_session_service()
-        runner = Runner(agent=agent, session_service=session_service, app_name="prompt_agent")
-        
-        # Run agent asynchronously and collect events
-        full_text = ""
-        last_event = None
-        user_id = "default_user"
-        session_id = str(uuid.uuid4())
-        
-        await session_service.create_session(user_id=user_id, session_id=session_id, app_name="prompt_agent")
-        
-        message = Content(role="user", parts=[Part(text=prompt)])
-        
-        async for event in runner.run_async(new_message=message, user_id=user_id, session_id=session_id):
-            last_event = event
-            # Extract text from agent response events
-            if hasattr(event, 'content') and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if part.text:
-                        full_text += part.text
-            elif hasattr(event, 'data') and hasattr(event.data, 'text'):
-                full_text += event.data.text
-            elif hasattr(event, 'text'):
-                full_text += event.text
-                
-        # If no streaming occurred, try to get response from last event
-        if not full_text and last_event and hasattr(last_event, 'response'):
-            full_text = str(last_event.response)
-            
-        return full_text
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+    return limiter_metrics()
 
 
-from services.model_service import get_available_models
+@router.get("/models/residency")
+async def model_residency():
+    """
+    Ollama models currently loaded, and active/queued calls per model.
+    """
+    return {
+        "resident": sorted(await residency.resident_models()),
+        "scheduler": get_scheduler().snapshot(),
+    }
 
-@router.get("/models")
-async def list_models():
+
+@router.get("/agents/scheduler")
+async def agent_scheduler():
     """
-    List available models from configured providers.
+    Agent executions running and queued per priority class (interactive,
+    standard, bulk), with each class's reserved slots.
     """
-    return await get_available_models()
+    return get_priority_scheduler().snapshot()
+
+
+@router.get("/agents/speculation")
+async def speculation_stats():
+    """
+    Speculative enhancement: enhancements started for /agents/create
+    outputs, how many were claimed (already finished or still running),
+    missed or expired unused, and the hit rate.
+    """
+    return get_enhancement_speculation().snapshot()
+
+
+def _speculate_enhance(prompt: str, model: Optional[str]) -> Optional[str]:
+    """Start enhancing a created prompt in the background; returns its handle, if started."""
+    settings = get_settings()
+    if not settings.speculative_enhance_enabled:
+        return None
+    if settings.load_shedding_enabled and get_load_shedder().overloaded:
+        return None  # Speculation is the first work to go under load
+
+    async def work() -> EnhancePromptResponse:
+        routed, _ = route_request("enhancer", prompt, model)
+        return await _enhance(prompt, routed)
+
+    return get_enhancement_speculation().start(f"{model or ''}\n{prompt}", work)
+
+
+async def _captured(chunks: AsyncIterator[str], save: Callable[[str], object]) -> AsyncIterator[str]:
+    """Pass a raw text stream through, then hand its full text to ``save`` if it completed."""
+    parts = []
+    async for chunk in chunks:
+        if chunk.startswith(ERROR_PREFIX):
+            yield chunk
+            return
+        parts.append(chunk)
+        yield chunk
+    text = "".join(parts)
+    if text.strip():
+        save(text)
+
+
+async def _agent_events(
+    chunks: AsyncIterator[str],
+    done: Optional[Callable[[str], Dict[str, object]]] = None,
+    save: Optional[Callable[[str], "asyncio.Task[int]"]] = None,
+) -> AsyncIterator[str]:
+    """
+    SSE framing of an agent stream: 'chunk' events, then 'error' or 'done'.
+
+    ``done`` adds fields to the 'done' event from the full text. With
+    ``save``, the text is saved in the background once complete and a
+    trailing 'saved' event carries the new prompt's ID; 'done' is not held
+    back by the write.
+    """
+    parts = []
+    async for chunk in chunks:
+        if not chunk:
+            yield chunk
+        elif chunk.startswith(ERROR_PREFIX):
+            yield sse_event("error", {"detail": chunk[len(ERROR_PREFIX):].rstrip("]")})
+            return
+        else:
+            parts.append(chunk)
+            yield sse_event("chunk", {"text": chunk})
+    text = "".join(parts)
+    saving = save(text) if save is not None and text.strip() else None
+    yield sse_event("done", {"chars": len(text), **(done(text) if done is not None else {})})
+    if saving is not None:
+        try:
+            # Shielded: a client leaving now does not cancel the write
+            yield sse_event("saved", {"prompt_id": await asyncio.shield(saving)})
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Could not save the result: {e}"})
 
 
 @router.post("/agents/create")
-async def create_prompt(request: CreatePromptRequest):
+async def create_prompt(
+    request: CreatePromptRequest,
+    x_latency_budget_ms: Optional[int] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     """
     Stream prompt creation from Creator Agent.
     
     Creates a comprehensive prompt based on goal, audience, and constraints.
     Optionally uses Google Search for grounding.
+    
+    With ``stream_format: "sse"`` the text comes as 'chunk' events and ends
+    with a 'done' event; with ``speculate`` as well, the server starts
+    enhancing the result right away and 'done' carries the
+    ``enhance_handle`` to pass to /agents/enhance. With ``save``, the
+    result is added to the prompt history once complete (a trailing
+    'saved' event gives its ID in SSE mode).
     """
     try:
         print(f"[DEBUG] create_prompt called with model: {request.model}")
-        agent = create_creator_agent(use_search=request.use_search, model=request.model)
         
         prompt_text = f"""
 Generate a comprehensive LLM prompt based on the following:
@@ -220,15 +218,35 @@ Generate a comprehensive LLM prompt based on the following:
 Create a well-structured prompt with clear sections.
         """.strip()
         
+        model, route_headers = route_request("creator", prompt_text, request.model, x_latency_budget_ms)
+        route_headers.update(await residency_headers(model))
+        agent = create_creator_agent(use_search=request.use_search, model=model)
+        
+        chunks = stream_agent_response(agent, prompt_text, priority="interactive")
+        save = None
+        if request.save:
+            def save(text: str) -> "asyncio.Task[int]":
+                return save_prompt_later("creator", f"Goal: {request.goal}", text, [])
+        if request.stream_format == "sse":
+            done = None
+            if request.speculate:
+                def done(text: str) -> Dict[str, object]:
+                    return {"enhance_handle": _speculate_enhance(text, request.model) if text.strip() else None}
+            chunks = _agent_events(chunks, done, save)
+        elif save is not None:
+            chunks = _captured(chunks, save)
+        body, encoding_headers = encode_stream(chunks, accept_encoding)
         # Use proper streaming headers to prevent buffering
         headers = {
             "Cache-Control": "no-cache",
             "X-Accel-Buffering": "no",  # Disable nginx buffering
             "Connection": "keep-alive",
+            **route_headers,
+            **encoding_headers,
         }
         
         return StreamingResponse(
-            stream_agent_response(agent, prompt_text),
+            body,
             media_type="text/event-stream",  # Use SSE for better streaming support
             headers=headers
         )
@@ -237,129 +255,153 @@ Create a well-structured prompt with clear sections.
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.post("/agents/enhance", response_model=EnhancePromptResponse)
-async def enhance_prompt(request: EnhancePromptRequest):
-    """
-    Enhance and structure a prompt into logical blocks.
+async def _enhance(prompt: str, model: Optional[str]) -> EnhancePromptResponse:
+    """Run the enhancer on a prompt (with an already routed model)."""
+    agent = create_enhancer_agent(
+        model=model,
+        output_schema=schema_for(EnhancerOutput, model),
+    )
     
-    Breaks down the prompt into organized components with rationales.
-    """
-    try:
-        agent = create_enhancer_agent(model=request.model)
-        
-        prompt_text = f"""
+    prompt_text = f"""
 Analyze and structure the following prompt into logical blocks.
 
 Prompt to analyze:
 ---
-{request.prompt}
+{prompt}
 ---
 
 Return a JSON array of blocks.
-        """.strip()
-        
-        # Get response from agent using explicit Runner
-        response_text = await run_agent(agent, prompt_text)
-        
-        # Try to extract JSON from response
-        try:
-            # Remove markdown code fences if present
-            cleaned = response_text.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            blocks_data = json.loads(cleaned)
-            
-            # Convert to PromptBlock objects with IDs
-            import time
-            blocks = [
+    """.strip()
+    
+    try:
+        output = await run_structured(agent, prompt_text, EnhancerOutput)
+    except StructuredOutputError:
+        # Fallback: create a single block
+        return EnhancePromptResponse(
+            blocks=[
                 PromptBlock(
-                    id=f"{int(time.time() * 1000)}-{i}",
-                    type=block.get('type', 'UNKNOWN'),
-                    content=block.get('content', ''),
-                    rationale=block.get('rationale')
+                    id=f"{int(time.time() * 1000)}-0",
+                    type="TASK",
+                    content=prompt,
+                    rationale="Original prompt preserved"
                 )
-                for i, block in enumerate(blocks_data)
             ]
-            
-            return EnhancePromptResponse(blocks=blocks)
-        except json.JSONDecodeError:
-            # Fallback: create a single block
-            import time
-            return EnhancePromptResponse(
-                blocks=[
-                    PromptBlock(
-                        id=f"{int(time.time() * 1000)}-0",
-                        type="TASK",
-                        content=request.prompt,
-                        rationale="Original prompt preserved"
-                    )
-                ]
+        )
+    
+    # Convert to PromptBlock objects with IDs
+    blocks = [
+        PromptBlock(
+            id=f"{int(time.time() * 1000)}-{i}",
+            type=block.type,
+            content=block.content,
+            rationale=block.rationale
+        )
+        for i, block in enumerate(output.blocks)
+    ]
+    
+    return EnhancePromptResponse(blocks=blocks)
+
+
+@router.post("/agents/enhance", response_model=EnhancePromptResponse)
+async def enhance_prompt(
+    request: EnhancePromptRequest,
+    response: Response,
+    x_latency_budget_ms: Optional[int] = Header(None),
+):
+    """
+    Enhance and structure a prompt into logical blocks.
+    
+    Breaks down the prompt into organized components with rationales.
+    A ``speculation_handle`` from /agents/create returns the enhancement
+    already started for that text (X-Speculation: hit), if it still exists.
+    """
+    try:
+        if request.speculation_handle:
+            speculated = await get_enhancement_speculation().claim(
+                request.speculation_handle, f"{request.model or ''}\n{request.prompt}"
             )
+            response.headers["X-Speculation"] = "hit" if speculated is not None else "miss"
+            if speculated is not None:
+                return speculated
+        model, route_headers = route_request("enhancer", request.prompt, request.model, x_latency_budget_ms)
+        route_headers.update(await residency_headers(model))
+        response.headers.update(route_headers)
+        return await _enhance(request.prompt, model)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/agents/evaluate", response_model=EvaluationResult)
-async def evaluate_prompt(request: EvaluatePromptRequest):
+async def evaluate_prompt(
+    request: EvaluatePromptRequest,
+    response: Response,
+    x_latency_budget_ms: Optional[int] = Header(None),
+):
     """
     Evaluate a prompt against criteria.
     
     Analyzes the prompt and provides scores, risks, and suggestions.
+    In 'fast' mode the prompt is scored locally without a model call; in
+    'fast_then_llm' mode the evaluator only runs if the local score passes;
+    in 'per_criterion' mode each rubric criterion is scored concurrently.
     """
     try:
-        agent = create_evaluator_agent(custom_rubric=request.custom_rubric, model=request.model)
+        if request.mode == "fast":
+            return analyze_prompt(request.prompt, request.variables)
         
-        prompt_text = f"""
-Evaluate the following prompt:
-
----
-{request.prompt}
----
-
-Provide detailed scores, risks, and suggestions in JSON format.
-        """.strip()
+        if request.mode == "fast_then_llm":
+            local_result = analyze_prompt(request.prompt, request.variables)
+            if overall_score(local_result) < get_settings().fast_eval_gate_score:
+                return local_result
         
-        response_text = await run_agent(agent, prompt_text)
+        model, route_headers = route_request("evaluator", request.prompt, request.model, x_latency_budget_ms)
+        route_headers.update(await residency_headers(model))
+        response.headers.update(route_headers)
         
-        # Parse JSON response
-        try:
-            cleaned = response_text.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            eval_data = json.loads(cleaned)
-            return EvaluationResult(**eval_data)
-        except json.JSONDecodeError:
-            # Fallback evaluation
-            return EvaluationResult(
-                scores=[],
-                risks=["Unable to parse evaluation results"],
-                suggestions=["Please try again"]
-            )
+        if request.mode == "per_criterion":
+            return await evaluate_per_criterion(request.prompt, request.custom_rubric, model)
+        
+        return await evaluate_with_llm(request.prompt, request.custom_rubric, model)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/agents/evaluate/fast", response_model=FastEvaluateResponse)
+async def evaluate_prompts_fast(request: FastEvaluateRequest):
+    """
+    Score a batch of prompts locally.
+    
+    Deterministic and model-free, for triaging many prompts before
+    spending evaluator calls on the promising ones. The batch is scored in
+    a worker thread, so a large one does not stall the event loop.
+    """
+    results = await asyncio.to_thread(lambda: [analyze_prompt(prompt) for prompt in request.prompts])
+    return FastEvaluateResponse(results=results)
+
+
 @router.post("/agents/optimize", response_model=OptimizePromptResponse)
-async def optimize_prompt(request: OptimizePromptRequest):
+async def optimize_prompt(
+    request: OptimizePromptRequest,
+    response: Response,
+    x_latency_budget_ms: Optional[int] = Header(None),
+):
     """
     Generate optimized prompt variations.
     
     Creates improved versions based on evaluation feedback.
     """
     try:
-        agent = create_optimizer_agent(model=request.model)
+        model, route_headers = route_request("optimizer", request.prompt, request.model, x_latency_budget_ms)
+        route_headers.update(await residency_headers(model))
+        response.headers.update(route_headers)
+        agent = create_optimizer_agent(
+            model=model,
+            output_schema=schema_for(OptimizerOutput, model),
+        )
         
         suggestions_text = '\n'.join(f'- {s}' for s in request.suggestions)
         
@@ -377,44 +419,77 @@ Suggestions to incorporate:
 Return a JSON array of variations with prompts and rationales.
         """.strip()
         
-        response_text = await run_agent(agent, prompt_text)
-        
-        # Parse JSON response
         try:
-            cleaned = response_text.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            variations_data = json.loads(cleaned)
-            
-            import time
-            variations = [
-                OptimizerResult(
-                    id=f"{int(time.time() * 1000)}-{i}",
-                    prompt=var.get('prompt', ''),
-                    rationale=var.get('rationale', '')
-                )
-                for i, var in enumerate(variations_data)
-            ]
-            
-            return OptimizePromptResponse(variations=variations)
-        except json.JSONDecodeError:
+            output = await run_structured(agent, prompt_text, OptimizerOutput)
+        except StructuredOutputError:
             return OptimizePromptResponse(variations=[])
+        
+        variations = [
+            OptimizerResult(
+                id=f"{int(time.time() * 1000)}-{i}",
+                prompt=var.prompt,
+                rationale=var.rationale
+            )
+            for i, var in enumerate(output.variations)
+            if var.prompt
+        ]
+        
+        return OptimizePromptResponse(variations=variations)
+    except DeadlineExceeded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/agents/optimize/tournament")
+async def optimize_tournament(request: OptimizeTournamentRequest):
+    """
+    Run an optimizer tournament.
+    
+    Generates variations in parallel independent calls, scores each one as it
+    finishes, and streams ranked results as SSE events, optionally over
+    several rounds that keep the top-k candidates.
+    """
+    async def event_stream():
+        try:
+            async for event, payload in run_tournament(request):
+                yield sse_event(event, payload)
+        except Exception as e:
+            print(f"[DEBUG] optimize_tournament error: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
+@router.post("/agents/rank", response_model=RankPromptsResponse)
+async def rank_prompt_variations(request: RankPromptsRequest):
+    """
+    Rank prompt variations with pairwise judge comparisons.
+    
+    Uses Swiss-system pairing with Elo updates, so a stable top-k costs
+    roughly O(n log n) judge calls instead of all O(n^2) pairs.
+    """
+    try:
+        return await rank_prompts(request)
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/agents/test")
-async def test_prompt(request: TestPromptRequest):
+async def test_prompt(
+    request: TestPromptRequest,
+    x_latency_budget_ms: Optional[int] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+):
     """
     Test a prompt with variable interpolation.
     
-    Replaces variables and streams the execution result.
+    Replaces variables and streams the execution result, as plain text or,
+    with ``stream_format: "sse"``, as 'chunk' events and a final 'done'.
+    With ``save``, the result is added to the prompt history once complete
+    (a trailing 'saved' event gives its ID in SSE mode).
     """
     try:
         # Check for missing variables
@@ -428,18 +503,65 @@ async def test_prompt(request: TestPromptRequest):
         # Interpolate variables
         final_prompt = interpolate_variables(request.prompt, request.variables)
         
-        agent = create_playground_agent(model=request.model)
+        model, route_headers = route_request("playground", final_prompt, request.model, x_latency_budget_ms)
+        route_headers.update(await residency_headers(model))
+        agent = create_playground_agent(model=model)
         
+        chunks = stream_agent_response(agent, final_prompt, priority="interactive")
+        save = None
+        if request.save:
+            def save(text: str) -> "asyncio.Task[int]":
+                return save_prompt_later("playground", final_prompt, text)
+        if request.stream_format == "sse":
+            body, encoding_headers = encode_stream(_agent_events(chunks, save=save), accept_encoding)
+            return StreamingResponse(
+                body,
+                media_type="text/event-stream",
+                headers={**SSE_HEADERS, **route_headers, **encoding_headers}
+            )
+        if save is not None:
+            chunks = _captured(chunks, save)
+        body, encoding_headers = encode_stream(chunks, accept_encoding)
         return StreamingResponse(
-            stream_agent_response(agent, final_prompt),
-            media_type="text/plain"
+            body,
+            media_type="text/plain",
+            headers={**route_headers, **encoding_headers}
         )
-    except HTTPException:
+    except (HTTPException, DeadlineExceeded):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/agents/test/compare")
+async def compare_prompt_models(request: CompareModelsRequest):
+    """
+    Test a prompt against several models concurrently.
+    
+    Streams SSE events with output chunks tagged by model, interleaved as
+    they arrive, followed by each model's time to first token, latency and
+    output length.
+    """
+    missing = find_missing_variables(request.prompt, request.variables)
+    if missing:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Missing required variables: {', '.join(missing)}"
+        )
+    
+    final_prompt = interpolate_variables(request.prompt, request.variables)
+    
+    async def event_stream():
+        try:
+            async for event, payload in compare_models(final_prompt, request.models):
+                yield sse_event(event, payload)
+        except Exception as e:
+            print(f"[DEBUG] compare_prompt_models error: {str(e)}")
+            yield sse_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+
 @router.post("/agents/few-shot", response_model=GenerateFewShotResponse)
 async def generate_few_shot_examples(request: GenerateFewShotRequest):
     """
@@ -449,7 +571,10 @@ async def generate_few_shot_examples(request: GenerateFewShotRequest):
     """
     try:
         # Use creator agent for example generation
-        agent = create_creator_agent(model=request.model)
+        agent = create_creator_agent(
+            model=request.model,
+            output_schema=schema_for(GenerateFewShotResponse, request.model),
+        )
         
         prompt_text = f"""
 Generate {request.count} high-quality few-shot examples for this prompt:
@@ -461,23 +586,11 @@ Generate {request.count} high-quality few-shot examples for this prompt:
 Return as JSON array with 'input' and 'output' fields.
         """.strip()
         
-        response_text = await run_agent(agent, prompt_text)
-        
         try:
-            cleaned = response_text.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
-            
-            examples_data = json.loads(cleaned)
-            examples = [FewShotExample(**ex) for ex in examples_data]
-            
-            return GenerateFewShotResponse(examples=examples)
-        except json.JSONDecodeError:
+            return await run_structured(agent, prompt_text, GenerateFewShotResponse)
+        except StructuredOutputError:
             return GenerateFewShotResponse(examples=[])
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,21 +2,49 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+from api.middleware import DeadlineMiddleware, LoadSheddingMiddleware, LoopMonitorMiddleware, ProfilingMiddleware
 from api.routes import router
+from api.experiment_routes import router as experiment_router
+from api.job_routes import router as job_router
+from api.debug_routes import router as debug_router
+from api.playground_routes import router as playground_router
 from config.settings import get_settings
 from database import init_db
+from models import breaker_states
+from services.model_catalog import ollama_catalog
+from services.ollama_client import close_ollama_client
+from services.ollama_residency import residency
+from services.capture import drain_captures
+from services.deadlines import DeadlineExceeded
+from services.jobs import get_job_worker
+from services.load_shedder import get_load_shedder
+from services.loop_monitor import get_loop_monitor
+import asyncio
 
 settings = get_settings()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Initialize database on startup."""
+    """Initialize database, warm the model catalog and start the job workers and loop monitor on startup."""
     print("Initializing database...")
     await init_db()
     print("✅ Database initialized!")
+    if settings.model_provider == "litellm":
+        ollama_catalog.refresh()
+        residency.refresh()
+    warm_up = asyncio.create_task(residency.warm_up())
+    get_job_worker().start()
+    get_loop_monitor().start()
+    get_load_shedder().start()
     yield
+    warm_up.cancel()
+    get_load_shedder().stop()
+    await get_loop_monitor().stop()
+    await get_job_worker().stop()
+    await drain_captures()
     print("Shutting down...")
+    await close_ollama_client()
 
 
 app = FastAPI(
@@ -28,13 +56,23 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Configure CORS for frontend
+# Per-request deadlines (X-Latency-Budget-Ms or per-endpoint defaults)
+app.add_middleware(DeadlineMiddleware)
+# Attribute event loop stalls and profiles to routes
+app.add_middleware(LoopMonitorMiddleware)
+# cProfile requests tagged with X-Profile: <ADMIN_TOKEN>
+app.add_middleware(ProfilingMiddleware)
+# Shed new agent work while overloaded, before any handler or deadline work runs
+app.add_middleware(LoadSheddingMiddleware)
+
+# Configure CORS for frontend (added last, so it is outermost and covers 503s too)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Model-Route", "X-Model-Route-Reason", "X-Model-Route-Estimate-Ms", "X-Model-Route-Budget-Ms", "X-Model-Residency", "Retry-After", "X-Profile-Id", "X-Speculation", "ETag"],
 )
 
 from fastapi.exceptions import RequestValidationError
@@ -55,10 +93,21 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": exc.errors(), "body": str(exc.body)},
     )
 
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exception_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": str(exc), "partial": exc.partial or None},
+    )
+
 # Include API routes
 from api.data_routes import router as data_router
 app.include_router(router, prefix="/api")
 app.include_router(data_router, prefix="/api")
+app.include_router(experiment_router, prefix="/api")
+app.include_router(job_router, prefix="/api")
+app.include_router(playground_router, prefix="/api")
+app.include_router(debug_router, prefix="/api")
 
 
 @app.get("/")
@@ -78,7 +127,9 @@ async def health_check():
     return {
         "status": "healthy",
         "framework": "Google ADK",
-        "environment": settings.environment
+        "environment": settings.environment,
+        "providers": breaker_states(),
+        "load": get_load_shedder().snapshot()
     }
 
 
@@ -0,0 +1,27 @@
+"""Server-Sent Events helpers for structured streaming endpoints."""
+import json
+from typing import Any
+from pydantic import BaseModel
+
+# Headers that keep proxies from buffering event streams
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # Disable nginx buffering
+    "Connection": "keep-alive",
+}
+
+
+def sse_event(event: str, data: Any) -> str:
+    """
+    Format a single SSE frame.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload (Pydantic models are dumped first)
+
+    Returns:
+        The encoded frame, terminated by a blank line
+    """
+    if isinstance(data, BaseModel):
+        data = data.model_dump(mode="json")
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
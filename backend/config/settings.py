@@ -22,6 +22,96 @@ class Settings(BaseSettings):
     model_provider: str = "gemini"  # "gemini" or "litellm"
     litellm_model: str = "ollama/kimi-k2-thinking:cloud"  # Model ID for LiteLLM (e.g., "ollama/llama3.2")
     litellm_api_base: str = "http://localhost:11501"  # Ollama default API base
+    litellm_structured_output: bool = False  # Whether the LiteLLM provider honours JSON schemas
+    ollama_timeout_seconds: float = 2.0  # Timeout for direct Ollama API calls (model catalog)
+    ollama_catalog_ttl_seconds: float = 60.0  # Age after which the model list is refreshed in the background
+    ollama_catalog_error_ttl_seconds: float = 15.0  # Time a failed fetch is remembered before retrying
+    models_cache_seconds: int = 30  # Time clients may reuse a GET /models response without revalidating
+    ollama_preload_models: str = ""  # Comma-separated models to load at startup (defaults to LITELLM_MODEL)
+    ollama_keep_alive: str = "30m"  # How long Ollama keeps a model loaded after a request
+    ollama_preload_timeout_seconds: float = 120.0  # Timeout for loading a model at startup
+    ollama_ps_ttl_seconds: float = 5.0  # Age after which the loaded-model list is re-read from /api/ps
+    ollama_max_loaded_models: int = 1  # Distinct models the Ollama server can hold at once
+    ollama_switch_batch: int = 8  # Requests a loaded model may still admit while others wait
+    
+    # Adaptive Concurrency (AIMD) for LiteLLM models
+    aimd_initial_limit: int = 2  # In-flight calls per model before any feedback
+    aimd_min_limit: int = 1
+    aimd_max_limit: int = 32
+    aimd_backoff: float = 0.7  # Factor the limit is cut by on congestion or errors
+    aimd_latency_tolerance: float = 1.5  # Latency over baseline that counts as congestion
+    
+    # Resilience Configuration
+    model_fallbacks: str = ""  # Comma-separated failover order after the requested model (e.g. "ollama/llama3.2,gemini-2.5-flash")
+    hedge_after_ms: int = 3000  # Start the next fallback if no response arrives within this time (0 disables hedging)
+    breaker_failure_threshold: int = 3  # Consecutive failures that open a provider's circuit breaker
+    breaker_reset_seconds: float = 30.0  # Time an open breaker waits before letting a probe through
+    
+    # Agent Scheduling Configuration
+    agent_concurrency: int = 16  # Agent executions in flight per server process
+    interactive_share: float = 0.5  # Share of AGENT_CONCURRENCY guaranteed to interactive streams
+    standard_share: float = 0.3  # ... to regular API calls
+    bulk_share: float = 0.2  # ... to background jobs
+    priority_aging_seconds: float = 5.0  # Wait after which a queued call is promoted one class
+    
+    # Stream Framing Configuration
+    stream_coalesce_chars: int = 512  # Buffered characters that are sent as one frame
+    stream_coalesce_ms: float = 40.0  # Longest a chunk waits to be merged with later ones (0 disables coalescing)
+    stream_compression: bool = False  # Gzip /agents/create and /agents/test streams for clients that accept it
+    stream_buffer_bytes: int = 262144  # Unread output a stream may hold in memory
+    stream_memory_budget_bytes: int = 16777216  # Unread output all streams together may hold in memory
+    stream_overflow: str = "spill"  # Past those limits: "spill" to disk, "block" the model stream, or "drop" the stream
+    stream_spill_max_bytes: int = 67108864  # Spilled output after which a stream is dropped anyway (0 for no limit)
+    stream_spill_dir: str = ""  # Directory for spill files (defaults to the system temp dir)
+    
+    # Speculation Configuration
+    speculative_enhance_enabled: bool = True  # Honour 'speculate' on /agents/create
+    speculation_ttl_seconds: float = 120.0  # Unclaimed speculative work is cancelled after this
+    speculation_max_pending: int = 50  # Speculative runs pending at once per process
+    
+    # Playground WebSocket Configuration
+    ws_max_concurrent_runs: int = 4  # Runs one playground connection may have in flight
+    
+    # Event Loop Monitoring
+    slow_callback_ms: float = 100.0  # Loop stalls longer than this are recorded with a stack trace
+    admin_token: str = ""  # Enables the profiling endpoints and X-Profile header when set
+    
+    # Load Shedding Configuration
+    load_shedding_enabled: bool = True  # Reject new agent requests with 503 while overloaded
+    shed_target_ms: float = 500.0  # Acceptable standing delay (event loop lag + agent queue wait)
+    shed_interval_ms: float = 2000.0  # Delay must stay above target this long to count as overload
+    
+    # Deadline Configuration
+    request_timeout_seconds: float = 120.0  # Request budget; X-Latency-Budget-Ms can only shorten it (0 disables it)
+    endpoint_timeouts: str = "/api/agents/optimize/tournament=600,/api/agents/rank=600,/api/agents/test/compare=300"  # Per-endpoint budgets (path=seconds)
+    agent_timeout_seconds: float = 300.0  # Cap on a single agent run, also for background jobs (0 disables it)
+    
+    # Routing Configuration
+    model_router_enabled: bool = True  # Pick a model from live latency stats when a request names none
+    router_models: str = ""  # Comma-separated candidate models (defaults to the ADK model and thinking model)
+    
+    # Structured Output Configuration
+    structured_output_retries: int = 1  # Reformat retries when a response cannot be repaired
+    
+    # Evaluation Configuration
+    prompt_token_budget: int = 4000  # Token budget the local analyzer checks prompts against
+    fast_eval_gate_score: int = 60  # Local score below which 'fast_then_llm' skips the evaluator
+    eval_fanout_concurrency: int = 4  # Max concurrent evaluator calls per 'per_criterion' request
+    tournament_concurrency: int = 4  # Max concurrent candidates per optimizer tournament
+    ranking_concurrency: int = 8  # Max concurrent judge calls per ranking round
+    ranking_stable_rounds: int = 2  # Rounds the top-k must stay unchanged to stop early
+    
+    # Experiment Configuration
+    experiment_concurrency: int = 4  # Max concurrent (row, variant) cells per experiment
+    experiment_bootstrap_samples: int = 10000  # Bootstrap resamples for confidence intervals
+    
+    # Job Queue Configuration
+    job_workers: int = 2  # Jobs run concurrently per server process
+    job_lease_seconds: float = 60.0  # Lease length; a job whose worker stops heartbeating is re-run after this
+    job_heartbeat_seconds: float = 2.0  # Interval for lease renewal, progress writes and cancel checks
+    job_poll_seconds: float = 1.0  # Queue polling interval (also used by progress streams)
+    job_max_attempts: int = 3  # Attempts before a job is marked failed
+    job_retry_base_seconds: float = 5.0  # Retry backoff: base * 2^(attempt - 1)
     
     # API Configuration - stored as string, parsed in get_settings()
     cors_origins: str = "http://localhost:5173,http://localhost,http://localhost:3000,http://localhost:80"
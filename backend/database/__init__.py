@@ -1,7 +1,7 @@
 """Database package initialization."""
 
 from .connection import get_db, init_db
-from .models import Session, Message, Prompt, Template
+from .models import Session, Message, Prompt, Template, CollectionVersion, Experiment, ExperimentResult, Job
 from .session_service import DatabaseSessionService
 from . import crud
 
@@ -12,6 +12,10 @@ __all__ = [
     "Message",
     "Prompt",
     "Template",
+    "CollectionVersion",
+    "Experiment",
+    "ExperimentResult",
+    "Job",
     "DatabaseSessionService",
     "crud",
 ]
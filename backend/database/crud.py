@@ -1,10 +1,14 @@
 """CRUD operations for database models."""
 
-from typing import List, Optional
-from sqlalchemy import select, delete
+from typing import Any, Dict, List, Optional
+from sqlalchemy import select, delete, update, and_, or_, func
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
-from .models import Session as SessionModel, Message, Prompt, Template
+from datetime import datetime, timedelta
+from .models import Session as SessionModel, Message, Prompt, Template, CollectionVersion, Experiment, ExperimentResult, Job
+
+# collection_versions owner whose 'templates' version covers public templates
+PUBLIC_USER_ID = "*"
 
 
 # ===== Sessions =====
@@ -71,6 +75,47 @@ async def get_session_messages(db: AsyncSession, session_id: str) -> List[Messag
     return list(result.scalars().all())
 
 
+# ===== Collection versions =====
+
+async def get_collection_version(db: AsyncSession, user_id: str, collection: str) -> int:
+    """Current version of a user's collection (0 if it never changed)."""
+    result = await db.execute(
+        select(CollectionVersion.version).where(
+            CollectionVersion.user_id == user_id,
+            CollectionVersion.collection == collection,
+        )
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def bump_collection_version(db: AsyncSession, user_id: str, collection: str) -> None:
+    """
+    Increment a user's collection version, as part of the caller's transaction.
+
+    Called by every write to the collection before it commits, so a list's
+    version changes exactly when its contents can have.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+        await db.execute(
+            insert(CollectionVersion)
+            .values(user_id=user_id, collection=collection, version=1)
+            .on_conflict_do_update(
+                index_elements=[CollectionVersion.user_id, CollectionVersion.collection],
+                set_={"version": CollectionVersion.version + 1},
+            )
+        )
+        return
+    result = await db.execute(
+        update(CollectionVersion)
+        .where(CollectionVersion.user_id == user_id, CollectionVersion.collection == collection)
+        .values(version=CollectionVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        db.add(CollectionVersion(user_id=user_id, collection=collection, version=1))
+
+
 # ===== Prompts =====
 
 async def create_prompt(
@@ -90,11 +135,38 @@ async def create_prompt(
         tags=tags
     )
     db.add(prompt)
+    await bump_collection_version(db, user_id, "prompts")
     await db.commit()
     await db.refresh(prompt)
     return prompt
 
 
+async def get_prompt_summaries(
+    db: AsyncSession,
+    user_id: str,
+    agent_type: Optional[str] = None,
+    limit: int = 50,
+    preview_chars: int = 200
+) -> List[Dict[str, Any]]:
+    """Get prompts for a user for list views: previews and lengths instead of the full text."""
+    query = select(
+        Prompt.id,
+        Prompt.agent_type,
+        Prompt.created_at,
+        Prompt.tags,
+        func.substr(Prompt.prompt_text, 1, preview_chars).label("prompt_preview"),
+        func.length(Prompt.prompt_text).label("prompt_chars"),
+        func.substr(Prompt.result, 1, preview_chars).label("result_preview"),
+        func.length(Prompt.result).label("result_chars"),
+    ).where(Prompt.user_id == user_id)
+    if agent_type:
+        query = query.where(Prompt.agent_type == agent_type)
+    query = query.order_by(Prompt.created_at.desc()).limit(limit)
+    
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
+
 async def get_prompts(
     db: AsyncSession,
     user_id: str,
@@ -119,13 +191,25 @@ async def get_prompt(db: AsyncSession, prompt_id: int) -> Optional[Prompt]:
 
 async def delete_prompt(db: AsyncSession, prompt_id: int) -> bool:
     """Delete a prompt."""
+    owner = await db.execute(select(Prompt.user_id).where(Prompt.id == prompt_id))
+    user_id = owner.scalar_one_or_none()
+    if user_id is None:
+        return False
     result = await db.execute(delete(Prompt).where(Prompt.id == prompt_id))
+    await bump_collection_version(db, user_id, "prompts")
     await db.commit()
     return result.rowcount > 0
 
 
 # ===== Templates =====
 
+async def _bump_templates_version(db: AsyncSession, user_id: str, is_public: bool) -> None:
+    # Public templates are listed for every user, so their changes bump the shared version too
+    await bump_collection_version(db, user_id, "templates")
+    if is_public:
+        await bump_collection_version(db, PUBLIC_USER_ID, "templates")
+
+
 async def create_template(
     db: AsyncSession,
     user_id: str,
@@ -145,6 +229,7 @@ async def create_template(
         is_public=is_public
     )
     db.add(template)
+    await _bump_templates_version(db, user_id, is_public)
     await db.commit()
     await db.refresh(template)
     return template
@@ -168,6 +253,36 @@ async def get_templates(
     return list(result.scalars().all())
 
 
+async def get_template_summaries(
+    db: AsyncSession,
+    user_id: str,
+    category: Optional[str] = None,
+    include_public: bool = True,
+    preview_chars: int = 200
+) -> List[Dict[str, Any]]:
+    """Get templates for a user for list views: a preview and length instead of the full text."""
+    query = select(
+        Template.id,
+        Template.user_id,
+        Template.name,
+        Template.description,
+        Template.category,
+        Template.is_public,
+        Template.created_at,
+        Template.updated_at,
+        func.substr(Template.template_text, 1, preview_chars).label("template_preview"),
+        func.length(Template.template_text).label("template_chars"),
+    ).where(
+        (Template.user_id == user_id) | (Template.is_public.is_(True) if include_public else False)
+    )
+    if category:
+        query = query.where(Template.category == category)
+    query = query.order_by(Template.updated_at.desc())
+    
+    result = await db.execute(query)
+    return [dict(row) for row in result.mappings()]
+
+
 async def get_template(db: AsyncSession, template_id: int) -> Optional[Template]:
     """Get a specific template."""
     result = await db.execute(select(Template).where(Template.id == template_id))
@@ -197,6 +312,7 @@ async def update_template(
         template.category = category
     
     template.updated_at = datetime.utcnow()
+    await _bump_templates_version(db, template.user_id, template.is_public)
     await db.commit()
     await db.refresh(template)
     return template
@@ -204,6 +320,337 @@ async def update_template(
 
 async def delete_template(db: AsyncSession, template_id: int) -> bool:
     """Delete a template."""
+    owner = await db.execute(select(Template.user_id, Template.is_public).where(Template.id == template_id))
+    row = owner.one_or_none()
+    if row is None:
+        return False
     result = await db.execute(delete(Template).where(Template.id == template_id))
+    await _bump_templates_version(db, row.user_id, row.is_public)
     await db.commit()
     return result.rowcount > 0
+
+
+# ===== Experiments =====
+
+async def create_experiment(
+    db: AsyncSession,
+    experiment_id: str,
+    user_id: str,
+    variants: List[str],
+    rows: List[Dict[str, str]],
+    name: Optional[str] = None,
+    model: Optional[str] = None,
+    grader_model: Optional[str] = None,
+    criteria: Optional[str] = None
+) -> Experiment:
+    """Create a new experiment."""
+    experiment = Experiment(
+        id=experiment_id,
+        user_id=user_id,
+        name=name,
+        variants=variants,
+        rows=rows,
+        model=model,
+        grader_model=grader_model,
+        criteria=criteria,
+        status="pending"
+    )
+    db.add(experiment)
+    await db.commit()
+    await db.refresh(experiment)
+    return experiment
+
+
+async def get_experiment(db: AsyncSession, experiment_id: str) -> Optional[Experiment]:
+    """Get an experiment by ID."""
+    result = await db.execute(select(Experiment).where(Experiment.id == experiment_id))
+    return result.scalar_one_or_none()
+
+
+async def update_experiment_status(
+    db: AsyncSession,
+    experiment_id: str,
+    status: str,
+    summary: Optional[Dict[str, Any]] = None,
+    error: Optional[str] = None,
+    job_id: Optional[str] = None
+) -> Optional[Experiment]:
+    """Update an experiment's status, summary, error and job."""
+    experiment = await get_experiment(db, experiment_id)
+    if not experiment:
+        return None
+    
+    experiment.status = status
+    if summary is not None:
+        experiment.summary = summary
+    if job_id is not None:
+        experiment.job_id = job_id
+    experiment.error = error
+    experiment.updated_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(experiment)
+    return experiment
+
+
+async def get_experiment_results(db: AsyncSession, experiment_id: str) -> List[ExperimentResult]:
+    """Get all recorded cells of an experiment."""
+    result = await db.execute(
+        select(ExperimentResult)
+        .where(ExperimentResult.experiment_id == experiment_id)
+        .order_by(ExperimentResult.row_index.asc(), ExperimentResult.variant_index.asc())
+    )
+    return list(result.scalars().all())
+
+
+async def save_experiment_result(
+    db: AsyncSession,
+    experiment_id: str,
+    row_index: int,
+    variant_index: int,
+    output: Optional[str] = None,
+    score: Optional[float] = None,
+    rationale: Optional[str] = None,
+    error: Optional[str] = None,
+    latency_ms: Optional[float] = None
+) -> ExperimentResult:
+    """Insert or replace the result of one experiment cell."""
+    result = await db.execute(
+        select(ExperimentResult).where(
+            ExperimentResult.experiment_id == experiment_id,
+            ExperimentResult.row_index == row_index,
+            ExperimentResult.variant_index == variant_index
+        )
+    )
+    cell = result.scalar_one_or_none()
+    if cell is None:
+        cell = ExperimentResult(
+            experiment_id=experiment_id,
+            row_index=row_index,
+            variant_index=variant_index
+        )
+        db.add(cell)
+    
+    cell.output = output
+    cell.score = score
+    cell.rationale = rationale
+    cell.error = error
+    cell.latency_ms = latency_ms
+    await db.commit()
+    await db.refresh(cell)
+    return cell
+
+
+# ===== Jobs =====
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+async def create_job(
+    db: AsyncSession,
+    job_id: str,
+    user_id: str,
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: int = 3
+) -> Job:
+    """Queue a new job."""
+    job = Job(
+        id=job_id,
+        user_id=user_id,
+        kind=kind,
+        payload=payload,
+        max_attempts=max_attempts,
+        status="queued",
+        run_after=datetime.utcnow()
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: str) -> Optional[Job]:
+    """Get a job by ID."""
+    result = await db.execute(select(Job).where(Job.id == job_id))
+    return result.scalar_one_or_none()
+
+
+async def get_user_jobs(
+    db: AsyncSession,
+    user_id: str,
+    status: Optional[str] = None,
+    limit: int = 50
+) -> List[Job]:
+    """Get a user's jobs, newest first."""
+    query = select(Job).where(Job.user_id == user_id)
+    if status:
+        query = query.where(Job.status == status)
+    result = await db.execute(query.order_by(Job.created_at.desc()).limit(limit))
+    return list(result.scalars().all())
+
+
+def _leasable(now: datetime):
+    """Jobs a worker may take: queued and due, or running with an expired lease and no cancel request."""
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(
+            Job.status == "running",
+            Job.lease_expires_at < now,
+            Job.attempts < Job.max_attempts,
+            Job.cancel_requested.is_(False),
+        ),
+    )
+
+
+async def lease_next_job(db: AsyncSession, worker_id: str, lease_seconds: float) -> Optional[Job]:
+    """
+    Claim the oldest available job for a worker.
+    
+    Claims use a conditional update, so concurrent workers (in any process)
+    never run the same job. Jobs whose worker died are cancelled if a cancel
+    was requested, and failed if they are out of attempts.
+    """
+    now = datetime.utcnow()
+    await db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.lease_expires_at < now, Job.cancel_requested.is_(True))
+        .values(status="cancelled", lease_owner=None, finished_at=now, updated_at=now)
+    )
+    await db.execute(
+        update(Job)
+        .where(Job.status == "running", Job.lease_expires_at < now, Job.attempts >= Job.max_attempts)
+        .values(status="failed", error="Worker lost (lease expired)", lease_owner=None, finished_at=now)
+    )
+    await db.commit()
+    
+    result = await db.execute(
+        select(Job.id).where(_leasable(now)).order_by(Job.created_at.asc()).limit(5)
+    )
+    for job_id in result.scalars().all():
+        claimed = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, _leasable(now))
+            .values(
+                status="running",
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=Job.attempts + 1,
+                started_at=func.coalesce(Job.started_at, now),  # First start, kept across retries
+                updated_at=now
+            )
+        )
+        await db.commit()
+        if claimed.rowcount == 1:
+            return await get_job(db, job_id)
+    return None
+
+
+async def heartbeat_job(
+    db: AsyncSession,
+    job_id: str,
+    worker_id: str,
+    lease_seconds: float,
+    progress: Optional[float] = None,
+    progress_message: Optional[str] = None
+) -> Optional[Job]:
+    """
+    Renew a job's lease and record its progress.
+    
+    Returns:
+        The job, or None if the worker no longer holds the lease
+    """
+    now = datetime.utcnow()
+    values: Dict[str, Any] = {"lease_expires_at": now + timedelta(seconds=lease_seconds), "updated_at": now}
+    if progress is not None:
+        values["progress"] = progress
+    if progress_message is not None:
+        values["progress_message"] = progress_message
+    result = await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == worker_id, Job.status == "running")
+        .values(**values)
+    )
+    await db.commit()
+    if result.rowcount != 1:
+        return None
+    job = await get_job(db, job_id)
+    await db.refresh(job)
+    return job
+
+
+async def finish_job(
+    db: AsyncSession,
+    job_id: str,
+    worker_id: str,
+    status: str,
+    result: Any = None,
+    error: Optional[str] = None
+) -> bool:
+    """Record a leased job's final status ('succeeded', 'failed' or 'cancelled')."""
+    now = datetime.utcnow()
+    values: Dict[str, Any] = {
+        "status": status,
+        "result": result,
+        "error": error,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "finished_at": now,
+        "updated_at": now
+    }
+    if status == "succeeded":
+        values["progress"] = 1.0
+    updated = await db.execute(
+        update(Job).where(Job.id == job_id, Job.lease_owner == worker_id).values(**values)
+    )
+    await db.commit()
+    return updated.rowcount == 1
+
+
+async def requeue_job(
+    db: AsyncSession,
+    job_id: str,
+    worker_id: str,
+    delay_seconds: float = 0.0,
+    error: Optional[str] = None,
+    refund_attempt: bool = False
+) -> bool:
+    """Put a leased job back in the queue (retry after an error, or worker shutdown)."""
+    now = datetime.utcnow()
+    values: Dict[str, Any] = {
+        "status": "queued",
+        "error": error,
+        "lease_owner": None,
+        "lease_expires_at": None,
+        "run_after": now + timedelta(seconds=delay_seconds),
+        "updated_at": now
+    }
+    if refund_attempt:
+        values["attempts"] = Job.attempts - 1
+    updated = await db.execute(
+        update(Job).where(Job.id == job_id, Job.lease_owner == worker_id).values(**values)
+    )
+    await db.commit()
+    return updated.rowcount == 1
+
+
+async def cancel_job(db: AsyncSession, job_id: str) -> Optional[Job]:
+    """
+    Cancel a job: queued jobs stop immediately, running jobs are flagged and
+    stopped by their worker at its next heartbeat.
+    """
+    now = datetime.utcnow()
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "queued")
+        .values(status="cancelled", cancel_requested=True, finished_at=now, updated_at=now)
+    )
+    await db.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == "running")
+        .values(cancel_requested=True, updated_at=now)
+    )
+    await db.commit()
+    job = await get_job(db, job_id)
+    if job:
+        await db.refresh(job)
+    return job
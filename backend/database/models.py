@@ -1,7 +1,7 @@
 """SQLAlchemy database models."""
 
 from datetime import datetime
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, DateTime, ForeignKey, JSON, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -67,3 +67,84 @@ class Template(Base):
     is_public = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class CollectionVersion(Base):
+    """Change counter of one user's collection (e.g. prompts), used for list ETags."""
+    
+    __tablename__ = "collection_versions"
+    
+    user_id = Column(String, primary_key=True)  # '*' for public templates, which appear in every user's list
+    collection = Column(String, primary_key=True)  # 'prompts' or 'templates'
+    version = Column(Integer, nullable=False, default=0)
+
+
+class Experiment(Base):
+    """A/B experiment comparing prompt variants over a shared dataset."""
+    
+    __tablename__ = "experiments"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    name = Column(String, nullable=True)
+    variants = Column(JSON, nullable=False)  # Prompt templates; index 0 is the control
+    rows = Column(JSON, nullable=False)  # Variable dicts interpolated into every variant
+    model = Column(String, nullable=True)
+    grader_model = Column(String, nullable=True)
+    criteria = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default="pending")  # pending, running, completed, failed, cancelled
+    job_id = Column(String, nullable=True)  # Job that runs the experiment
+    summary = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship
+    results = relationship("ExperimentResult", back_populates="experiment", cascade="all, delete-orphan")
+
+
+class ExperimentResult(Base):
+    """Output and grade for one (row, variant) cell of an experiment."""
+    
+    __tablename__ = "experiment_results"
+    __table_args__ = (UniqueConstraint("experiment_id", "row_index", "variant_index"),)
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    experiment_id = Column(String, ForeignKey("experiments.id"), nullable=False, index=True)
+    row_index = Column(Integer, nullable=False)
+    variant_index = Column(Integer, nullable=False)
+    output = Column(Text, nullable=True)
+    score = Column(Float, nullable=True)
+    rationale = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationship
+    experiment = relationship("Experiment", back_populates="results")
+
+
+class Job(Base):
+    """Background job leased and run by a worker pool."""
+    
+    __tablename__ = "jobs"
+    
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # 'optimize_tournament', 'rank', 'evaluate_batch', 'experiment'
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+    progress = Column(Float, nullable=False, default=0.0)  # 0.0 - 1.0
+    progress_message = Column(Text, nullable=True)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    lease_owner = Column(String, nullable=True)  # Worker currently running the job
+    lease_expires_at = Column(DateTime, nullable=True)  # Renewed by heartbeats; expired leases are re-queued
+    run_after = Column(DateTime, default=datetime.utcnow)  # Earliest start (retry backoff)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
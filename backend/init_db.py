@@ -19,6 +19,10 @@ async def main():
     print("  - messages")
     print("  - prompts")
     print("  - templates")
+    print("  - collection_versions")
+    print("  - experiments")
+    print("  - experiment_results")
+    print("  - jobs")
 
 
 if __name__ == "__main__":
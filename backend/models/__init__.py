@@ -1,4 +1,14 @@
 """Models module for model provider abstraction."""
-from models.model_factory import get_model, get_model_name
+from models.model_factory import get_model, get_model_name, supports_structured_output
+from models.model_router import route_model, route_request
+from models.resilient_llm import ResilientLlm, breaker_states
 
-__all__ = ["get_model", "get_model_name"]
+__all__ = [
+    "get_model",
+    "get_model_name",
+    "supports_structured_output",
+    "route_model",
+    "route_request",
+    "ResilientLlm",
+    "breaker_states",
+]
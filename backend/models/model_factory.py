@@ -1,45 +1,106 @@
 """Model factory for selecting between Gemini and LiteLLM providers."""
-from typing import Union
+from typing import List, Union
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.google_llm import Gemini
 from google.adk.models.lite_llm import LiteLlm
 from config.settings import get_settings
+from models.ollama_llm import AdaptiveLiteLlm, OllamaLlm
+from models.resilient_llm import ResilientLlm
+from services.ollama_residency import ollama_name
 
 
-def get_model(use_thinking_model: bool = False, model_name: Union[str, None] = None) -> Union[str, LiteLlm]:
+def is_litellm_model(model_name: str) -> bool:
+    """Check whether a model ID is served through LiteLLM (heuristic: contains '/')."""
+    return "/" in model_name or model_name.startswith("ollama")
+
+
+def _build_model(model_name: str) -> Union[str, LiteLlm]:
+    """Build the model for a single model ID."""
+    settings = get_settings()
+    
+    if ollama_name(model_name):
+        return OllamaLlm(
+            model=model_name,
+            api_base=settings.litellm_api_base,
+            keep_alive=settings.ollama_keep_alive
+        )
+    if is_litellm_model(model_name):
+        return AdaptiveLiteLlm(
+            model=model_name,
+            api_base=settings.litellm_api_base
+        )
+    # Assume it's a Gemini model ID
+    return model_name
+
+
+def get_fallback_models() -> List[str]:
+    """Model IDs configured as failover targets, in order."""
+    settings = get_settings()
+    return [m.strip() for m in settings.model_fallbacks.split(",") if m.strip()]
+
+
+def get_model(use_thinking_model: bool = False, model_name: Union[str, None] = None) -> Union[str, BaseLlm]:
     """
     Return the appropriate model based on settings or override.
     
+    When fallback models are configured, the model is wrapped in a
+    ResilientLlm that hedges slow requests and fails over between providers.
+    
     Args:
         use_thinking_model: If True, use the thinking model variant (for complex reasoning tasks)
         model_name: Optional override for the model ID (e.g. "ollama/llama3")
         
     Returns:
-        Either a model string (for Gemini) or a LiteLlm instance (for local models)
+        A model string (for Gemini), a LiteLlm instance (for local models) or
+        a ResilientLlm wrapping several of them
     """
     settings = get_settings()
     
-    # If a specific model is requested, use it
-    if model_name:
-        # Check if it's an Ollama/LiteLLM model (heuristic: contains '/')
-        if "/" in model_name or model_name.startswith("ollama"):
-             return LiteLlm(
-                model=model_name,
-                api_base=settings.litellm_api_base
-            )
+    # Without an explicit model ID, use the configured default
+    if not model_name:
+        if settings.model_provider == "litellm":
+            # Use LiteLLM for local models (e.g., Ollama)
+            model_name = settings.litellm_model
+        elif use_thinking_model:
+            model_name = settings.adk_thinking_model
         else:
-            # Assume it's a Gemini model ID
-            return model_name
+            # Default: Use Gemini models
+            model_name = settings.adk_model
     
-    if settings.model_provider == "litellm":
-        # Use LiteLLM for local models (e.g., Ollama)
-        return LiteLlm(
-            model=settings.litellm_model,
-            api_base=settings.litellm_api_base
-        )
+    fallbacks = [m for m in get_fallback_models() if m != model_name]
+    if not fallbacks:
+        return _build_model(model_name)
+    
+    backends = []
+    for name in [model_name] + fallbacks:
+        model = _build_model(name)
+        backends.append(Gemini(model=model) if isinstance(model, str) else model)
+    return ResilientLlm(model=model_name, backends=backends, hedge_after_ms=settings.hedge_after_ms)
+
+
+def supports_structured_output(model_name: Union[str, None] = None) -> bool:
+    """
+    Check whether the provider behind a model can enforce a JSON response schema.
+    
+    Args:
+        model_name: Optional override for the model ID (e.g. "ollama/llama3")
+        
+    Returns:
+        True for Gemini models, and for LiteLLM models (or failover chains
+        that include one) when enabled in settings
+    """
+    settings = get_settings()
+    
+    if model_name:
+        is_litellm = is_litellm_model(model_name)
     else:
-        # Default: Use Gemini models
-        if use_thinking_model:
-            return settings.adk_thinking_model
-        return settings.adk_model
+        is_litellm = settings.model_provider == "litellm"
+    
+    # A failover chain can only enforce a schema if every model in it can
+    if any(is_litellm_model(m) for m in get_fallback_models()):
+        is_litellm = True
+    
+    return settings.litellm_structured_output if is_litellm else True
 
 
 def get_model_name() -> str:
@@ -0,0 +1,218 @@
+"""Latency-aware model routing based on live per-model performance statistics."""
+import math
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+from config.settings import get_settings
+
+# Weight of the newest sample in the exponential moving averages
+EWMA_ALPHA = 0.2
+# Priors for models without samples yet
+DEFAULT_TTFT_MS = 800.0
+DEFAULT_TOKENS_PER_S = 50.0
+# Prompt size (tokens) that roughly doubles time to first token
+PREFILL_REFERENCE_TOKENS = 2000
+# Relative slowdown per request already in flight on the same model
+QUEUE_PENALTY = 0.25
+# Models failing more often than this are only used as a last resort
+MAX_ERROR_RATE = 0.5
+CHARS_PER_TOKEN = 4
+
+# Expected output tokens per agent kind, and whether it benefits from the thinking model
+AGENT_PROFILES = {
+    "creator": {"output_tokens": 700, "quality": False},
+    "enhancer": {"output_tokens": 900, "quality": False},
+    "evaluator": {"output_tokens": 600, "quality": True},
+    "optimizer": {"output_tokens": 1200, "quality": False},
+    "playground": {"output_tokens": 500, "quality": False},
+}
+
+
+@dataclass
+class ModelStats:
+    """Rolling performance statistics of one model."""
+    ttft_ms: float = DEFAULT_TTFT_MS  # Normalized to an empty prompt
+    tokens_per_s: float = DEFAULT_TOKENS_PER_S
+    error_rate: float = 0.0
+    in_flight: int = 0
+    samples: int = 0
+    ttft_samples: int = 0  # Streamed calls, the only ones that measure time to first token
+
+
+@dataclass
+class RouteDecision:
+    """Model picked by the router and why."""
+    model: str
+    reason: str
+    estimated_ms: float
+    budget_ms: Optional[int] = None
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers explaining the decision."""
+        headers = {
+            "X-Model-Route": self.model,
+            "X-Model-Route-Reason": self.reason,
+            "X-Model-Route-Estimate-Ms": str(round(self.estimated_ms)),
+        }
+        if self.budget_ms is not None:
+            headers["X-Model-Route-Budget-Ms"] = str(self.budget_ms)
+        return headers
+
+
+# Statistics of every model used in this worker, by model ID
+_stats: Dict[str, ModelStats] = {}
+
+
+def _ewma(current: float, sample: float, samples: int) -> float:
+    return sample if samples == 0 else current + EWMA_ALPHA * (sample - current)
+
+
+def get_stats(model: str) -> ModelStats:
+    """Get (or create) the statistics of a model."""
+    if model not in _stats:
+        _stats[model] = ModelStats()
+    return _stats[model]
+
+
+def all_stats() -> Dict[str, Dict]:
+    """Snapshot of every model's statistics."""
+    return {model: asdict(stats) for model, stats in _stats.items()}
+
+
+class ModelCall:
+    """
+    Timing of one model call, recorded into the model's statistics.
+
+    The call counts towards the model's queue depth until finish() is called.
+    """
+
+    def __init__(self, model: str, prompt: str):
+        self.model = model
+        self.prompt_tokens = math.ceil(len(prompt) / CHARS_PER_TOKEN)
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.output_chars = 0
+        self.failed = False
+
+    def on_output(self, text: str) -> None:
+        """Record a chunk of output."""
+        if text and self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        self.output_chars += len(text)
+
+    def fail(self) -> None:
+        """Mark the call as failed."""
+        self.failed = True
+
+    def finish(self) -> None:
+        """Record the call's outcome and release its queue slot."""
+        stats = get_stats(self.model)
+        stats.in_flight -= 1
+        stats.error_rate = _ewma(stats.error_rate, 1.0 if self.failed else 0.0, stats.samples)
+        if not self.failed and self.first_token_at is not None:
+            ended = time.perf_counter()
+            output_tokens = math.ceil(self.output_chars / CHARS_PER_TOKEN)
+            prefill_factor = 1 + self.prompt_tokens / PREFILL_REFERENCE_TOKENS
+            ttft_ms = (self.first_token_at - self.started) * 1000
+            generation_s = ended - self.first_token_at
+            if generation_s > 0.05:
+                # Streamed: time to first token and generation speed are both observed
+                stats.ttft_ms = _ewma(stats.ttft_ms, ttft_ms / prefill_factor, stats.ttft_samples)
+                stats.tokens_per_s = _ewma(stats.tokens_per_s, output_tokens / generation_s, stats.samples)
+                stats.ttft_samples += 1
+            else:
+                # Single response: attribute the time beyond the expected TTFT to generation
+                generation_s = (ttft_ms - stats.ttft_ms * prefill_factor) / 1000
+                if generation_s > 0:
+                    stats.tokens_per_s = _ewma(stats.tokens_per_s, output_tokens / generation_s, stats.samples)
+        stats.samples += 1
+
+
+def start_call(model: str, prompt: str) -> ModelCall:
+    """Start tracking a model call for the router's statistics."""
+    get_stats(model).in_flight += 1
+    return ModelCall(model, prompt)
+
+
+def candidate_models() -> List[str]:
+    """Models the router may choose from."""
+    settings = get_settings()
+    configured = [m.strip() for m in settings.router_models.split(",") if m.strip()]
+    if configured:
+        return list(dict.fromkeys(configured))
+    if settings.model_provider == "litellm":
+        return [settings.litellm_model]
+    return list(dict.fromkeys([settings.adk_model, settings.adk_thinking_model]))
+
+
+def estimate_ttft_ms(model: str, prompt: str) -> Optional[float]:
+    """Expected time to first token of a call, or None until a streamed call has measured it."""
+    stats = get_stats(model)
+    if stats.ttft_samples == 0:
+        return None
+    prompt_tokens = len(prompt) / CHARS_PER_TOKEN
+    return stats.ttft_ms * (1 + prompt_tokens / PREFILL_REFERENCE_TOKENS)
+
+
+def estimate_latency_ms(model: str, prompt: str, output_tokens: int) -> float:
+    """Estimate a call's total latency from the model's rolling statistics."""
+    stats = get_stats(model)
+    prompt_tokens = len(prompt) / CHARS_PER_TOKEN
+    ttft_ms = stats.ttft_ms * (1 + prompt_tokens / PREFILL_REFERENCE_TOKENS)
+    generation_ms = output_tokens / max(stats.tokens_per_s, 1e-3) * 1000
+    return (ttft_ms + generation_ms) * (1 + QUEUE_PENALTY * stats.in_flight)
+
+
+def route_model(agent_kind: str, prompt: str, budget_ms: Optional[int] = None) -> RouteDecision:
+    """
+    Pick a model for a request that did not name one.
+
+    The quality-sensitive evaluator gets the thinking model
+    whenever it fits the latency budget; other agents get the fastest model
+    that fits. If nothing fits, the fastest model is used.
+
+    Args:
+        agent_kind: Agent that will run (see AGENT_PROFILES)
+        prompt: Prompt that will be sent, for prefill cost
+        budget_ms: Optional latency budget in milliseconds
+
+    Returns:
+        The routing decision
+    """
+    settings = get_settings()
+    profile = AGENT_PROFILES.get(agent_kind, {"output_tokens": 600, "quality": False})
+    models = candidate_models()
+    estimates = {m: estimate_latency_ms(m, prompt, profile["output_tokens"]) for m in models}
+
+    healthy = [m for m in models if get_stats(m).error_rate <= MAX_ERROR_RATE] or models
+    fitting = [m for m in healthy if budget_ms is None or estimates[m] <= budget_ms]
+
+    if profile["quality"] and settings.adk_thinking_model in fitting:
+        model = settings.adk_thinking_model
+        reason = "thinking model fits budget" if budget_ms is not None else "thinking model preferred"
+    elif fitting:
+        model = min(fitting, key=estimates.get)
+        reason = "fastest model within budget" if budget_ms is not None else "fastest model"
+    else:
+        model = min(healthy, key=estimates.get)
+        reason = "no model fits budget; fastest model"
+
+    return RouteDecision(model=model, reason=reason, estimated_ms=estimates[model], budget_ms=budget_ms)
+
+
+def route_request(
+    agent_kind: str,
+    prompt: str,
+    model: Optional[str] = None,
+    budget_ms: Optional[int] = None,
+) -> Tuple[Optional[str], Dict[str, str]]:
+    """
+    Resolve the model for a request, routing only when none was requested.
+
+    Returns:
+        Tuple of (model ID or None for the static default, explanation headers)
+    """
+    if model or not get_settings().model_router_enabled:
+        return model, {}
+    decision = route_model(agent_kind, prompt, budget_ms)
+    return decision.model, decision.headers()
@@ -0,0 +1,50 @@
+"""LiteLLM models with adaptive concurrency and Ollama residency-aware scheduling."""
+from typing import AsyncGenerator
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from services.adaptive_limiter import get_limiter
+from services.ollama_residency import get_scheduler, residency
+
+
+def _output_tokens(response: LlmResponse) -> int:
+    """Output tokens of a response (from usage metadata, else ~4 characters per token)."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "candidates_token_count", None):
+        return usage.candidates_token_count
+    parts = response.content.parts if response.content and response.content.parts else []
+    return sum(len(part.text or "") for part in parts) // 4
+
+
+class AdaptiveLiteLlm(LiteLlm):
+    """
+    LiteLlm whose in-flight calls are capped by a per-model AIMD limiter.
+
+    Latency is measured to the first response: time to first token when
+    streaming, time per output token otherwise.
+    """
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async with get_limiter(self.model).slot() as sample:
+            async for response in super().generate_content_async(llm_request, stream=stream):
+                sample.first_response(0 if stream else _output_tokens(response))
+                yield response
+
+
+class OllamaLlm(AdaptiveLiteLlm):
+    """
+    LiteLlm for Ollama models.
+
+    Calls go through the model-switch scheduler, so queued requests for the
+    same model run back to back instead of swapping models on every call.
+    """
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        async with get_scheduler().slot(self.model):
+            async for response in super().generate_content_async(llm_request, stream=stream):
+                yield response
+        residency.mark_loaded(self.model)
@@ -0,0 +1,204 @@
+"""Resilient model wrapper: per-provider circuit breakers, hedged requests and failover."""
+import asyncio
+import time
+from typing import AsyncGenerator, Dict, List, Optional
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.lite_llm import LiteLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from config.settings import get_settings
+from services.deadlines import remaining
+
+# Queue marker for a finished attempt
+_END = object()
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one provider.
+
+    Closed: requests flow. Open: the provider is skipped until the reset
+    timeout passes. Half-open: one probe request decides whether to close
+    again or re-open.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        """Current state: 'closed', 'open' or 'half_open'."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Check whether a request may be sent (claims the probe when half-open)."""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure and open the breaker once the threshold is reached."""
+        self.failures += 1
+        self.probing = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back an unused probe (e.g. the attempt was cancelled)."""
+        self.probing = False
+
+
+# Breakers shared by every request in this worker, by provider
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(provider: str) -> CircuitBreaker:
+    """Get (or create) the circuit breaker for a provider."""
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        settings = get_settings()
+        breaker = CircuitBreaker(settings.breaker_failure_threshold, settings.breaker_reset_seconds)
+        _breakers[provider] = breaker
+    return breaker
+
+
+def breaker_states() -> Dict[str, str]:
+    """Current breaker state per provider."""
+    return {provider: breaker.state for provider, breaker in _breakers.items()}
+
+
+def provider_of(llm: BaseLlm) -> str:
+    """Provider key used for circuit breaking."""
+    return "litellm" if isinstance(llm, LiteLlm) else "gemini"
+
+
+class ResilientLlm(BaseLlm):
+    """
+    Model that routes each request across several backends.
+
+    Backends are tried in failover order, skipping providers whose circuit
+    breaker is open. If the active attempt produces no response within
+    ``hedge_after_ms``, the next backend is started as a hedge; the first
+    attempt to respond wins and the other is cancelled. An attempt that fails
+    before responding hands over to the next backend immediately.
+    """
+
+    backends: List[BaseLlm]
+    hedge_after_ms: int = 0
+
+    def _ordered_backends(self) -> List[BaseLlm]:
+        """Backends with an available breaker first, the rest as a last resort."""
+        allowed = [get_breaker(provider_of(b)).allow() for b in self.backends]
+        return [b for b, ok in zip(self.backends, allowed) if ok] + [
+            b for b, ok in zip(self.backends, allowed) if not ok
+        ]
+
+    async def _attempt(self, backend: BaseLlm, llm_request: LlmRequest, stream: bool, queue: asyncio.Queue) -> None:
+        """Run one backend, forwarding its responses (or its error) to a queue."""
+        request = llm_request.model_copy(deep=True)
+        request.model = backend.model
+        responses = backend.generate_content_async(request, stream=stream)
+        try:
+            async for response in responses:
+                await queue.put(response)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await responses.aclose()
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        pending = self._ordered_backends()
+        attempts: Dict[asyncio.Task, tuple] = {}
+        winner: Optional[asyncio.Task] = None
+        first = None
+        errors: List[str] = []
+
+        def launch() -> None:
+            backend = pending.pop(0)
+            queue: asyncio.Queue = asyncio.Queue()
+            task = asyncio.create_task(self._attempt(backend, llm_request, stream, queue))
+            attempts[task] = (backend, queue, asyncio.create_task(queue.get()))
+            if len(attempts) > 1:
+                print(f"[DEBUG] ResilientLlm: starting {backend.model} ({len(attempts)} attempts)")
+
+        launch()
+        try:
+            # Race attempts until one produces its first response
+            while winner is None:
+                # No new attempts once the request's deadline has passed; the current ones keep racing
+                left = remaining()
+                if left is not None and left <= 0:
+                    for backend in pending:
+                        get_breaker(provider_of(backend)).release()
+                    pending.clear()
+                hedge_timeout = self.hedge_after_ms / 1000 if self.hedge_after_ms > 0 and pending else None
+                heads = {head: task for task, (_, _, head) in attempts.items()}
+                if not heads:
+                    raise RuntimeError(f"All model backends failed: {'; '.join(errors)}")
+                done, _ = await asyncio.wait(set(heads), timeout=hedge_timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    launch()
+                    continue
+                for head in done:
+                    task = heads[head]
+                    backend, queue, _ = attempts[task]
+                    item = head.result()
+                    if isinstance(item, BaseException) or item is _END:
+                        error = item if isinstance(item, BaseException) else RuntimeError("empty response")
+                        get_breaker(provider_of(backend)).record_failure()
+                        errors.append(f"{backend.model}: {error}")
+                        print(f"[DEBUG] ResilientLlm: {backend.model} failed: {error}")
+                        del attempts[task]
+                        if pending:
+                            launch()
+                    elif winner is None:
+                        winner, first = task, item
+
+            # Keep the winner, cancel the losers
+            backend, queue, _ = attempts.pop(winner)
+            for task, (loser, _, head) in attempts.items():
+                head.cancel()
+                task.cancel()
+                get_breaker(provider_of(loser)).release()
+            attempts.clear()
+
+            yield first
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    get_breaker(provider_of(backend)).record_failure()
+                    raise item
+                yield item
+            get_breaker(provider_of(backend)).record_success()
+        finally:
+            for task, (backend, _, head) in attempts.items():
+                head.cancel()
+                task.cancel()
+                get_breaker(provider_of(backend)).release()
+            for backend in pending:
+                get_breaker(provider_of(backend)).release()
+            if winner is not None:
+                winner.cancel()
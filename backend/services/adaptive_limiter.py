@@ -0,0 +1,176 @@
+"""Adaptive (AIMD) concurrency limits for calls to local model servers."""
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+from config.settings import get_settings
+
+# Weight of the newest sample in the short-term latency average
+RECENT_ALPHA = 0.3
+# The baseline is the lowest latency seen over the last one to two windows
+BASELINE_WINDOW_S = 60.0
+
+
+class LatencySample:
+    """Latency of one call, measured to its first response."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.latency_ms: Optional[float] = None
+        self.failed = False
+
+    def first_response(self, tokens: int = 0) -> None:
+        """
+        Record the first response.
+
+        Args:
+            tokens: Output tokens in the response when it is not streamed; the
+                latency is then normalized per token so long answers do not
+                read as congestion
+        """
+        if self.latency_ms is None:
+            elapsed_ms = (time.monotonic() - self.started) * 1000
+            self.latency_ms = elapsed_ms / tokens if tokens > 0 else elapsed_ms
+
+
+class AimdLimiter:
+    """
+    In-flight limit for one model that adapts to the server's capacity.
+
+    Every healthy completion raises the limit by 1/limit, i.e. by about one
+    per round of calls. When the smoothed latency rises past ``tolerance``
+    times the uncongested baseline (the recent minimum), or a call fails, the
+    limit is multiplied by ``backoff`` (at most once per round trip), so
+    concurrency settles just below the point where the server starts
+    queueing.
+    """
+
+    def __init__(self, initial: float, min_limit: int, max_limit: int, backoff: float, tolerance: float):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self.waiting = 0
+        self.recent_ms: Optional[float] = None
+        self._window_min: Optional[float] = None
+        self._previous_min: Optional[float] = None
+        self._window_start = time.monotonic()
+        self.increases = 0
+        self.decreases = 0
+        self._last_cut = 0.0
+        self._condition = asyncio.Condition()
+
+    @property
+    def baseline_ms(self) -> Optional[float]:
+        """Lowest latency seen recently, taken as the uncongested latency."""
+        mins = [m for m in (self._window_min, self._previous_min) if m is not None]
+        return min(mins) if mins else None
+
+    @property
+    def gradient(self) -> Optional[float]:
+        """Baseline over recent latency: ~1.0 when healthy, falling as the server queues."""
+        if not self.baseline_ms or not self.recent_ms:
+            return None
+        return self.baseline_ms / self.recent_ms
+
+    def _record(self, sample: LatencySample) -> None:
+        if sample.failed:
+            self._decrease(sample)
+            return
+        if sample.latency_ms is None:
+            return  # No response and no error: nothing learned about the server
+
+        latency = sample.latency_ms
+        self.recent_ms = latency if self.recent_ms is None else self.recent_ms + RECENT_ALPHA * (latency - self.recent_ms)
+        now = time.monotonic()
+        if now - self._window_start >= BASELINE_WINDOW_S:
+            self._previous_min, self._window_min, self._window_start = self._window_min, None, now
+        if self._window_min is None or latency < self._window_min:
+            self._window_min = latency
+
+        if self.recent_ms > self.baseline_ms * self.tolerance:
+            self._decrease(sample)
+        else:
+            if self.waiting or self.in_flight + 1 >= math.floor(self.limit):
+                # Only grow while the limit is actually being used
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self.increases += 1
+
+    def _decrease(self, sample: LatencySample) -> None:
+        if sample.started < self._last_cut:
+            return  # Started before the last cut; that congestion is already handled
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_cut = time.monotonic()
+        self.decreases += 1
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[LatencySample]:
+        """Wait for capacity, then hold it for one call."""
+        async with self._condition:
+            self.waiting += 1
+            try:
+                await self._condition.wait_for(lambda: self.in_flight < math.floor(self.limit))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+
+        sample = LatencySample()
+        record = True
+        try:
+            yield sample
+        except (asyncio.CancelledError, GeneratorExit):
+            # Abandoned by the caller (a losing hedge, a client gone before
+            # the first token): says nothing about the server
+            record = False
+            raise
+        except Exception:
+            sample.failed = True
+            raise
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                if record:
+                    self._record(sample)
+                self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        """Current limit, load and latency gradient."""
+        gradient = self.gradient
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "baseline_ms": round(self.baseline_ms, 1) if self.baseline_ms else None,
+            "recent_ms": round(self.recent_ms, 1) if self.recent_ms else None,
+            "gradient": round(gradient, 3) if gradient else None,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+# Limiters of every local model used in this worker, by model ID
+_limiters: Dict[str, AimdLimiter] = {}
+
+
+def get_limiter(model: str) -> AimdLimiter:
+    """Get (or create) the limiter for a model."""
+    limiter = _limiters.get(model)
+    if limiter is None:
+        settings = get_settings()
+        limiter = AimdLimiter(
+            initial=settings.aimd_initial_limit,
+            min_limit=settings.aimd_min_limit,
+            max_limit=settings.aimd_max_limit,
+            backoff=settings.aimd_backoff,
+            tolerance=settings.aimd_latency_tolerance,
+        )
+        _limiters[model] = limiter
+    return limiter
+
+
+def limiter_metrics() -> Dict[str, Dict[str, Optional[float]]]:
+    """Snapshot of every model's limiter."""
+    return {model: limiter.snapshot() for model, limiter in _limiters.items()}
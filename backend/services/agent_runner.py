@@ -0,0 +1,334 @@
+"""Agent execution helpers shared by the API routes and services."""
+from fastapi import HTTPException
+from google.genai.types import Content, Part
+from google.adk.runners import Runner
+from database import DatabaseSessionService
+from config.settings import get_settings
+from models.model_router import estimate_ttft_ms, start_call
+from services.deadlines import (
+    DeadlineExceeded,
+    deadline_after,
+    deadline_guard,
+    deadline_scope,
+    remaining_ms,
+)
+from services.priority_scheduler import current_priority, get_priority_scheduler
+from services.stream_buffer import StreamOverflow
+from services.stream_framing import framed
+import asyncio
+import uuid
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Callable, Dict, List, Optional
+
+# anext() default marking the end of an event stream
+_END = object()
+
+# Streams report failures in-band, as a final chunk starting with this
+ERROR_PREFIX = "\n\n[Error: "
+
+# Global database-backed session service - persists across restarts!
+_session_service = DatabaseSessionService()
+
+async def get_session_service() -> DatabaseSessionService:
+    """Get the global session service."""
+    return _session_service
+
+class AgentSession:
+    """
+    Agents, Runners and one ADK session kept for a series of runs (e.g. a WebSocket connection).
+
+    The session service keeps no event history between runs, so successive
+    and concurrent runs on the session stay independent; keeping it only
+    saves building the agent and Runner and writing a session row per run.
+    """
+
+    def __init__(self, create_agent: Callable[..., object], user_id: str = "default_user"):
+        self.create_agent = create_agent
+        self.user_id = user_id
+        self.session_id = str(uuid.uuid4())
+        self._agents: Dict[Optional[str], object] = {}
+        self._runners: Dict[int, Runner] = {}
+
+    def agent(self, model: Optional[str] = None):
+        """Agent on ``model`` (None for the default model), built on first use."""
+        if model not in self._agents:
+            self._agents[model] = self.create_agent(model=model)
+        return self._agents[model]
+
+    def runner_for(self, agent) -> Runner:
+        """Runner for one of this session's agents, built on first use."""
+        runner = self._runners.get(id(agent))
+        if runner is None:
+            runner = Runner(agent=agent, session_service=_session_service, app_name="prompt_agent")
+            self._runners[id(agent)] = runner
+        return runner
+
+    async def open(self) -> None:
+        """Create the ADK session."""
+        await _session_service.create_session(user_id=self.user_id, session_id=self.session_id, app_name="prompt_agent")
+
+    async def close(self) -> None:
+        """Delete the ADK session."""
+        await _session_service.delete_session(app_name="prompt_agent", user_id=self.user_id, session_id=self.session_id)
+
+def _model_id(agent) -> str:
+    """Model ID an agent runs on."""
+    return agent.model if isinstance(agent.model, str) else agent.model.model
+
+def _agent_timeout() -> Optional[float]:
+    """Cap on a single agent run (AGENT_TIMEOUT_SECONDS; 0 disables it)."""
+    return get_settings().agent_timeout_seconds or None
+
+def _check_budget(agent, prompt: str, deadline: Optional[float]) -> None:
+    """Fail fast when the time left cannot cover the model's expected time to first token."""
+    left = remaining_ms() if deadline is None else (deadline - asyncio.get_running_loop().time()) * 1000
+    if left is None:
+        return
+    if left <= 0:
+        raise DeadlineExceeded("Deadline exceeded before the agent could start")
+    needed = estimate_ttft_ms(_model_id(agent), prompt)
+    if needed is not None and needed > left:
+        raise DeadlineExceeded(
+            f"{left:.0f} ms left, less than the expected time to first token of {_model_id(agent)} ({needed:.0f} ms)"
+        )
+
+async def stream_agent_response(
+    agent,
+    prompt: str,
+    priority: Optional[str] = None,
+    session: Optional[AgentSession] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Stream response from an agent using ADK Runner.
+    
+    Args:
+        agent: ADK agent instance
+        prompt: Prompt to send to the agent
+        priority: Scheduling class ('interactive', 'standard', 'bulk');
+            defaults to the current context's class
+        session: Open session the agent belongs to, whose Runner and ADK
+            session are reused (a new Runner and session are made otherwise)
+        
+    Yields:
+        Text chunks from the agent's response, coalesced into larger frames
+        (see services.stream_framing); a failure ends the stream with a
+        chunk starting with ERROR_PREFIX
+    
+    The agent runs in its own task and writes into a bounded buffer, so it
+    finishes (and frees its scheduling slot) at the model's pace, however
+    slowly the client reads.
+    """
+    # Yield initial data to flush the buffer and establish streaming connection
+    yield ""
+    
+    frames = framed(
+        _run_stream(agent, prompt, priority or current_priority(), session),
+        label=_model_id(agent),
+        unmerged=lambda chunk: chunk.startswith(ERROR_PREFIX),
+    )
+    try:
+        async for chunk in frames:
+            yield chunk
+    except StreamOverflow as e:
+        yield f"{ERROR_PREFIX}{str(e)}]"
+
+
+async def _run_stream(agent, prompt: str, priority: str, session: Optional[AgentSession]) -> AsyncGenerator[str, None]:
+    """Wait for a scheduling slot within the deadline, then stream the agent."""
+    deadline = deadline_after(_agent_timeout())
+    async with AsyncExitStack() as stack:
+        try:
+            _check_budget(agent, prompt, deadline)
+            async with deadline_guard("queue wait", deadline):
+                await stack.enter_async_context(get_priority_scheduler().slot(priority))
+            _check_budget(agent, prompt, deadline)
+        except DeadlineExceeded as e:
+            yield f"{ERROR_PREFIX}{str(e)}]"
+            return
+        async for chunk in _stream_agent_response(agent, prompt, deadline, session):
+            yield chunk
+
+
+async def _stream_agent_response(
+    agent, prompt: str, deadline: Optional[float], session: Optional[AgentSession] = None
+) -> AsyncGenerator[str, None]:
+    call = None
+    try:
+        print(f"[DEBUG] stream_agent_response: Starting with prompt length {len(prompt)}")
+        
+        call = start_call(_model_id(agent), prompt)
+        
+        # Run agent asynchronously and collect events
+        text_chars = 0
+        if session is not None:
+            runner = session.runner_for(agent)
+            user_id, session_id = session.user_id, session.session_id
+        else:
+            session_service = await get_session_service()
+            runner = Runner(agent=agent, session_service=session_service, app_name="prompt_agent")
+            user_id = "default_user"
+            # Use a consistent session ID for the user or generate new one?
+            # For now, generate new one per request to avoid state pollution between requests
+            # unless we want to support multi-turn chat later.
+            session_id = str(uuid.uuid4())
+            
+            async with deadline_guard("session creation", deadline):
+                await session_service.create_session(user_id=user_id, session_id=session_id, app_name="prompt_agent")
+            print(f"[DEBUG] Session created: {session_id}")
+        
+        message = Content(role="user", parts=[Part(text=prompt)])
+        
+        print(f"[DEBUG] Starting run_async...")
+        event_count = 0
+        last_event = None
+        events = runner.run_async(new_message=message, user_id=user_id, session_id=session_id)
+        while True:
+            # Only the wait for the next event is bounded, never the yield to the client
+            async with deadline_guard("model call", deadline):
+                event = await anext(events, _END)
+            if event is _END:
+                break
+            event_count += 1
+            last_event = event
+            event_type = type(event).__name__
+            print(f"[DEBUG] Event {event_count}: {event_type}")
+            
+            text_chunk = None
+            
+            # Try multiple methods to extract text from event
+            # Method 1: content.parts
+            if hasattr(event, 'content') and event.content and hasattr(event.content, 'parts') and event.content.parts:
+                for part in event.content.parts:
+                    if hasattr(part, 'text') and part.text:
+                        text_chunk = part.text
+                        print(f"[DEBUG] Found text via content.parts: {len(text_chunk)} chars")
+                        break
+            
+            # Method 2: data.text
+            if not text_chunk and hasattr(event, 'data') and event.data and hasattr(event.data, 'text') and event.data.text:
+                text_chunk = event.data.text
+                print(f"[DEBUG] Found text via data.text: {len(text_chunk)} chars")
+            
+            # Method 3: direct text attribute
+            if not text_chunk and hasattr(event, 'text') and event.text:
+                text_chunk = event.text
+                print(f"[DEBUG] Found text via text attr: {len(text_chunk)} chars")
+            
+            # Method 4: Check for response attribute (some ADK versions)
+            if not text_chunk and hasattr(event, 'response') and event.response:
+                if hasattr(event.response, 'text') and event.response.text:
+                    text_chunk = event.response.text
+                    print(f"[DEBUG] Found text via response.text: {len(text_chunk)} chars")
+                elif isinstance(event.response, str):
+                    text_chunk = event.response
+                    print(f"[DEBUG] Found text via response (str): {len(text_chunk)} chars")
+            
+            # If still no text, log the event structure for debugging
+            if not text_chunk:
+                print(f"[DEBUG] No text found in event. Event attrs: {dir(event)}")
+                if hasattr(event, 'content'):
+                    print(f"[DEBUG] Event.content: {event.content}")
+                if hasattr(event, 'data'):
+                    print(f"[DEBUG] Event.data: {event.data}")
+            
+            # Yield the text if we found any
+            if text_chunk:
+                text_chars += len(text_chunk)
+                call.on_output(text_chunk)
+                yield text_chunk
+                
+        print(f"[DEBUG] Stream completed. Total events: {event_count}, Total text: {text_chars} chars")
+        
+        # If no streaming occurred, try to get response from last event
+        if not text_chars and last_event:
+            print(f"[DEBUG] No text extracted, checking last_event for fallback")
+            if hasattr(last_event, 'response') and last_event.response:
+                fallback_text = str(last_event.response)
+                if fallback_text and fallback_text != "None":
+                    print(f"[DEBUG] Using last_event.response fallback: {len(fallback_text)} chars")
+                    call.on_output(fallback_text)
+                    yield fallback_text
+
+    except Exception as e:
+        print(f"[DEBUG] stream_agent_response error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        if call:
+            call.fail()
+        yield f"{ERROR_PREFIX}{str(e)}]"
+    finally:
+        if call:
+            call.finish()
+
+
+async def run_agent(agent, prompt: str, priority: Optional[str] = None) -> str:
+    """
+    Run agent and return full text response using ADK Runner.
+    Ensures app_name is passed to Runner initialization.
+    
+    The call waits for a slot of its scheduling class ('interactive',
+    'standard' or 'bulk'; defaults to the current context's class), and
+    runs within the request's deadline, capped at AGENT_TIMEOUT_SECONDS.
+    
+    Raises:
+        DeadlineExceeded: If the deadline passes first; carries any text
+            produced so far as ``partial``
+    """
+    with deadline_scope(_agent_timeout()):
+        _check_budget(agent, prompt, None)
+        async with AsyncExitStack() as stack:
+            async with deadline_guard("queue wait"):
+                await stack.enter_async_context(get_priority_scheduler().slot(priority or current_priority()))
+            _check_budget(agent, prompt, None)
+            return await _run_agent(agent, prompt)
+
+
+async def _run_agent(agent, prompt: str) -> str:
+    call = start_call(_model_id(agent), prompt)
+    parts: List[str] = []
+    try:
+        session_service = await get_session_service()
+        runner = Runner(agent=agent, session_service=session_service, app_name="prompt_agent")
+        
+        # Run agent asynchronously and collect events
+        last_event = None
+        user_id = "default_user"
+        session_id = str(uuid.uuid4())
+        
+        async with deadline_guard("session creation"):
+            await session_service.create_session(user_id=user_id, session_id=session_id, app_name="prompt_agent")
+        
+        message = Content(role="user", parts=[Part(text=prompt)])
+        
+        events = runner.run_async(new_message=message, user_id=user_id, session_id=session_id)
+        while True:
+            async with deadline_guard("model call"):
+                event = await anext(events, _END)
+            if event is _END:
+                break
+            last_event = event
+            # Extract text from agent response events
+            if hasattr(event, 'content') and event.content and event.content.parts:
+                for part in event.content.parts:
+                    if part.text:
+                        parts.append(part.text)
+            elif hasattr(event, 'data') and hasattr(event.data, 'text'):
+                parts.append(event.data.text)
+            elif hasattr(event, 'text'):
+                parts.append(event.text)
+                
+        full_text = "".join(parts)
+        # If no streaming occurred, try to get response from last event
+        if not full_text and last_event and hasattr(last_event, 'response'):
+            full_text = str(last_event.response)
+            
+        call.on_output(full_text)
+        return full_text
+    except DeadlineExceeded as e:
+        call.fail()
+        raise DeadlineExceeded(str(e), partial="".join(parts)) from None
+    except Exception as e:
+        call.fail()
+        raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
+    finally:
+        call.finish()
@@ -0,0 +1,57 @@
+"""Server-side capture of agent results into the prompt history, off the response path."""
+import asyncio
+import contextvars
+from typing import List, Optional, Set
+from database import crud
+from database.connection import AsyncSessionLocal
+
+# Writes still in flight, kept referenced so they are not garbage collected
+_pending: Set[asyncio.Task] = set()
+
+
+def save_prompt_later(
+    agent_type: str,
+    prompt_text: str,
+    result: str,
+    tags: Optional[List[str]] = None,
+    user_id: str = "default_user",
+) -> "asyncio.Task[int]":
+    """
+    Write a Prompt row in the background.
+
+    The write outlives the request that started it (a client that
+    disconnects after the stream still gets its result saved) and is not
+    bound by the request's deadline.
+
+    Returns:
+        Task whose result is the new prompt's ID
+    """
+
+    async def write() -> int:
+        async with AsyncSessionLocal() as db:
+            prompt = await crud.create_prompt(
+                db,
+                user_id=user_id,
+                agent_type=agent_type,
+                prompt_text=prompt_text,
+                result=result,
+                tags=tags,
+            )
+            return prompt.id
+
+    task = asyncio.get_running_loop().create_task(write(), context=contextvars.Context())
+    _pending.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+def _done(task: asyncio.Task) -> None:
+    _pending.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"[DEBUG] Could not save captured result: {task.exception()}")
+
+
+async def drain_captures() -> None:
+    """Wait for pending writes (on shutdown)."""
+    if _pending:
+        await asyncio.gather(*_pending, return_exceptions=True)
@@ -0,0 +1,131 @@
+"""Request deadlines propagated to every await an agent run makes."""
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, Optional
+from config.settings import get_settings
+
+# Absolute deadline (event loop time) of the current request, if any
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a request's time budget runs out."""
+
+    def __init__(self, message: str, partial: str = ""):
+        super().__init__(message)
+        self.partial = partial
+
+
+def _now() -> float:
+    return asyncio.get_running_loop().time()
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Give the work inside the block (and tasks it starts) at most ``seconds``.
+
+    Scopes nest: an inner scope can only tighten the enclosing deadline.
+    """
+    if seconds is None:
+        yield
+        return
+    token = _deadline.set(deadline_after(seconds))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Deadline of the current context in event loop time, or None."""
+    return _deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (None if there is none)."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - _now()
+
+
+def remaining_ms() -> Optional[float]:
+    """Milliseconds left before the current deadline (None if there is none)."""
+    left = remaining()
+    return None if left is None else left * 1000
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """The current deadline, tightened to at most ``seconds`` from now."""
+    current = _deadline.get()
+    if seconds is None:
+        return current
+    deadline = _now() + seconds
+    return deadline if current is None else min(current, deadline)
+
+
+def check_deadline(what: str = "request") -> None:
+    """Raise DeadlineExceeded if the current deadline has passed."""
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+
+
+@asynccontextmanager
+async def deadline_guard(what: str, deadline: Optional[float] = None) -> AsyncIterator[None]:
+    """
+    Cancel the block when the deadline passes.
+
+    Wrap single awaits with it, never a ``yield`` to a consumer, since the
+    timeout cancels the running task.
+
+    Args:
+        what: Step being guarded, for the error message
+        deadline: Deadline in event loop time (defaults to the current one)
+    """
+    if deadline is None:
+        deadline = _deadline.get()
+    if deadline is None:
+        yield
+        return
+    if deadline <= _now():
+        raise DeadlineExceeded(f"Deadline exceeded before {what}")
+    try:
+        async with asyncio.timeout_at(deadline):
+            yield
+    except TimeoutError:
+        raise DeadlineExceeded(f"Deadline exceeded during {what}") from None
+
+
+def _endpoint_timeouts() -> Dict[str, float]:
+    settings = get_settings()
+    timeouts = {}
+    for entry in settings.endpoint_timeouts.split(","):
+        path, _, seconds = entry.partition("=")
+        if path.strip() and seconds.strip():
+            timeouts[path.strip()] = float(seconds)
+    return timeouts
+
+
+def request_budget(path: str, header_ms: Optional[str]) -> Optional[float]:
+    """
+    Time budget in seconds for a request.
+
+    Args:
+        path: Request path (e.g. '/api/agents/create')
+        header_ms: Value of the X-Latency-Budget-Ms header, if sent
+
+    Returns:
+        The endpoint's ENDPOINT_TIMEOUTS entry, else REQUEST_TIMEOUT_SECONDS
+        (None when that is 0), shortened to the header's budget if one was
+        sent; the header can never extend it
+    """
+    timeout = _endpoint_timeouts().get(path.rstrip("/"), get_settings().request_timeout_seconds)
+    budget = timeout if timeout > 0 else None
+    if header_ms:
+        try:
+            requested = max(0.0, float(header_ms) / 1000)
+        except ValueError:
+            return budget
+        return requested if budget is None else min(requested, budget)
+    return budget
@@ -0,0 +1,192 @@
+"""Evaluation orchestration: single-call and per-criterion fan-out evaluation."""
+import asyncio
+import re
+from typing import List, Optional
+from agents import create_evaluator_agent
+from agents.evaluator_agent import DEFAULT_RUBRIC
+from api.models import EvaluationResult, EvaluationScore
+from config.settings import get_settings
+from services.structured_output import StructuredOutputError, run_structured, schema_for
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s*")
+
+
+def split_rubric(rubric: Optional[str]) -> List[str]:
+    """
+    Split a rubric into individual criteria.
+
+    Multi-line rubrics are split per line (bullets and numbering stripped);
+    single-line rubrics are split on semicolons, or commas if there are none.
+
+    Args:
+        rubric: Rubric text (defaults to the standard rubric when empty)
+
+    Returns:
+        Unique criteria in rubric order
+    """
+    rubric = (rubric or DEFAULT_RUBRIC).strip()
+    lines = [line for line in rubric.splitlines() if line.strip()]
+    if len(lines) > 1:
+        parts = [_BULLET_RE.sub("", line) for line in lines]
+    elif ";" in rubric:
+        parts = rubric.split(";")
+    else:
+        parts = rubric.split(",")
+
+    criteria = []
+    for part in parts:
+        criterion = part.strip().rstrip(".")
+        if criterion and criterion.lower() not in (c.lower() for c in criteria):
+            criteria.append(criterion)
+    return criteria
+
+
+def _criterion_name(criterion: str) -> str:
+    """Short name of a criterion ('Clarity: is it clear?' -> 'Clarity')."""
+    return criterion.split(":", 1)[0].strip()
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    seen = set()
+    unique = []
+    for item in items:
+        key = " ".join(item.lower().split())
+        if key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
+
+
+def merge_evaluations(criteria: List[str], results: List[Optional[EvaluationResult]]) -> EvaluationResult:
+    """
+    Merge per-criterion evaluations into a single result.
+
+    Args:
+        criteria: Criteria in rubric order
+        results: Evaluation for each criterion (None if it failed)
+
+    Returns:
+        One EvaluationResult with a score per evaluated criterion and
+        de-duplicated risks and suggestions
+    """
+    scores: List[EvaluationScore] = []
+    risks: List[str] = []
+    suggestions: List[str] = []
+
+    for criterion, result in zip(criteria, results):
+        name = _criterion_name(criterion)
+        if result is None or not result.scores:
+            risks.append(f"Criterion '{name}' could not be evaluated.")
+            continue
+        # Prefer the score the model attached to this criterion
+        match = next(
+            (s for s in result.scores if s.criteria.strip().lower() == name.lower()),
+            result.scores[0],
+        )
+        scores.append(EvaluationScore(criteria=name, score=match.score, rationale=match.rationale))
+        risks.extend(result.risks)
+        suggestions.extend(result.suggestions)
+
+    return EvaluationResult(scores=scores, risks=_dedupe(risks), suggestions=_dedupe(suggestions))
+
+
+async def evaluate_with_llm(
+    prompt: str,
+    custom_rubric: Optional[str] = None,
+    model: Optional[str] = None,
+) -> EvaluationResult:
+    """
+    Evaluate a prompt with a single Evaluator Agent call.
+
+    Args:
+        prompt: Prompt to evaluate
+        custom_rubric: Custom evaluation criteria
+        model: Optional model ID to use
+
+    Returns:
+        EvaluationResult (a fallback result if the response cannot be parsed)
+    """
+    agent = create_evaluator_agent(
+        custom_rubric=custom_rubric,
+        model=model,
+        output_schema=schema_for(EvaluationResult, model),
+    )
+
+    prompt_text = f"""
+Evaluate the following prompt:
+
+---
+{prompt}
+---
+
+Provide detailed scores, risks, and suggestions in JSON format.
+    """.strip()
+
+    try:
+        return await run_structured(agent, prompt_text, EvaluationResult)
+    except StructuredOutputError:
+        # Fallback evaluation
+        return EvaluationResult(
+            scores=[],
+            risks=["Unable to parse evaluation results"],
+            suggestions=["Please try again"]
+        )
+
+
+async def _evaluate_criterion(prompt: str, criterion: str, model: Optional[str]) -> Optional[EvaluationResult]:
+    """Score a prompt on one criterion with a focused evaluator call."""
+    agent = create_evaluator_agent(
+        custom_rubric=criterion,
+        model=model,
+        output_schema=schema_for(EvaluationResult, model),
+    )
+
+    prompt_text = f"""
+Evaluate the following prompt on this single criterion only: {criterion}
+
+---
+{prompt}
+---
+
+Return exactly one score for "{_criterion_name(criterion)}", plus the risks and suggestions
+that relate to this criterion, in JSON format.
+    """.strip()
+
+    try:
+        return await run_structured(agent, prompt_text, EvaluationResult)
+    except Exception as e:
+        print(f"[DEBUG] Criterion '{criterion}' evaluation failed: {e}")
+        return None
+
+
+async def evaluate_per_criterion(
+    prompt: str,
+    custom_rubric: Optional[str] = None,
+    model: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+) -> EvaluationResult:
+    """
+    Evaluate a prompt with one concurrent evaluator call per rubric criterion.
+
+    Wall-clock time tracks the slowest criterion instead of growing with the
+    rubric; concurrency is capped per request.
+
+    Args:
+        prompt: Prompt to evaluate
+        custom_rubric: Custom evaluation criteria
+        model: Optional model ID to use
+        max_concurrency: Max concurrent evaluator calls (defaults to settings)
+
+    Returns:
+        Merged EvaluationResult
+    """
+    criteria = split_rubric(custom_rubric)
+    limit = max_concurrency or get_settings().eval_fanout_concurrency
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def bounded(criterion: str) -> Optional[EvaluationResult]:
+        async with semaphore:
+            return await _evaluate_criterion(prompt, criterion, model)
+
+    results = await asyncio.gather(*(bounded(c) for c in criteria))
+    return merge_evaluations(criteria, list(results))
@@ -0,0 +1,139 @@
+"""Vectorized experiment statistics: win rates, score deltas and bootstrap confidence intervals."""
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+# Upper bound on resample counts held in memory at once (~8 MB of float64)
+MAX_BOOTSTRAP_CELLS = 1_000_000
+
+
+def bootstrap_counts(n: int, n_boot: int, rng: np.random.Generator) -> Iterator[np.ndarray]:
+    """
+    Draw bootstrap resamples as per-row inclusion counts, a chunk at a time.
+
+    Args:
+        n: Number of rows
+        n_boot: Number of bootstrap resamples
+        rng: NumPy random generator
+
+    Yields:
+        Arrays of shape (chunk, n), at most MAX_BOOTSTRAP_CELLS cells each;
+        row b says how often each row appears in that resample
+    """
+    chunk = max(1, MAX_BOOTSTRAP_CELLS // max(1, n))
+    for start in range(0, n_boot, chunk):
+        size = min(n_boot, start + chunk) - start
+        idx = rng.integers(0, n, size=(size, n)) + (np.arange(size) * n)[:, None]
+        yield np.bincount(idx.ravel(), minlength=size * n).reshape(size, n).astype(np.float64)
+
+
+def bootstrap_means(
+    values: np.ndarray, mask: np.ndarray, n_boot: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Compute the resampled means of several series, one matrix product per chunk.
+
+    All series share the same resamples, so paired statistics (e.g. a delta
+    and a win indicator) stay consistent with each other. Rows outside a
+    series' mask are ignored for that series. Each chunk of resamples is
+    reduced to its means before the next is drawn, so memory stays at one
+    chunk however many resamples are taken.
+
+    Args:
+        values: Array of shape (series, n)
+        mask: Boolean array of shape (series, n), True where the value counts
+        n_boot: Number of bootstrap resamples
+        rng: NumPy random generator
+
+    Returns:
+        Array of shape (series, n_boot) with the resampled means (NaN if a
+        resample contains no valid rows)
+    """
+    weighted = np.where(mask, values, 0.0).T
+    weights = mask.astype(np.float64).T
+    means = np.empty((values.shape[0], n_boot))
+    start = 0
+    for counts in bootstrap_counts(values.shape[1], n_boot, rng):
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means[:, start:start + len(counts)] = ((counts @ weighted) / (counts @ weights)).T
+        start += len(counts)
+    return means
+
+
+def _interval(samples: np.ndarray, alpha: float) -> Tuple[float, float]:
+    low, high = np.nanquantile(samples, [alpha / 2, 1 - alpha / 2])
+    return float(low), float(high)
+
+
+def _prob_positive(samples: np.ndarray) -> Optional[float]:
+    # Resamples without a valid row (NaN) say nothing either way
+    finite = samples[~np.isnan(samples)]
+    return float((finite > 0).mean()) if finite.size else None
+
+
+def summarize_scores(
+    scores: np.ndarray,
+    n_boot: int = 10_000,
+    alpha: float = 0.05,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Summarize an experiment's score matrix.
+
+    Variant 0 is the control; every other variant is compared to it on the
+    rows where both were scored.
+
+    Args:
+        scores: Array of shape (rows, variants), NaN where a cell has no score
+        n_boot: Number of bootstrap resamples
+        alpha: Significance level for the (1 - alpha) confidence intervals
+        seed: Optional seed for reproducible intervals
+
+    Returns:
+        Dict with per-variant means and CIs, and per-variant comparisons to the
+        control (mean delta, win rate, CIs and probability of being better)
+    """
+    n_rows, n_variants = scores.shape
+    valid = ~np.isnan(scores)
+
+    # Series: each variant's scores, then (delta, win) against the control per variant
+    series = [np.nan_to_num(scores[:, v]) for v in range(n_variants)]
+    masks = [valid[:, v] for v in range(n_variants)]
+    for v in range(1, n_variants):
+        paired = valid[:, 0] & valid[:, v]
+        delta = np.where(paired, np.nan_to_num(scores[:, v]) - np.nan_to_num(scores[:, 0]), 0.0)
+        series += [delta, (delta > 0) + 0.5 * (delta == 0)]
+        masks += [paired, paired]
+
+    values = np.vstack(series)
+    mask = np.vstack(masks)
+    boot = None
+    if n_rows and mask.any():
+        rng = np.random.default_rng(seed)
+        boot = bootstrap_means(values, mask, n_boot, rng)
+
+    variants: List[Dict[str, Any]] = []
+    for v in range(n_variants):
+        n = int(mask[v].sum())
+        variants.append({
+            "variant": v,
+            "n": n,
+            "mean": float(values[v][mask[v]].mean()) if n else None,
+            "ci": _interval(boot[v], alpha) if n else None,
+        })
+
+    comparisons: List[Dict[str, Any]] = []
+    for v in range(1, n_variants):
+        d = n_variants + 2 * (v - 1)
+        w = d + 1
+        n = int(mask[d].sum())
+        comparisons.append({
+            "variant": v,
+            "n": n,
+            "mean_delta": float(values[d][mask[d]].mean()) if n else None,
+            "delta_ci": _interval(boot[d], alpha) if n else None,
+            "win_rate": float(values[w][mask[w]].mean()) if n else None,
+            "win_rate_ci": _interval(boot[w], alpha) if n else None,
+            "prob_better": _prob_positive(boot[d]) if n else None,
+        })
+
+    return {"variants": variants, "comparisons": comparisons, "bootstrap_samples": n_boot, "alpha": alpha}
@@ -0,0 +1,147 @@
+"""A/B experiment runner: prompt variants over a shared dataset, graded and persisted per cell."""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from agents import create_grader_agent, create_playground_agent
+from api.models import OutputGrade
+from config.settings import get_settings
+from database import crud
+from database.connection import AsyncSessionLocal
+from database.models import Experiment, ExperimentResult
+from services.agent_runner import run_agent
+from services.experiment_stats import summarize_scores
+from services.structured_output import run_structured, schema_for
+from tools.variable_tool import interpolate_variables
+
+
+def summarize_experiment(experiment: Experiment, results: List[ExperimentResult]) -> Dict[str, Any]:
+    """
+    Compute win rates, score deltas and bootstrap CIs from recorded cells.
+
+    Args:
+        experiment: Experiment row
+        results: Recorded cells
+
+    Returns:
+        Summary dict (see services.experiment_stats.summarize_scores)
+    """
+    scores = np.full((len(experiment.rows), len(experiment.variants)), np.nan)
+    for cell in results:
+        if cell.score is not None:
+            scores[cell.row_index, cell.variant_index] = cell.score
+    return summarize_scores(scores, n_boot=get_settings().experiment_bootstrap_samples)
+
+
+async def grade_output(
+    prompt: str,
+    output: str,
+    criteria: Optional[str] = None,
+    model: Optional[str] = None,
+) -> OutputGrade:
+    """Grade one model response with the Grader Agent."""
+    agent = create_grader_agent(criteria=criteria, model=model, output_schema=schema_for(OutputGrade, model))
+
+    prompt_text = f"""
+Grade the response below.
+
+Prompt the model received:
+---
+{prompt}
+---
+
+Model response:
+---
+{output}
+---
+
+Return your grade in JSON format.
+    """.strip()
+
+    return await run_structured(agent, prompt_text, OutputGrade)
+
+
+async def _run_cell(experiment: Experiment, row_index: int, variant_index: int) -> None:
+    """Run, grade and persist one (row, variant) cell."""
+    prompt = interpolate_variables(experiment.variants[variant_index], experiment.rows[row_index])
+    output = None
+    started = time.perf_counter()
+    try:
+        agent = create_playground_agent(model=experiment.model)
+        output = await run_agent(agent, prompt)
+        latency_ms = (time.perf_counter() - started) * 1000
+        grade = await grade_output(prompt, output, experiment.criteria, experiment.grader_model)
+        fields = dict(output=output, score=float(grade.score), rationale=grade.rationale, latency_ms=latency_ms)
+    except Exception as e:
+        # A cell cut off by its deadline keeps whatever text the model produced
+        output = output if output is not None else getattr(e, "partial", None) or None
+        fields = dict(output=output, error=str(getattr(e, "detail", e)))
+
+    async with AsyncSessionLocal() as db:
+        await crud.save_experiment_result(
+            db,
+            experiment_id=experiment.id,
+            row_index=row_index,
+            variant_index=variant_index,
+            **fields
+        )
+
+
+async def run_experiment(
+    experiment_id: str,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Run every cell of an experiment that has no score yet.
+
+    Cells are persisted as they finish, so a crashed or restarted experiment
+    resumes where it stopped; failed cells are retried on resume.
+
+    Args:
+        experiment_id: Experiment to run
+        on_progress: Optional callback with (finished cells, total cells)
+
+    Returns:
+        The experiment summary, or None if the experiment does not exist
+    """
+    settings = get_settings()
+    async with AsyncSessionLocal() as db:
+        experiment = await crud.get_experiment(db, experiment_id)
+        if not experiment:
+            return None
+        results = await crud.get_experiment_results(db, experiment_id)
+        await crud.update_experiment_status(db, experiment_id, "running")
+
+    done = {(cell.row_index, cell.variant_index) for cell in results if cell.score is not None}
+    pending = [
+        (row_index, variant_index)
+        for row_index in range(len(experiment.rows))
+        for variant_index in range(len(experiment.variants))
+        if (row_index, variant_index) not in done
+    ]
+    print(f"[DEBUG] Experiment {experiment_id}: {len(pending)} pending cells ({len(done)} already done)")
+
+    semaphore = asyncio.Semaphore(max(1, settings.experiment_concurrency))
+    total = len(experiment.rows) * len(experiment.variants)
+    finished = len(done)
+
+    async def bounded(row_index: int, variant_index: int) -> None:
+        nonlocal finished
+        async with semaphore:
+            await _run_cell(experiment, row_index, variant_index)
+        finished += 1
+        if on_progress:
+            on_progress(finished, total)
+
+    try:
+        await asyncio.gather(*(bounded(r, v) for r, v in pending))
+        async with AsyncSessionLocal() as db:
+            results = await crud.get_experiment_results(db, experiment_id)
+            summary = await asyncio.to_thread(summarize_experiment, experiment, results)
+            await crud.update_experiment_status(db, experiment_id, "completed", summary=summary)
+        return summary
+    except Exception as e:
+        print(f"[DEBUG] Experiment {experiment_id} failed: {e}")
+        async with AsyncSessionLocal() as db:
+            await crud.update_experiment_status(db, experiment_id, "failed", error=str(e))
+        raise
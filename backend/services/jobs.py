@@ -0,0 +1,285 @@
+"""Persistent background jobs: DB-leased worker pool with heartbeats, retries and cancellation."""
+import asyncio
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.models import EvaluateBatchRequest, OptimizeTournamentRequest, RankPromptsRequest
+from config.settings import get_settings
+from database import crud
+from database.connection import AsyncSessionLocal
+from database.models import Job
+from services.evaluation_service import evaluate_per_criterion, evaluate_with_llm
+from services.experiments import run_experiment
+from services.load_shedder import get_load_shedder
+from services.priority_scheduler import priority_class
+from services.ranking import rank_prompts
+from services.tournament import run_tournament
+
+TERMINAL_JOB_STATUSES = ("succeeded", "failed", "cancelled")
+
+
+class JobContext:
+    """Handle a running job uses to report progress; the worker persists it on each heartbeat."""
+
+    def __init__(self, job: Job):
+        self.job_id = job.id
+        self.attempt = job.attempts
+        self.progress = job.progress or 0.0
+        self.message: Optional[str] = job.progress_message
+        self.cancel_requested = False
+
+    def report(self, progress: float, message: Optional[str] = None) -> None:
+        """Record progress (0.0 - 1.0) and an optional status message."""
+        self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+
+
+JobHandler = Callable[[Dict[str, Any], JobContext], Awaitable[Any]]
+
+
+async def _run_optimize_tournament(payload: Dict[str, Any], ctx: JobContext) -> Any:
+    request = OptimizeTournamentRequest(**payload)
+    total = request.rounds * request.count
+    generated = 0
+    baseline = None
+    async for event, data in run_tournament(request):
+        if event == "baseline":
+            baseline = data.model_dump(mode="json")
+        elif event == "candidate":
+            generated += 1
+            ctx.report(generated / total, f"Round {data.round}: {generated}/{total} candidates")
+        elif event == "done":
+            return {"baseline": baseline, **data}
+    return {"baseline": baseline, "ranking": []}
+
+
+async def _run_rank(payload: Dict[str, Any], ctx: JobContext) -> Any:
+    ctx.report(0.0, f"Ranking {len(payload.get('prompts', []))} prompts")
+    response = await rank_prompts(RankPromptsRequest(**payload))
+    return response.model_dump(mode="json")
+
+
+async def _run_evaluate_batch(payload: Dict[str, Any], ctx: JobContext) -> Any:
+    request = EvaluateBatchRequest(**payload)
+    semaphore = asyncio.Semaphore(max(1, get_settings().eval_fanout_concurrency))
+    results: list = [None] * len(request.prompts)
+    errors: Dict[int, str] = {}
+    finished = 0
+
+    async def evaluate(index: int, prompt: str) -> None:
+        nonlocal finished
+        async with semaphore:
+            try:
+                if request.mode == "per_criterion":
+                    result = await evaluate_per_criterion(prompt, request.custom_rubric, request.model)
+                else:
+                    result = await evaluate_with_llm(prompt, request.custom_rubric, request.model)
+                results[index] = result.model_dump(mode="json")
+            except Exception as e:
+                errors[index] = str(getattr(e, "detail", e))
+        finished += 1
+        ctx.report(finished / len(request.prompts), f"{finished}/{len(request.prompts)} prompts evaluated")
+
+    await asyncio.gather(*(evaluate(i, p) for i, p in enumerate(request.prompts)))
+    return {"results": results, "errors": {str(i): e for i, e in errors.items()}}
+
+
+async def _run_experiment(payload: Dict[str, Any], ctx: JobContext) -> Any:
+    experiment_id = payload["experiment_id"]
+
+    def on_progress(finished: int, total: int) -> None:
+        ctx.report(finished / total, f"{finished}/{total} cells")
+
+    try:
+        summary = await run_experiment(experiment_id, on_progress=on_progress)
+    except asyncio.CancelledError:
+        if ctx.cancel_requested:
+            async with AsyncSessionLocal() as db:
+                await crud.update_experiment_status(db, experiment_id, "cancelled")
+        raise
+    return {"experiment_id": experiment_id, "summary": summary}
+
+
+# Handler per job kind
+JOB_HANDLERS: Dict[str, JobHandler] = {
+    "optimize_tournament": _run_optimize_tournament,
+    "rank": _run_rank,
+    "evaluate_batch": _run_evaluate_batch,
+    "experiment": _run_experiment,
+}
+
+# Payload schema per job kind that can be submitted directly
+JOB_PAYLOAD_MODELS: Dict[str, type] = {
+    "optimize_tournament": OptimizeTournamentRequest,
+    "rank": RankPromptsRequest,
+    "evaluate_batch": EvaluateBatchRequest,
+}
+
+
+class JobWorker:
+    """
+    Pool that leases queued jobs from the database and runs them.
+
+    Every server process runs one pool. A job is leased with a conditional
+    update, so each job runs in exactly one process; the lease is renewed by
+    heartbeats and a job whose worker dies is picked up again once its lease
+    expires. Failed jobs are retried with exponential backoff.
+    """
+
+    def __init__(self, concurrency: int):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start polling for jobs."""
+        if self._loop is None:
+            self._loop = asyncio.create_task(self._poll())
+
+    def notify(self) -> None:
+        """Wake the pool (a job was just queued)."""
+        self._wake.set()
+
+    async def stop(self) -> None:
+        """Stop polling and hand running jobs back to the queue."""
+        if self._loop is not None:
+            self._loop.cancel()
+            await asyncio.gather(self._loop, return_exceptions=True)
+            self._loop = None
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _poll(self) -> None:
+        settings = get_settings()
+        while True:
+            job = None
+            # While the server is overloaded, leave queued jobs for later instead of adding load
+            if len(self._running) < self.concurrency and not get_load_shedder().overloaded:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        job = await crud.lease_next_job(db, self.worker_id, settings.job_lease_seconds)
+                except Exception as e:
+                    print(f"[DEBUG] Job lease failed: {e}")
+            if job is not None:
+                task = asyncio.create_task(self._run(job))
+                self._running[job.id] = task
+                task.add_done_callback(lambda _, job_id=job.id: self._finished(job_id))
+                continue
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=settings.job_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    def _finished(self, job_id: str) -> None:
+        self._running.pop(job_id, None)
+        self._wake.set()
+
+    async def _run(self, job: Job) -> None:
+        settings = get_settings()
+        handler = JOB_HANDLERS.get(job.kind)
+        if handler is None:
+            async with AsyncSessionLocal() as db:
+                await crud.finish_job(db, job.id, self.worker_id, "failed", error=f"Unknown job kind: {job.kind}")
+            return
+
+        print(f"[DEBUG] Job {job.id} ({job.kind}) attempt {job.attempts} on {self.worker_id}")
+        ctx = JobContext(job)
+        with priority_class("bulk"):
+            # Agent calls made by the job (and the tasks it starts) yield to interactive traffic
+            work = asyncio.create_task(handler(job.payload, ctx))
+        lease_lost = False
+        try:
+            while not work.done():
+                await asyncio.wait({work}, timeout=settings.job_heartbeat_seconds)
+                if work.done():
+                    break
+                async with AsyncSessionLocal() as db:
+                    current = await crud.heartbeat_job(
+                        db, job.id, self.worker_id, settings.job_lease_seconds, ctx.progress, ctx.message
+                    )
+                if current is None:
+                    lease_lost = True
+                    work.cancel()
+                elif current.cancel_requested:
+                    ctx.cancel_requested = True
+                    work.cancel()
+            result = await work
+        except asyncio.CancelledError:
+            if lease_lost:
+                print(f"[DEBUG] Job {job.id} lost its lease; abandoned")
+                return
+            async with AsyncSessionLocal() as db:
+                if ctx.cancel_requested:
+                    await crud.finish_job(db, job.id, self.worker_id, "cancelled")
+                    return
+                # Worker shutting down: hand the job back without using up an attempt
+                work.cancel()
+                await crud.requeue_job(db, job.id, self.worker_id, refund_attempt=True)
+            raise
+        except Exception as e:
+            error = str(getattr(e, "detail", e))
+            print(f"[DEBUG] Job {job.id} failed (attempt {job.attempts}/{job.max_attempts}): {error}")
+            async with AsyncSessionLocal() as db:
+                if job.attempts < job.max_attempts:
+                    delay = settings.job_retry_base_seconds * 2 ** (job.attempts - 1)
+                    await crud.requeue_job(db, job.id, self.worker_id, delay_seconds=delay, error=error)
+                else:
+                    await crud.finish_job(db, job.id, self.worker_id, "failed", error=error)
+            return
+
+        async with AsyncSessionLocal() as db:
+            await crud.finish_job(db, job.id, self.worker_id, "succeeded", result=result)
+
+
+_worker: Optional[JobWorker] = None
+
+
+def get_job_worker() -> JobWorker:
+    """Get this process's job worker pool."""
+    global _worker
+    if _worker is None:
+        _worker = JobWorker(get_settings().job_workers)
+    return _worker
+
+
+async def submit_job(
+    db: AsyncSession,
+    user_id: str,
+    kind: str,
+    payload: Dict[str, Any],
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Queue a job and wake this process's workers.
+
+    Args:
+        db: Database session
+        user_id: Owner of the job
+        kind: Job kind (see JOB_HANDLERS)
+        payload: JSON-serializable job parameters
+        max_attempts: Attempts before the job fails (default JOB_MAX_ATTEMPTS)
+
+    Returns:
+        The queued job
+    """
+    if isinstance(payload, BaseModel):
+        payload = payload.model_dump(mode="json")
+    job = await crud.create_job(
+        db,
+        job_id=str(uuid.uuid4()),
+        user_id=user_id,
+        kind=kind,
+        payload=payload,
+        max_attempts=max_attempts or get_settings().job_max_attempts,
+    )
+    get_job_worker().notify()
+    return job
@@ -0,0 +1,94 @@
+"""CoDel-style overload detection from event loop lag and agent queue delay."""
+from typing import Dict, Optional
+from config.settings import get_settings
+from services.loop_monitor import get_loop_monitor
+from services.priority_scheduler import get_priority_scheduler
+
+
+class LoadShedder:
+    """
+    Detects sustained overload the way CoDel detects a standing queue.
+
+    Every event loop probe (see services.loop_monitor) samples the delay new
+    work would see: the loop's lag plus the age of the oldest agent call
+    waiting for a slot. Short bursts are absorbed; only when the *minimum*
+    delay over a whole ``interval_ms`` stays above ``target_ms`` is the
+    server overloaded, and it stays so until an interval's minimum is back
+    under the target. Interactive calls are judged on their own queue, so
+    they are shed only when even their reserved slots are backed up.
+    """
+
+    def __init__(self, target_ms: float, interval_ms: float):
+        self.target_ms = target_ms
+        self.interval_ms = interval_ms
+        self.overloaded = False
+        self.interactive_overloaded = False
+        self.lag_ms = 0.0
+        self.queue_delay_ms = 0.0
+        self.shed: Dict[str, int] = {}
+        self._window_min: Optional[float] = None
+        self._interactive_min: Optional[float] = None
+        self._window_start: Optional[float] = None
+
+    def _sample(self, now: float, delay_ms: float, interactive_delay_ms: float) -> None:
+        self._window_min = delay_ms if self._window_min is None else min(self._window_min, delay_ms)
+        self._interactive_min = (
+            interactive_delay_ms if self._interactive_min is None else min(self._interactive_min, interactive_delay_ms)
+        )
+        if self._window_start is None:
+            self._window_start = now
+        elif (now - self._window_start) * 1000 >= self.interval_ms:
+            overloaded = self._window_min > self.target_ms
+            if overloaded != self.overloaded:
+                print(f"[DEBUG] Load shedding {'on' if overloaded else 'off'} (standing delay {self._window_min:.0f} ms)")
+            self.overloaded = overloaded
+            self.interactive_overloaded = self._interactive_min > self.target_ms
+            self._window_min = self._interactive_min = None
+            self._window_start = now
+
+    def _on_probe(self, now: float, lag_ms: float) -> None:
+        scheduler = get_priority_scheduler()
+        self.lag_ms = lag_ms
+        self.queue_delay_ms = scheduler.oldest_wait_ms()
+        self._sample(
+            now,
+            self.lag_ms + self.queue_delay_ms,
+            self.lag_ms + scheduler.oldest_wait_ms("interactive"),
+        )
+
+    def start(self) -> None:
+        """Start sampling on every event loop probe (idempotent)."""
+        get_loop_monitor().add_listener(self._on_probe)
+
+    def stop(self) -> None:
+        """Stop sampling."""
+        get_loop_monitor().remove_listener(self._on_probe)
+
+    def should_shed(self, priority: str) -> bool:
+        """Whether new work of a priority class should be rejected right now."""
+        shed = self.interactive_overloaded if priority == "interactive" else self.overloaded
+        if shed:
+            self.shed[priority] = self.shed.get(priority, 0) + 1
+        return shed
+
+    def snapshot(self) -> Dict[str, object]:
+        """Current overload state and shed request counts."""
+        return {
+            "overloaded": self.overloaded,
+            "interactive_overloaded": self.interactive_overloaded,
+            "loop_lag_ms": round(self.lag_ms, 1),
+            "queue_delay_ms": round(self.queue_delay_ms, 1),
+            "shed": dict(self.shed),
+        }
+
+
+_shedder: Optional[LoadShedder] = None
+
+
+def get_load_shedder() -> LoadShedder:
+    """Get the process-wide load shedder."""
+    global _shedder
+    if _shedder is None:
+        settings = get_settings()
+        _shedder = LoadShedder(settings.shed_target_ms, settings.shed_interval_ms)
+    return _shedder
@@ -0,0 +1,226 @@
+"""Event loop health: continuous lag sampling and detection of callbacks that block the loop."""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Deque, Dict, List, Optional
+from config.settings import get_settings
+
+# How often the loop is probed
+PROBE_INTERVAL_S = 0.05
+# Probe samples kept for percentiles (one minute)
+LAG_HISTORY = 1200
+# Slow callbacks kept for the debug endpoint
+SLOW_CALLBACK_HISTORY = 50
+# Innermost stack frames kept per slow callback
+STACK_DEPTH = 25
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_ID_SEGMENT = re.compile(r"^([0-9a-f]{8}-[0-9a-f-]{27}|\d+)$", re.IGNORECASE)
+
+# Request labels by the id() of the middleware frame serving the request; the
+# watchdog finds the route of a blocked loop by looking for these frames
+_frame_routes: Dict[int, str] = {}
+
+
+def route_label(method: str, path: str) -> str:
+    """Route label for metrics, with ID path segments collapsed (e.g. 'GET /api/jobs/{id}')."""
+    segments = ["{id}" if _ID_SEGMENT.match(s) else s for s in path.rstrip("/").split("/")]
+    return f"{method} {'/'.join(segments) or '/'}"
+
+
+def mark_route(frame, route: str) -> None:
+    """Attribute loop blocking under ``frame`` to a route (call unmark_route when done)."""
+    _frame_routes[id(frame)] = route
+
+
+def unmark_route(frame) -> None:
+    """Stop attributing blocking under ``frame``."""
+    _frame_routes.pop(id(frame), None)
+
+
+def route_of_frame(frame) -> str:
+    """Route of the request a stack belongs to, else its innermost backend function."""
+    innermost = None
+    while frame is not None:
+        route = _frame_routes.get(id(frame))
+        if route is not None:
+            return route
+        filename = frame.f_code.co_filename
+        if innermost is None and filename.startswith(_BACKEND_DIR) and "site-packages" not in filename:
+            innermost = f"{os.path.relpath(filename, _BACKEND_DIR)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return innermost or "unknown"
+
+
+@dataclass
+class SlowCallback:
+    """One stall of the event loop."""
+    duration_ms: float
+    route: str
+    at: float = field(default_factory=time.time)
+    stack: List[str] = field(default_factory=list)
+
+
+@dataclass
+class RouteBlocking:
+    """Loop blocking attributed to one route."""
+    requests: int = 0
+    stalls: int = 0
+    blocked_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+class LoopMonitor:
+    """
+    Samples event loop lag and catches callbacks that block the loop.
+
+    A probe coroutine wakes every PROBE_INTERVAL_S and records how late it
+    woke (the lag). A watchdog thread watches the probe's heartbeat: when it
+    stops for longer than ``threshold_ms``, the loop is stuck in a
+    synchronous callback, and the watchdog captures the loop thread's stack
+    while it is still blocked. When the probe wakes again the stall's length
+    is known and it is recorded against the route whose request was running,
+    found from the stack, or else against the innermost backend function on
+    it. Works with any event loop implementation, uvloop included.
+    """
+
+    def __init__(self, threshold_ms: float):
+        self.threshold_ms = threshold_ms
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._lags: Deque[float] = deque(maxlen=LAG_HISTORY)
+        self.slow_callbacks: Deque[SlowCallback] = deque(maxlen=SLOW_CALLBACK_HISTORY)
+        self.routes: Dict[str, RouteBlocking] = {}
+        self._listeners: List[Callable[[float, float], None]] = []
+        self._beat = 0
+        self._beat_at = time.monotonic()
+        self._capture: Optional[tuple] = None  # (beat, route, stack) taken by the watchdog
+        self._loop_thread: Optional[int] = None
+        self._probe: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def add_listener(self, listener: Callable[[float, float], None]) -> None:
+        """Call ``listener(loop_time, lag_ms)`` after every probe."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[float, float], None]) -> None:
+        """Stop calling a listener."""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def count_request(self, route: str) -> None:
+        """Count a request towards a route's blocking-per-request figure."""
+        self.routes.setdefault(route, RouteBlocking()).requests += 1
+
+    def _watch(self) -> None:
+        """Watchdog thread: capture the loop's stack while it is blocked."""
+        stalled_after = PROBE_INTERVAL_S + self.threshold_ms / 1000
+        captured_beat = -1
+        while not self._stop.wait(self.threshold_ms / 2000):
+            beat, beat_at = self._beat, self._beat_at
+            if beat == captured_beat or time.monotonic() - beat_at < stalled_after:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                stack = traceback.format_stack(frame)[-STACK_DEPTH:]
+                self._capture = (beat, route_of_frame(frame), [line.rstrip() for line in stack])
+            captured_beat = beat
+
+    def _record_stall(self, beat: int, lag_ms: float) -> None:
+        capture, self._capture = self._capture, None
+        if capture is not None and capture[0] == beat:
+            _, route, stack = capture
+        else:
+            route, stack = "unknown", []  # Too short for the watchdog to catch in the act
+        self.slow_callbacks.append(SlowCallback(duration_ms=round(lag_ms, 1), route=route, stack=stack))
+        blocking = self.routes.setdefault(route, RouteBlocking())
+        blocking.stalls += 1
+        blocking.blocked_ms += lag_ms
+        blocking.max_ms = max(blocking.max_ms, lag_ms)
+        print(f"[DEBUG] Event loop blocked for {lag_ms:.0f} ms by {route}")
+
+    async def _run_probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            self._beat_at = time.monotonic()
+            await asyncio.sleep(PROBE_INTERVAL_S)
+            now = loop.time()
+            lag_ms = max(0.0, (now - started - PROBE_INTERVAL_S) * 1000)
+            beat = self._beat
+            self._beat += 1
+            self.lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self._lags.append(lag_ms)
+            if lag_ms >= self.threshold_ms:
+                self._record_stall(beat, lag_ms)
+            for listener in list(self._listeners):
+                listener(now, lag_ms)
+
+    def start(self) -> None:
+        """Start the probe and the watchdog (idempotent)."""
+        if self._probe is None or self._probe.done():
+            self._loop_thread = threading.get_ident()
+            self._probe = asyncio.create_task(self._run_probe())
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._stop.clear()
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the probe and the watchdog."""
+        self._stop.set()
+        if self._probe is not None:
+            self._probe.cancel()
+            try:
+                await self._probe
+            except asyncio.CancelledError:
+                pass
+            self._probe = None
+
+    def snapshot(self, stacks: bool = True) -> Dict[str, object]:
+        """Lag percentiles, per-route blocking and recent slow callbacks."""
+        lags = sorted(self._lags)
+
+        def percentile(q: float) -> float:
+            return round(lags[min(len(lags) - 1, int(q * len(lags)))], 1) if lags else 0.0
+
+        routes = {}
+        for route, blocking in sorted(self.routes.items(), key=lambda item: -item[1].blocked_ms):
+            routes[route] = {
+                **asdict(blocking),
+                "blocked_ms": round(blocking.blocked_ms, 1),
+                "max_ms": round(blocking.max_ms, 1),
+                "blocked_ms_per_request": round(blocking.blocked_ms / blocking.requests, 2) if blocking.requests else None,
+            }
+        slow = [asdict(cb) if stacks else {**asdict(cb), "stack": []} for cb in reversed(self.slow_callbacks)]
+        return {
+            "threshold_ms": self.threshold_ms,
+            "lag_ms": {
+                "current": round(self.lag_ms, 1),
+                "p50": percentile(0.5),
+                "p99": percentile(0.99),
+                "max": round(self.max_lag_ms, 1),
+            },
+            "routes": routes,
+            "slow_callbacks": slow,
+        }
+
+
+_monitor: Optional[LoopMonitor] = None
+
+
+def get_loop_monitor() -> LoopMonitor:
+    """Get the process-wide event loop monitor."""
+    global _monitor
+    if _monitor is None:
+        _monitor = LoopMonitor(get_settings().slow_callback_ms)
+    return _monitor
@@ -0,0 +1,82 @@
+"""In-memory Ollama model catalog with TTL, stale-while-revalidate and negative caching."""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+from config.settings import get_settings
+from services.ollama_client import get_ollama_client
+
+
+class ModelCatalog:
+    """
+    Cached list of models installed on the Ollama server.
+
+    Reads are served from memory. Once the list is older than the TTL, the
+    next read returns it as is and starts one background refresh. A failed
+    fetch is remembered for a while so an unreachable server is not retried on
+    every read; the last good list is kept meanwhile.
+    """
+
+    def __init__(self):
+        self._models: List[Dict[str, Any]] = []
+        self._fetched_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Task] = None
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the cached list is within its TTL."""
+        ttl = get_settings().ollama_catalog_ttl_seconds
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < ttl
+
+    @property
+    def is_failing(self) -> bool:
+        """Whether a recent fetch failed and retries are being held back."""
+        error_ttl = get_settings().ollama_catalog_error_ttl_seconds
+        return self._failed_at is not None and time.monotonic() - self._failed_at < error_ttl
+
+    async def _fetch(self) -> None:
+        try:
+            response = await get_ollama_client().get("/api/tags")
+            response.raise_for_status()
+            models = []
+            for model in response.json().get("models", []):
+                model_name = model.get("name")
+                if model_name:
+                    models.append({
+                        "id": f"ollama/{model_name}",
+                        "name": model_name,
+                        "provider": "ollama"
+                    })
+            self._models = models
+            self._fetched_at = time.monotonic()
+            self._failed_at = None
+        except Exception as e:
+            print(f"Error fetching Ollama models: {e}")
+            self._failed_at = time.monotonic()
+
+    def refresh(self) -> asyncio.Task:
+        """Start a background refresh, or return the one already running."""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._fetch())
+        return self._refresh
+
+    async def get_models(self) -> List[Dict[str, Any]]:
+        """
+        Get the installed models.
+
+        Only the very first read waits for the server (bounded by the client
+        timeout); later reads return from memory.
+
+        Returns:
+            List of model dictionaries with 'id', 'name' and 'provider'
+        """
+        if self.is_fresh or self.is_failing:
+            return self._models
+        task = self.refresh()
+        if self._fetched_at is None:
+            await asyncio.shield(task)
+        return self._models
+
+
+# Process-wide catalog
+ollama_catalog = ModelCatalog()
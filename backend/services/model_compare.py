@@ -0,0 +1,98 @@
+"""Multi-model comparison: one prompt streamed from several models concurrently."""
+import asyncio
+import time
+from typing import AsyncGenerator, List, Tuple
+from agents import create_playground_agent
+from api.models import ModelRunStats
+from services.agent_runner import ERROR_PREFIX, stream_agent_response
+from services.ollama_residency import residency
+
+# Queue marker for a finished model stream
+_DONE = object()
+
+# Chunks buffered per model before a slow client holds back the models
+QUEUE_CHUNKS_PER_MODEL = 32
+
+
+async def _pump(model: str, prompt: str, queue: asyncio.Queue) -> None:
+    """Stream one model's response into the shared queue, then its stats."""
+    started = time.perf_counter()
+    ttft_ms = None
+    output_chars = 0
+    chunks = 0
+    error = None
+    warm = None
+    try:
+        warm = await residency.is_warm(model)
+        agent = create_playground_agent(model=model)
+        async for chunk in stream_agent_response(agent, prompt, priority="interactive"):
+            if not chunk:
+                continue
+            if chunk.startswith(ERROR_PREFIX):
+                error = chunk[len(ERROR_PREFIX):].rstrip("]")
+                continue
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            output_chars += len(chunk)
+            chunks += 1
+            await queue.put(("chunk", {"model": model, "text": chunk}))
+    except Exception as e:
+        error = str(e)
+
+    stats = ModelRunStats(
+        model=model,
+        warm=warm,
+        ttft_ms=ttft_ms,
+        latency_ms=(time.perf_counter() - started) * 1000,
+        output_chars=output_chars,
+        chunks=chunks,
+        error=error,
+    )
+    await queue.put(("model_done", stats))
+    await queue.put(_DONE)
+
+
+async def compare_models(prompt: str, models: List[str]) -> AsyncGenerator[Tuple[str, object], None]:
+    """
+    Run a prompt against several models concurrently and interleave their output.
+
+    All models start at once, so the stream lasts as long as the slowest
+    model rather than the sum of all of them. The shared queue is bounded,
+    so a client that reads slowly pauses the models instead of letting
+    their output pile up in memory.
+
+    Args:
+        prompt: Final (interpolated) prompt
+        models: Model IDs to compare
+
+    Yields:
+        (event name, payload) tuples: 'start', 'chunk' (tagged with its model,
+        in arrival order), 'model_done' (per-model stats) and 'done' (all stats)
+    """
+    models = list(dict.fromkeys(models))
+    queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_CHUNKS_PER_MODEL * len(models))
+    tasks = [asyncio.create_task(_pump(model, prompt, queue)) for model in models]
+    stats: List[ModelRunStats] = []
+    started = time.perf_counter()
+
+    yield "start", {"models": models}
+    try:
+        remaining = len(tasks)
+        while remaining:
+            item = await queue.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            event, payload = item
+            if event == "model_done":
+                stats.append(payload)
+            yield event, payload
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    stats.sort(key=lambda s: models.index(s.model))
+    yield "done", {
+        "models": [s.model_dump(mode="json") for s in stats],
+        "wall_ms": (time.perf_counter() - started) * 1000,
+    }
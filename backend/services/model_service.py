@@ -1,48 +1,18 @@
 """Service for managing and fetching available LLM models."""
-import httpx
 from typing import List, Dict, Any
 from config.settings import get_settings
+from services.model_catalog import ollama_catalog
 
 async def get_ollama_models() -> List[Dict[str, Any]]:
     """
-    Fetch available models from the local Ollama instance.
+    Get available models from the local Ollama instance.
+    
+    Served from the in-memory catalog, which refreshes itself in the background.
     
     Returns:
         List of model dictionaries with 'id' and 'name'.
     """
-    settings = get_settings()
-    base_url = settings.litellm_api_base
-    
-    # Ollama API endpoint for tags (list models)
-    # Usually http://localhost:11434/api/tags
-    # We need to handle if base_url has /v1 or not, but typically for Ollama direct access
-    # it's just the base URL. If litellm_api_base is pointing to a specific port, we assume
-    # it's the Ollama server root.
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            # Try standard Ollama tags endpoint
-            # Remove trailing slash if present
-            clean_base = base_url.rstrip('/')
-            response = await client.get(f"{clean_base}/api/tags", timeout=5.0)
-            
-            if response.status_code == 200:
-                data = response.json()
-                models = []
-                for model in data.get('models', []):
-                    model_name = model.get('name')
-                    if model_name:
-                        models.append({
-                            "id": f"ollama/{model_name}",
-                            "name": model_name,
-                            "provider": "ollama"
-                        })
-                return models
-    except Exception as e:
-        print(f"Error fetching Ollama models: {e}")
-        return []
-    
-    return []
+    return await ollama_catalog.get_models()
 
 async def get_available_models() -> List[Dict[str, Any]]:
     """
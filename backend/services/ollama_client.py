@@ -0,0 +1,32 @@
+"""Shared HTTP client for the Ollama server."""
+import httpx
+from typing import Optional
+from config.settings import get_settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """
+    Get the pooled HTTP client for the configured Ollama server.
+
+    The client keeps connections alive across requests instead of opening a
+    new connection per call.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        settings = get_settings()
+        _client = httpx.AsyncClient(
+            base_url=settings.litellm_api_base.rstrip("/"),
+            timeout=httpx.Timeout(settings.ollama_timeout_seconds),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _client
+
+
+async def close_ollama_client() -> None:
+    """Close the shared client (on shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,234 @@
+"""Ollama model residency: which models are loaded, warm-up, and swap-minimizing scheduling."""
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Set
+from config.settings import get_settings
+from services.ollama_client import get_ollama_client
+
+OLLAMA_PREFIXES = ("ollama/", "ollama_chat/")
+
+
+def ollama_name(model_id: Optional[str]) -> Optional[str]:
+    """Ollama's own name for a model ID (e.g. 'ollama/llama3.2' -> 'llama3.2'), or None."""
+    if not model_id:
+        return None
+    for prefix in OLLAMA_PREFIXES:
+        if model_id.startswith(prefix):
+            return model_id[len(prefix):]
+    return None
+
+
+def tagged_name(name: str) -> str:
+    """An Ollama model name with its tag, as /api/ps reports it (e.g. 'llama3.2' -> 'llama3.2:latest')."""
+    return name if ":" in name.rsplit("/", 1)[-1] else f"{name}:latest"
+
+
+class ResidencyManager:
+    """
+    Tracks which models the Ollama server has loaded.
+
+    The loaded set comes from /api/ps and is updated locally whenever a call
+    completes, since a model that just answered is resident. Reads never
+    wait for Ollama: they return the last snapshot, and once it is older
+    than OLLAMA_PS_TTL_SECONDS start one background refresh.
+    """
+
+    def __init__(self):
+        self._resident: Set[str] = set()
+        self._checked_at: Optional[float] = None
+        self._check: Optional[asyncio.Task] = None
+
+    async def _fetch(self) -> None:
+        try:
+            response = await get_ollama_client().get("/api/ps")
+            response.raise_for_status()
+            self._resident = {
+                tagged_name(m.get("name") or m.get("model"))
+                for m in response.json().get("models", [])
+                if m.get("name") or m.get("model")
+            }
+        except Exception as e:
+            print(f"Error fetching Ollama residency: {e}")
+        self._checked_at = time.monotonic()
+
+    def refresh(self) -> asyncio.Task:
+        """Start a background /api/ps read, or return the one already running."""
+        if self._check is None or self._check.done():
+            self._check = asyncio.create_task(self._fetch())
+        return self._check
+
+    async def resident_models(self) -> Set[str]:
+        """Tagged names of the models loaded as of the last snapshot (refreshed in the background)."""
+        ttl = get_settings().ollama_ps_ttl_seconds
+        if self._checked_at is None or time.monotonic() - self._checked_at >= ttl:
+            self.refresh()
+        return self._resident
+
+    async def is_warm(self, model_id: str) -> Optional[bool]:
+        """Whether an Ollama model is loaded (None for non-Ollama models, or before the first snapshot)."""
+        name = ollama_name(model_id)
+        if name is None:
+            return None
+        name = tagged_name(name)
+        resident = await self.resident_models()
+        if name in resident:
+            return True
+        return False if self._checked_at is not None else None
+
+    def mark_loaded(self, model_id: str) -> None:
+        """Record that a model has just served a request."""
+        name = ollama_name(model_id)
+        if name:
+            self._resident.add(tagged_name(name))
+
+    async def preload(self, model_id: str) -> bool:
+        """
+        Load a model into memory ahead of its first request.
+
+        Sends an empty generate request, which makes Ollama load the model
+        and keep it for OLLAMA_KEEP_ALIVE.
+
+        Returns:
+            True if the model is now loaded
+        """
+        settings = get_settings()
+        name = ollama_name(model_id)
+        if name is None:
+            return False
+        try:
+            response = await get_ollama_client().post(
+                "/api/generate",
+                json={"model": name, "keep_alive": settings.ollama_keep_alive},
+                timeout=settings.ollama_preload_timeout_seconds,
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error preloading Ollama model {name}: {e}")
+            return False
+        self._resident.add(tagged_name(name))
+        print(f"✅ Preloaded Ollama model {name}")
+        return True
+
+    async def warm_up(self) -> None:
+        """Preload the configured models (OLLAMA_PRELOAD_MODELS, else the LiteLLM default)."""
+        settings = get_settings()
+        models = [m.strip() for m in settings.ollama_preload_models.split(",") if m.strip()]
+        if not models and settings.model_provider == "litellm":
+            models = [settings.litellm_model]
+        for model_id in models:
+            await self.preload(model_id)
+
+
+class ModelSwitchScheduler:
+    """
+    Admits Ollama calls so that requests for the same model run together.
+
+    At most ``slots`` distinct models are active at once (the server's loaded
+    model capacity). Requests for an active model run immediately; requests
+    for another model wait until a slot drains, and the waiting model with
+    the most queued requests is switched in next. To keep waiting models from
+    starving, an active model admits at most ``batch`` more requests once
+    others are queued.
+    """
+
+    def __init__(self, slots: int, batch: int):
+        self.slots = max(1, slots)
+        self.batch = max(1, batch)
+        self._active: Dict[str, int] = {}  # model -> in-flight calls
+        self._admitted: Dict[str, int] = defaultdict(int)  # model -> admissions while others wait
+        self._waiting: Dict[str, int] = defaultdict(int)
+        self._yielded: Optional[str] = None  # model that last gave up its slot to waiting ones
+        self._condition = asyncio.Condition()
+
+    def _others_waiting(self, model: str) -> bool:
+        return any(count for name, count in self._waiting.items() if name != model)
+
+    def _next_model(self) -> Optional[str]:
+        queued = [(count, name) for name, count in self._waiting.items() if count and name not in self._active]
+        if len(queued) > 1:
+            queued = [q for q in queued if q[1] != self._yielded]
+        return max(queued)[1] if queued else None
+
+    def _can_run(self, model: str) -> bool:
+        if model in self._active:
+            return not self._others_waiting(model) or self._admitted[model] < self.batch
+        if len(self._active) < self.slots:
+            return self._next_model() == model
+        return False
+
+    def _drain_idle(self) -> None:
+        for name in [name for name, count in self._active.items() if count == 0]:
+            if self._others_waiting(name) or not self._waiting.get(name):
+                if self._others_waiting(name):
+                    self._yielded = name
+                del self._active[name]
+                self._admitted.pop(name, None)
+
+    @asynccontextmanager
+    async def slot(self, model: str) -> AsyncIterator[None]:
+        """Hold an execution slot for one call to a model."""
+        async with self._condition:
+            self._waiting[model] += 1
+            try:
+                await self._condition.wait_for(lambda: self._can_run(model))
+            except BaseException:
+                self._waiting[model] -= 1
+                self._condition.notify_all()
+                raise
+            self._waiting[model] -= 1
+            if model not in self._active:
+                self._yielded = None
+            if self._others_waiting(model):
+                self._admitted[model] += 1
+            else:
+                self._admitted[model] = 0
+            self._active[model] = self._active.get(model, 0) + 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._active[model] -= 1
+                self._drain_idle()
+                self._condition.notify_all()
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        """Active and queued requests per model."""
+        return {
+            "active": dict(self._active),
+            "waiting": {name: count for name, count in self._waiting.items() if count},
+        }
+
+
+# Process-wide residency tracker
+residency = ResidencyManager()
+_scheduler: Optional[ModelSwitchScheduler] = None
+
+
+def get_scheduler() -> ModelSwitchScheduler:
+    """Get the process-wide Ollama call scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = ModelSwitchScheduler(settings.ollama_max_loaded_models, settings.ollama_switch_batch)
+    return _scheduler
+
+
+async def residency_headers(model_id: Optional[str]) -> Dict[str, str]:
+    """
+    Response header reporting whether a request hits a warm or cold model.
+
+    Args:
+        model_id: Requested model (None for the configured default)
+
+    Returns:
+        {'X-Model-Residency': 'warm' | 'cold'} for Ollama models, else {}
+    """
+    settings = get_settings()
+    if model_id is None and settings.model_provider == "litellm":
+        model_id = settings.litellm_model
+    warm = await residency.is_warm(model_id) if model_id else None
+    if warm is None:
+        return {}
+    return {"X-Model-Residency": "warm" if warm else "cold"}
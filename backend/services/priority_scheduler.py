@@ -0,0 +1,163 @@
+"""Priority scheduling of agent executions: interactive streams ahead of bulk work."""
+import asyncio
+import itertools
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Dict, Iterator, List, Optional
+from config.settings import get_settings
+
+# Priority classes, most urgent first
+PRIORITY_CLASSES = ("interactive", "standard", "bulk")
+DEFAULT_PRIORITY = "standard"
+
+# Priority of agent calls made in the current context (e.g. everything a job runs is bulk)
+_current_priority: ContextVar[str] = ContextVar("agent_priority", default=DEFAULT_PRIORITY)
+
+
+def current_priority() -> str:
+    """Priority class of agent calls made in the current context."""
+    return _current_priority.get()
+
+
+@contextmanager
+def priority_class(priority: str) -> Iterator[None]:
+    """Run agent calls made inside the block (and tasks it starts) at a priority class."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class _Waiter:
+    """A queued agent execution."""
+
+    def __init__(self, rank: int, seq: int):
+        self.rank = rank
+        self.seq = seq
+        self.enqueued = time.monotonic()
+
+
+class PriorityScheduler:
+    """
+    Admits agent executions by priority class within a shared concurrency limit.
+
+    Each class is guaranteed ``share * slots`` concurrent executions. A class
+    may borrow idle capacity beyond its share, but never the unused
+    guarantee of a more urgent class, so a saturating bulk workload always
+    leaves room for interactive streams to start immediately. Queued calls
+    are admitted most urgent first; every ``aging_seconds`` a call waits
+    moves it ahead by one class in the queue (without giving it that class's
+    guarantee), so bulk work is delayed but never starved.
+    """
+
+    def __init__(self, slots: int, shares: Dict[str, float], aging_seconds: float):
+        self.slots = max(1, slots)
+        self.aging_seconds = aging_seconds
+        self.reserved = [max(1, round(shares.get(name, 0.0) * self.slots)) for name in PRIORITY_CLASSES]
+        self.in_flight = [0] * len(PRIORITY_CLASSES)
+        self.admitted = [0] * len(PRIORITY_CLASSES)
+        self.promoted = 0
+        self._waiters: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._condition = asyncio.Condition()
+
+    def _effective_rank(self, waiter: _Waiter, now: float) -> int:
+        if self.aging_seconds <= 0:
+            return waiter.rank
+        return max(0, waiter.rank - int((now - waiter.enqueued) / self.aging_seconds))
+
+    def _fits(self, rank: int) -> bool:
+        """Whether a call of this class may start without eating a more urgent class's guarantee."""
+        free = self.slots - sum(self.in_flight)
+        if free <= 0:
+            return False
+        if self.in_flight[rank] < self.reserved[rank]:
+            return True
+        held_back = sum(max(0, self.reserved[r] - self.in_flight[r]) for r in range(rank))
+        return free > held_back
+
+    def _is_next(self, waiter: _Waiter) -> bool:
+        # Guarantees are checked against the call's own class; aging only changes the queue order
+        if not self._fits(waiter.rank):
+            return False
+        now = time.monotonic()
+        order = (self._effective_rank(waiter, now), waiter.seq)
+        # Only the most urgent waiter that fits may go, oldest first within a class
+        for other in self._waiters:
+            if other is not waiter and (self._effective_rank(other, now), other.seq) < order and self._fits(other.rank):
+                return False
+        return True
+
+    @asynccontextmanager
+    async def slot(self, priority: str) -> AsyncIterator[None]:
+        """Hold an execution slot for one agent call of a priority class."""
+        rank = PRIORITY_CLASSES.index(priority) if priority in PRIORITY_CLASSES else PRIORITY_CLASSES.index(DEFAULT_PRIORITY)
+        waiter = _Waiter(rank, next(self._seq))
+        async with self._condition:
+            self._waiters.append(waiter)
+            try:
+                while not self._is_next(waiter):
+                    try:
+                        # Wake up periodically so waiting calls age even when nothing finishes
+                        await asyncio.wait_for(self._condition.wait(), timeout=self.aging_seconds or None)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self._waiters.remove(waiter)
+                self._condition.notify_all()
+            if self._effective_rank(waiter, time.monotonic()) < rank:
+                self.promoted += 1
+            self.in_flight[rank] += 1
+            self.admitted[rank] += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight[rank] -= 1
+                self._condition.notify_all()
+
+    def oldest_wait_ms(self, priority: Optional[str] = None) -> float:
+        """How long the oldest queued call (of one class, or any) has been waiting."""
+        rank = PRIORITY_CLASSES.index(priority) if priority in PRIORITY_CLASSES else None
+        now = time.monotonic()
+        return max(
+            ((now - w.enqueued) * 1000 for w in self._waiters if rank is None or w.rank == rank),
+            default=0.0,
+        )
+
+    def snapshot(self) -> Dict[str, object]:
+        """Running, queued and reserved executions per class."""
+        now = time.monotonic()
+        classes = {}
+        for rank, name in enumerate(PRIORITY_CLASSES):
+            queued = [w for w in self._waiters if w.rank == rank]
+            classes[name] = {
+                "running": self.in_flight[rank],
+                "queued": len(queued),
+                "reserved": self.reserved[rank],
+                "admitted": self.admitted[rank],
+                "oldest_wait_ms": round(max((now - w.enqueued for w in queued), default=0.0) * 1000),
+            }
+        return {"slots": self.slots, "promoted": self.promoted, "classes": classes}
+
+
+_scheduler: Optional[PriorityScheduler] = None
+
+
+def get_priority_scheduler() -> PriorityScheduler:
+    """Get the process-wide agent execution scheduler."""
+    global _scheduler
+    if _scheduler is None:
+        settings = get_settings()
+        _scheduler = PriorityScheduler(
+            slots=settings.agent_concurrency,
+            shares={
+                "interactive": settings.interactive_share,
+                "standard": settings.standard_share,
+                "bulk": settings.bulk_share,
+            },
+            aging_seconds=settings.priority_aging_seconds,
+        )
+    return _scheduler
@@ -0,0 +1,239 @@
+"""On-demand profiling: sampling profiles of the running worker and cProfile of single requests."""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from services.loop_monitor import route_of_frame
+
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL_MS = 1.0
+# Finished profiles kept for download
+KEPT_PROFILES = 20
+# Deepest caller chain expanded when converting a cProfile to stacks
+MAX_CPROFILE_DEPTH = 64
+# Call paths worth less than this (seconds) are not expanded further
+MIN_CPROFILE_PATH_S = 0.0001
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+@dataclass
+class Profile:
+    """A finished profile."""
+    id: str
+    kind: str  # 'sampling' or 'request'
+    route: Optional[str]
+    started_at: float
+    duration_s: float
+    samples: int  # Stack samples (sampling) or function calls (request)
+    stacks: Counter  # Collapsed stack -> weight (samples, or microseconds for cProfile)
+    routes: Dict[str, int] = field(default_factory=dict)
+    pstats_text: Optional[str] = None
+
+    def collapsed(self) -> str:
+        """Stacks in collapsed format ('frame;frame;frame weight'), as read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{stack} {weight}" for stack, weight in self.stacks.most_common()) + "\n"
+
+    def summary(self) -> Dict[str, object]:
+        """Metadata, weight per route and the functions with the most self weight."""
+        leaves: Counter = Counter()
+        for stack, weight in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += weight
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "route": self.route,
+            "started_at": self.started_at,
+            "duration_s": round(self.duration_s, 3),
+            "samples": self.samples,
+            "routes": dict(Counter(self.routes).most_common()),
+            "top_functions": dict(leaves.most_common(20)),
+        }
+
+
+def _label(code) -> str:
+    """Frame label: qualified name and short location."""
+    filename = code.co_filename
+    if filename.startswith(_BACKEND_DIR):
+        filename = os.path.relpath(filename, _BACKEND_DIR)
+    else:
+        filename = os.path.basename(filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({filename}:{code.co_firstlineno})"
+
+
+class ProfileStore:
+    """The most recent finished profiles, by ID."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+
+    def add(self, profile: Profile) -> None:
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, object]]:
+        return [
+            {"id": p.id, "kind": p.kind, "route": p.route, "started_at": p.started_at, "duration_s": round(p.duration_s, 3)}
+            for p in reversed(self._profiles.values())
+        ]
+
+
+profiles = ProfileStore(KEPT_PROFILES)
+_sampling = threading.Lock()
+
+
+def sample_stacks(seconds: float, interval_ms: float, thread_id: Optional[int] = None) -> Profile:
+    """
+    Sample the stacks of the running worker for a while (blocking; run it in a thread).
+
+    Every ``interval_ms`` the current stack of each thread (or only
+    ``thread_id``) is recorded, rooted at the route whose request it serves.
+    Nothing runs between profiles, so the profiler costs nothing when idle.
+
+    Raises:
+        ProfilerBusy: If another sampling profile is running
+    """
+    if not _sampling.acquire(blocking=False):
+        raise ProfilerBusy("A sampling profile is already running")
+    try:
+        seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+        interval = max(interval_ms, MIN_INTERVAL_MS) / 1000
+        me = threading.get_ident()
+        stacks: Counter = Counter()
+        routes: Counter = Counter()
+        samples = 0
+        started_at = time.time()
+        started = time.monotonic()
+        while time.monotonic() - started < seconds:
+            for tid, frame in sys._current_frames().items():
+                if tid == me or (thread_id is not None and tid != thread_id):
+                    continue
+                route = route_of_frame(frame)
+                labels = []
+                while frame is not None:
+                    labels.append(_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(route)
+                stacks[";".join(reversed(labels))] += 1
+                routes[route] += 1
+            samples += 1
+            time.sleep(interval)
+        profile = Profile(
+            id=str(uuid.uuid4()),
+            kind="sampling",
+            route=None,
+            started_at=started_at,
+            duration_s=time.monotonic() - started,
+            samples=samples,
+            stacks=stacks,
+            routes=dict(routes),
+        )
+    finally:
+        _sampling.release()
+    profiles.add(profile)
+    return profile
+
+
+def _collapse_pstats(stats: pstats.Stats, root: str) -> Counter:
+    """
+    Approximate stacks from cProfile's caller/callee edges.
+
+    cProfile only records direct callers, so each function's time is split
+    across its call paths in proportion to the time each caller spent in it.
+    """
+    raw = stats.stats
+    children = defaultdict(list)
+    for func, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            children[caller].append((func, edge[3]))
+
+    def label(func) -> str:
+        filename, line, name = func
+        if filename.startswith(_BACKEND_DIR):
+            filename = os.path.relpath(filename, _BACKEND_DIR)
+        elif filename != "~":
+            filename = os.path.basename(filename)
+        return f"{name} ({filename}:{line})"
+
+    stacks: Counter = Counter()
+
+    def walk(func, path: List[str], fraction: float) -> None:
+        _, _, tt, _, _ = raw[func]
+        weight = round(tt * fraction * 1_000_000)
+        if weight > 0:
+            stacks[";".join(path)] += weight
+        if len(path) >= MAX_CPROFILE_DEPTH:
+            return
+        for child, edge_ct in children.get(func, ()):
+            child_ct = raw[child][3]
+            child_label = label(child)
+            if child_ct > 0 and edge_ct * fraction >= MIN_CPROFILE_PATH_S and child_label not in path:
+                walk(child, path + [child_label], fraction * edge_ct / child_ct)
+
+    for func, (_, _, _, _, callers) in raw.items():
+        if not callers:
+            walk(func, [root, label(func)], 1.0)
+    return stacks
+
+
+class RequestProfiler:
+    """
+    cProfile of a single request, from its first byte to the end of its response.
+
+    cProfile sees everything the event loop thread runs, so other requests
+    interleaved with the profiled one show up too; profile on a quiet worker
+    for clean results. Only one request is profiled at a time.
+    """
+
+    def __init__(self):
+        self.active = False
+
+    def begin(self) -> Optional[cProfile.Profile]:
+        """Start profiling, or return None if another request is being profiled."""
+        if self.active:
+            return None
+        self.active = True
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def end(self, profiler: cProfile.Profile, profile_id: str, route: str, started: float) -> Profile:
+        """Stop profiling and store the result."""
+        profiler.disable()
+        self.active = False
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats("cumulative").print_stats(50)
+        stacks = _collapse_pstats(stats, route)
+        profile = Profile(
+            id=profile_id,
+            kind="request",
+            route=route,
+            started_at=time.time() - (time.monotonic() - started),
+            duration_s=time.monotonic() - started,
+            samples=sum(nc for _, nc, _, _, _ in stats.stats.values()),
+            stacks=stacks,
+            routes={route: sum(stacks.values())},
+            pstats_text=output.getvalue(),
+        )
+        profiles.add(profile)
+        return profile
+
+
+request_profiler = RequestProfiler()
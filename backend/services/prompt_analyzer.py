@@ -0,0 +1,230 @@
+"""Deterministic local prompt analyzer used as a fast pre-scorer ahead of the Evaluator Agent."""
+import math
+import re
+from typing import Dict, List, Optional
+from agents.enhancer_agent import BLOCK_TYPES
+from api.models import EvaluationResult, EvaluationScore
+from config.settings import get_settings
+from tools.variable_tool import extract_variables, find_missing_variables
+
+# Heuristic signals for each block type of the enhancer taxonomy
+SECTION_PATTERNS: Dict[str, List[str]] = {
+    "ROLE": [r"^\W*#*\s*role\b", r"\byou are (a|an|the)\b", r"\bact as\b", r"\bpersona\b"],
+    "TASK": [r"^\W*#*\s*(task|objective|goal)\b", r"\byour (task|job|goal) is\b", r"\b(task|objective|goal)\s*:"],
+    "INSTRUCTION": [r"^\W*#*\s*(instructions?|steps|guidelines|process)\b", r"^\s*(\d+[.)]|[-*])\s+\w+"],
+    "CONTEXT": [r"^\W*#*\s*(context|background)\b", r"\b(context|background)\s*:"],
+    "EXAMPLE": [r"^\W*#*\s*(examples?|few-shot)\b", r"\bexample\s*\d*\s*:", r"\bfor example\b", r"\binput\s*:"],
+    "OUTPUT_FORMAT": [
+        r"^\W*#*\s*(output|response)( format)?\b",
+        r"\b(output format|respond (in|with|using)|return (a|an|the|only)|format(ted)? as)\b",
+        r"\b(json|markdown|yaml|csv|bullet(ed)? list|table)\b",
+    ],
+    "GUARDRAIL": [
+        r"^\W*#*\s*(constraints?|guardrails?|rules|limitations)\b",
+        r"\b(do not|don't|never|must not|avoid|refuse|only use)\b",
+    ],
+}
+
+# Sections every production prompt should have, and sections that usually help
+REQUIRED_SECTIONS = ["TASK"]
+RECOMMENDED_SECTIONS = ["ROLE", "OUTPUT_FORMAT", "GUARDRAIL"]
+
+VAGUE_TERMS = [
+    "some", "several", "a few", "many", "various", "a lot", "etc", "and so on",
+    "short", "long", "brief", "good", "nice", "better", "appropriate", "properly",
+    "as needed", "if necessary", "relevant", "detailed", "somewhat", "maybe", "probably",
+]
+
+_SECTION_RES = {
+    name: [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in patterns]
+    for name, patterns in SECTION_PATTERNS.items()
+}
+_VAGUE_RE = re.compile(r"\b(" + "|".join(re.escape(t) for t in VAGUE_TERMS) + r")\b", re.IGNORECASE)
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_SINGLE_BRACE_RE = re.compile(r"(?<!\{)\{\s*[A-Za-z_][\w ]*\s*\}(?!\})")
+
+# Sentences shorter than this are too generic to count as duplicated instructions
+MIN_DUPLICATE_WORDS = 5
+# Word-set overlap at which two sentences count as the same instruction
+DUPLICATE_SIMILARITY = 0.85
+# Cap on sentences compared pairwise, keeps very long prompts in the millisecond range
+MAX_COMPARED_SENTENCES = 300
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 characters per token for English text)."""
+    return math.ceil(len(text) / 4)
+
+
+def detect_sections(prompt: str) -> List[str]:
+    """
+    Detect which enhancer block types a prompt already covers.
+
+    Args:
+        prompt: Prompt text
+
+    Returns:
+        Block type names (in taxonomy order) with at least one matching signal
+    """
+    return [
+        name for name in BLOCK_TYPES
+        if any(regex.search(prompt) for regex in _SECTION_RES.get(name, []))
+    ]
+
+
+def find_vague_terms(prompt: str) -> List[str]:
+    """Return the vague quantifiers used in a prompt, in order of appearance."""
+    return [match.group(0).lower() for match in _VAGUE_RE.finditer(prompt)]
+
+
+def find_duplicate_instructions(prompt: str) -> List[str]:
+    """
+    Find instructions that are repeated verbatim or near-verbatim.
+
+    Args:
+        prompt: Prompt text
+
+    Returns:
+        The repeated sentences (first occurrence wording)
+    """
+    sentences = []
+    for raw in _SENTENCE_SPLIT_RE.split(prompt):
+        words = _WORD_RE.findall(raw.lower())
+        if len(words) >= MIN_DUPLICATE_WORDS:
+            sentences.append((raw.strip(), frozenset(words)))
+    sentences = sentences[:MAX_COMPARED_SENTENCES]
+
+    duplicates = []
+    seen = set()
+    for i, (text_a, words_a) in enumerate(sentences):
+        if i in seen:
+            continue
+        for j in range(i + 1, len(sentences)):
+            if j in seen:
+                continue
+            words_b = sentences[j][1]
+            overlap = len(words_a & words_b) / len(words_a | words_b)
+            if overlap >= DUPLICATE_SIMILARITY:
+                seen.add(j)
+                if text_a not in duplicates:
+                    duplicates.append(text_a)
+    return duplicates
+
+
+def _clamp(score: float) -> int:
+    return max(0, min(100, int(round(score))))
+
+
+def analyze_prompt(prompt: str, variables: Optional[Dict[str, str]] = None) -> EvaluationResult:
+    """
+    Score a prompt locally, without any model call.
+
+    Scores use the default evaluator criteria so results can be compared with
+    (or used as a gate in front of) the Evaluator Agent.
+
+    Args:
+        prompt: Prompt text to analyze
+        variables: Variable values that will be supplied at run time, if known
+
+    Returns:
+        EvaluationResult with scores, risks and suggestions
+    """
+    settings = get_settings()
+    risks: List[str] = []
+    suggestions: List[str] = []
+
+    sections = detect_sections(prompt)
+    missing_required = [s for s in REQUIRED_SECTIONS if s not in sections]
+    missing_recommended = [s for s in RECOMMENDED_SECTIONS if s not in sections]
+    for section in missing_required + missing_recommended:
+        suggestions.append(f"Add a {section} section: {BLOCK_TYPES[section].lower()}.")
+
+    words = len(prompt.split())
+    tokens = estimate_tokens(prompt)
+    vague = find_vague_terms(prompt)
+    vague_density = len(vague) / max(words, 1)
+    duplicates = find_duplicate_instructions(prompt)
+
+    variable_names = extract_variables(prompt)
+    unresolved = find_missing_variables(prompt, variables) if variables is not None else []
+    empty_placeholders = prompt.count("{{}}") + len(re.findall(r"\{\{\s+\}\}", prompt))
+    unbalanced = prompt.count("{{") != prompt.count("}}")
+    single_braces = _SINGLE_BRACE_RE.findall(prompt)
+
+    # Clarity: structure, repetition and well-formed placeholders
+    clarity = 100 - 25 * len(missing_required) - 8 * len(missing_recommended) - 10 * len(duplicates)
+    clarity_notes = [f"Detected sections: {', '.join(sections) or 'none'}."]
+    if duplicates:
+        clarity_notes.append(f"{len(duplicates)} instruction(s) repeated.")
+        risks.append(f"Duplicated instruction may confuse the model: \"{duplicates[0][:80]}\"")
+        suggestions.append("Remove repeated instructions; state each rule once.")
+    if unbalanced or empty_placeholders or single_braces:
+        clarity -= 15
+        clarity_notes.append("Malformed variable placeholders.")
+        risks.append("Malformed {{variable}} placeholders will not be interpolated.")
+        suggestions.append("Use the {{variable_name}} syntax for every placeholder.")
+
+    # Specificity: vague wording, explicit format and examples
+    specificity = 100 - min(50, vague_density * 1000)
+    specificity -= 0 if "OUTPUT_FORMAT" in sections else 20
+    specificity -= 0 if "EXAMPLE" in sections else 10
+    specificity_notes = [f"{len(vague)} vague term(s)."]
+    if vague:
+        unique_vague = sorted(set(vague))
+        specificity_notes.append(f"Found: {', '.join(unique_vague[:8])}.")
+        suggestions.append(
+            f"Replace vague terms ({', '.join(unique_vague[:5])}) with measurable requirements."
+        )
+
+    # Safety: explicit guardrails
+    safety = 85 if "GUARDRAIL" in sections else 55
+    safety_notes = ["Guardrails present." if "GUARDRAIL" in sections else "No constraints or guardrails found."]
+    if "GUARDRAIL" not in sections:
+        risks.append("No guardrails: the model has no stated boundaries or refusal rules.")
+
+    # Testability: verifiable output and resolvable inputs
+    testability = 40 + (35 if "OUTPUT_FORMAT" in sections else 0) + (25 if "EXAMPLE" in sections else 0)
+    testability_notes = []
+    if variable_names:
+        testability_notes.append(f"Variables: {', '.join(variable_names)}.")
+    if unresolved:
+        testability -= 10 * len(unresolved)
+        testability_notes.append(f"Unresolved: {', '.join(unresolved)}.")
+        risks.append(f"Unresolved variables: {', '.join('{{' + v + '}}' for v in unresolved)}.")
+    if "OUTPUT_FORMAT" not in sections:
+        risks.append("No output format specified, so responses cannot be checked automatically.")
+
+    # Efficiency: token budget and length
+    efficiency = 100 - 5 * len(duplicates)
+    efficiency_notes = [f"~{tokens} tokens (budget {settings.prompt_token_budget})."]
+    if tokens > settings.prompt_token_budget:
+        over = tokens / settings.prompt_token_budget
+        efficiency -= min(60, 30 * over)
+        risks.append(f"Prompt is ~{tokens} tokens, over the {settings.prompt_token_budget}-token budget.")
+        suggestions.append("Trim context or move reference material out of the prompt.")
+    if words < 15:
+        clarity -= 20
+        specificity -= 20
+        efficiency_notes.append("Very short prompt.")
+        risks.append("Prompt is very short and likely underspecified.")
+
+    scores = [
+        EvaluationScore(criteria="Clarity", score=_clamp(clarity), rationale=" ".join(clarity_notes)),
+        EvaluationScore(criteria="Specificity", score=_clamp(specificity), rationale=" ".join(specificity_notes)),
+        EvaluationScore(criteria="Safety", score=_clamp(safety), rationale=" ".join(safety_notes)),
+        EvaluationScore(
+            criteria="Testability",
+            score=_clamp(testability),
+            rationale=" ".join(testability_notes) or "Output format and examples checked.",
+        ),
+        EvaluationScore(criteria="Efficiency", score=_clamp(efficiency), rationale=" ".join(efficiency_notes)),
+    ]
+    return EvaluationResult(scores=scores, risks=risks, suggestions=suggestions)
+
+
+def overall_score(result: EvaluationResult) -> float:
+    """Mean criterion score of an evaluation (0 when there are no scores)."""
+    if not result.scores:
+        return 0.0
+    return sum(s.score for s in result.scores) / len(result.scores)
@@ -0,0 +1,228 @@
+"""Adaptive pairwise ranking: Swiss-system pairing, Elo updates and a Bradley-Terry fit."""
+import asyncio
+import math
+import random
+from dataclasses import dataclass, field
+from typing import List, Optional, Set, Tuple
+from agents import create_judge_agent
+from api.models import PairwiseJudgment, RankedPrompt, RankPromptsRequest, RankPromptsResponse
+from config.settings import get_settings
+from services.structured_output import run_structured, schema_for
+
+INITIAL_RATING = 1000.0
+ELO_K = 32.0
+BT_ITERATIONS = 200
+BT_TOLERANCE = 1e-6
+
+# (player index, opponent index, score of the first player: 1 win, 0.5 tie, 0 loss)
+Outcome = Tuple[int, int, float]
+
+
+@dataclass
+class Player:
+    """Ranking state of one prompt variation."""
+    index: int
+    prompt: str
+    rating: float = INITIAL_RATING
+    wins: float = 0.0
+    played: int = 0
+    opponents: Set[int] = field(default_factory=set)
+
+
+def swiss_pairs(players: List[Player]) -> List[Tuple[Player, Player]]:
+    """
+    Pair players with similar ratings, avoiding rematches where possible.
+
+    Args:
+        players: All players
+
+    Returns:
+        Pairs for the next round (an odd player out gets a bye)
+    """
+    ordered = sorted(players, key=lambda p: (-p.rating, -p.wins, p.index))
+    unpaired = list(ordered)
+    pairs = []
+    while len(unpaired) >= 2:
+        first = unpaired.pop(0)
+        partner = next((p for p in unpaired if p.index not in first.opponents), unpaired[0])
+        unpaired.remove(partner)
+        pairs.append((first, partner))
+    return pairs
+
+
+def elo_update(a: Player, b: Player, score_a: float, confidence: float = 1.0) -> None:
+    """Apply an Elo update for one comparison, scaled by judge confidence."""
+    expected_a = 1.0 / (1.0 + 10 ** ((b.rating - a.rating) / 400.0))
+    k = ELO_K * (0.5 + 0.5 * confidence)
+    a.rating += k * (score_a - expected_a)
+    b.rating -= k * (score_a - expected_a)
+
+
+def bradley_terry(n: int, outcomes: List[Outcome]) -> List[float]:
+    """
+    Fit Bradley-Terry strengths with the MM algorithm.
+
+    Each player also plays one virtual game (a tie) against an average
+    opponent, which keeps unbeaten and winless players finite.
+
+    Args:
+        n: Number of players
+        outcomes: Comparison outcomes
+
+    Returns:
+        Strength per player, normalized to mean 1.0
+    """
+    wins = [0.5] * n
+    games = [[0] * n for _ in range(n)]
+    for i, j, score in outcomes:
+        wins[i] += score
+        wins[j] += 1.0 - score
+        games[i][j] += 1
+        games[j][i] += 1
+
+    strength = [1.0] * n
+    for _ in range(BT_ITERATIONS):
+        updated = []
+        for i in range(n):
+            denominator = 1.0 / (strength[i] + 1.0)
+            denominator += sum(
+                games[i][j] / (strength[i] + strength[j]) for j in range(n) if games[i][j]
+            )
+            updated.append(wins[i] / denominator)
+        mean = sum(updated) / n
+        updated = [s / mean for s in updated]
+        delta = max(abs(u - s) for u, s in zip(updated, strength))
+        strength = updated
+        if delta < BT_TOLERANCE:
+            break
+    return strength
+
+
+async def judge_pair(
+    a: Player,
+    b: Player,
+    criteria: Optional[str],
+    model: Optional[str],
+    rng: random.Random,
+) -> Optional[Tuple[float, float]]:
+    """
+    Ask the Judge Agent to compare two prompts.
+
+    The presentation order is randomized to cancel position bias.
+
+    Returns:
+        (score of a, confidence), or None if the judgment failed
+    """
+    swapped = rng.random() < 0.5
+    first, second = (b, a) if swapped else (a, b)
+    agent = create_judge_agent(criteria=criteria, model=model, output_schema=schema_for(PairwiseJudgment, model))
+
+    prompt_text = f"""
+Compare these two prompt variations.
+
+Prompt A:
+---
+{first.prompt}
+---
+
+Prompt B:
+---
+{second.prompt}
+---
+
+Return your judgment in JSON format.
+    """.strip()
+
+    try:
+        judgment = await run_structured(agent, prompt_text, PairwiseJudgment)
+    except Exception as e:
+        print(f"[DEBUG] Judge comparison {a.index} vs {b.index} failed: {e}")
+        return None
+
+    if judgment.winner == "tie":
+        return 0.5, judgment.confidence
+    first_won = judgment.winner == "A"
+    a_won = first_won != swapped
+    return (1.0 if a_won else 0.0), judgment.confidence
+
+
+async def rank_prompts(request: RankPromptsRequest) -> RankPromptsResponse:
+    """
+    Rank prompt variations with adaptively scheduled pairwise judgments.
+
+    Swiss rounds pair players of similar rating, so each round costs n/2 judge
+    calls (run concurrently) and about log2(n) rounds separate the field. The
+    run stops early once the top-k has been stable for a few rounds.
+
+    Args:
+        request: Ranking parameters
+
+    Returns:
+        Ranking ordered by Bradley-Terry strength
+    """
+    settings = get_settings()
+    rng = random.Random()
+    players = [Player(index=i, prompt=p) for i, p in enumerate(request.prompts)]
+    n = len(players)
+    top_k = min(request.top_k, n)
+
+    min_rounds = max(1, math.ceil(math.log2(n)))
+    max_rounds = request.max_rounds or min_rounds + settings.ranking_stable_rounds + 1
+    semaphore = asyncio.Semaphore(max(1, settings.ranking_concurrency))
+
+    async def play(a: Player, b: Player) -> Tuple[Player, Player, Optional[Tuple[float, float]]]:
+        async with semaphore:
+            return a, b, await judge_pair(a, b, request.criteria, request.model, rng)
+
+    outcomes: List[Outcome] = []
+    comparisons = 0
+    failures = 0
+    rounds = 0
+    stable = 0
+    converged = False
+    previous_top: List[int] = []
+
+    while rounds < max_rounds:
+        rounds += 1
+        results = await asyncio.gather(*(play(a, b) for a, b in swiss_pairs(players)))
+        for a, b, result in results:
+            a.opponents.add(b.index)
+            b.opponents.add(a.index)
+            if result is None:
+                failures += 1
+                continue
+            comparisons += 1
+            score_a, confidence = result
+            elo_update(a, b, score_a, confidence)
+            a.wins += score_a
+            b.wins += 1.0 - score_a
+            a.played += 1
+            b.played += 1
+            outcomes.append((a.index, b.index, score_a))
+
+        top = [p.index for p in sorted(players, key=lambda p: -p.rating)[:top_k]]
+        stable = stable + 1 if set(top) == set(previous_top) else 0
+        previous_top = top
+        if rounds >= min_rounds and stable >= settings.ranking_stable_rounds:
+            converged = True
+            break
+
+    strengths = bradley_terry(n, outcomes)
+    ranking = sorted(players, key=lambda p: (-strengths[p.index], -p.rating))
+    return RankPromptsResponse(
+        ranking=[
+            RankedPrompt(
+                index=p.index,
+                prompt=p.prompt,
+                rating=round(p.rating, 1),
+                strength=round(strengths[p.index], 4),
+                wins=p.wins,
+                comparisons=p.played,
+            )
+            for p in ranking
+        ],
+        comparisons=comparisons,
+        failed_comparisons=failures,
+        rounds=rounds,
+        converged=converged,
+    )
@@ -0,0 +1,145 @@
+"""Speculative execution: start likely follow-up work early and hand it out by handle."""
+import asyncio
+import contextvars
+import hashlib
+import uuid
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+from config.settings import get_settings
+from services.deadlines import deadline_scope
+from services.priority_scheduler import priority_class
+
+T = TypeVar("T")
+
+
+def _key_hash(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+@dataclass
+class _Speculation(Generic[T]):
+    key_hash: str
+    task: "asyncio.Task[T]"
+    expiry: asyncio.TimerHandle
+
+
+class SpeculationCache(Generic[T]):
+    """
+    Results of speculatively started work, claimed by handle.
+
+    Work runs as a background task in the 'bulk' scheduling class and under
+    its own deadline, detached from the request that started it. A claim
+    must present the same key (e.g. the text the work was started on), so
+    a stale handle never returns a result for different input. Work that
+    is not claimed within ``ttl_seconds`` is cancelled.
+    """
+
+    def __init__(self, name: str, ttl_seconds: float, max_pending: int):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[str, _Speculation[T]] = {}
+        self.started = 0
+        self.skipped = 0  # Not started: too many pending
+        self.hits = 0  # Claimed with the work already finished
+        self.late_hits = 0  # Claimed while the work was still running
+        self.misses = 0  # Claimed with an unknown or expired handle, or a different key
+        self.expired = 0  # Never claimed
+
+    def start(self, key: str, work: Callable[[], Awaitable[T]]) -> Optional[str]:
+        """
+        Start ``work`` in the background.
+
+        Returns:
+            Handle to claim the result with, or None if too much speculative
+            work is already pending
+        """
+        if len(self._pending) >= self.max_pending:
+            self.skipped += 1
+            return None
+
+        async def run() -> T:
+            with priority_class("bulk"), deadline_scope(self.ttl_seconds):
+                return await work()
+
+        handle = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+        # A fresh context, so the starting request's deadline does not apply
+        task = loop.create_task(run(), context=contextvars.Context())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())  # Failures surface on claim
+        self._pending[handle] = _Speculation(
+            key_hash=_key_hash(key),
+            task=task,
+            expiry=loop.call_later(self.ttl_seconds, self._expire, handle),
+        )
+        self.started += 1
+        return handle
+
+    def _expire(self, handle: str) -> None:
+        speculation = self._pending.pop(handle, None)
+        if speculation is not None:
+            speculation.task.cancel()
+            self.expired += 1
+
+    async def claim(self, handle: str, key: str) -> Optional[T]:
+        """
+        Result of the work behind a handle, waiting for it if it is still running.
+
+        Returns None (a miss) when the handle is unknown or expired, the key
+        differs, or the work failed; the caller then does the work itself.
+        A handle can be claimed once.
+        """
+        speculation = self._pending.pop(handle, None)
+        if speculation is None or speculation.key_hash != _key_hash(key):
+            if speculation is not None:
+                speculation.expiry.cancel()
+                speculation.task.cancel()
+            self.misses += 1
+            return None
+        speculation.expiry.cancel()
+        finished = speculation.task.done()
+        try:
+            result = await speculation.task
+        except asyncio.CancelledError:
+            if not speculation.task.cancelled():
+                raise  # The claiming request itself was cancelled
+            self.misses += 1
+            return None
+        except Exception as e:
+            print(f"[DEBUG] Speculative {self.name} failed: {e}")
+            self.misses += 1
+            return None
+        if finished:
+            self.hits += 1
+        else:
+            self.late_hits += 1
+        return result
+
+    def snapshot(self) -> Dict[str, object]:
+        """Counters, and the hit rate: the share of finished-with speculations that were used."""
+        resolved = self.started - len(self._pending)
+        return {
+            "name": self.name,
+            "pending": len(self._pending),
+            "started": self.started,
+            "skipped": self.skipped,
+            "hits": self.hits,
+            "late_hits": self.late_hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hit_rate": round((self.hits + self.late_hits) / resolved, 3) if resolved else None,
+        }
+
+
+_enhancements: Optional[SpeculationCache] = None
+
+
+def get_enhancement_speculation() -> SpeculationCache:
+    """Speculative /agents/enhance results for /agents/create outputs."""
+    global _enhancements
+    if _enhancements is None:
+        settings = get_settings()
+        _enhancements = SpeculationCache(
+            "enhancement", settings.speculation_ttl_seconds, settings.speculation_max_pending
+        )
+    return _enhancements
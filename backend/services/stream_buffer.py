@@ -0,0 +1,252 @@
+"""Bounded buffers between agent runs and the clients reading them, with spill-to-disk and memory accounting."""
+import asyncio
+import codecs
+import sys
+import tempfile
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+from config.settings import get_settings
+
+# What a stream does when its consumer falls behind and its buffer is full:
+# 'block' pauses the model stream, 'spill' writes the excess to a temporary
+# file, 'drop' ends the stream with an error
+OVERFLOW_POLICIES = ("block", "spill", "drop")
+
+# Bytes read back from a spill file at a time
+SPILL_READ_BYTES = 64 * 1024
+
+
+class StreamOverflow(Exception):
+    """Raised when a stream is dropped because its consumer fell too far behind."""
+
+
+class StreamRegistry:
+    """Memory and spill accounting across all live stream buffers."""
+
+    def __init__(self):
+        self.active: Dict[int, "StreamBuffer"] = {}
+        self.memory_bytes = 0
+        self.peak_memory_bytes = 0
+        self.spilled_streams = 0
+        self.dropped_streams = 0
+
+    def add_memory(self, size: int) -> None:
+        self.memory_bytes += size
+        self.peak_memory_bytes = max(self.peak_memory_bytes, self.memory_bytes)
+
+    def snapshot(self) -> Dict[str, object]:
+        """Totals, and per-stream usage of the streams holding the most memory."""
+        settings = get_settings()
+        now = time.monotonic()
+        buffers = sorted(self.active.values(), key=lambda b: -(b.memory_bytes + b.spilled_bytes))
+        return {
+            "policy": settings.stream_overflow,
+            "streams": len(self.active),
+            "memory_bytes": self.memory_bytes,
+            "memory_budget_bytes": settings.stream_memory_budget_bytes,
+            "peak_memory_bytes": self.peak_memory_bytes,
+            "spilled_bytes": sum(b.spilled_bytes for b in self.active.values()),
+            "spilled_streams": self.spilled_streams,
+            "dropped_streams": self.dropped_streams,
+            "top": [
+                {
+                    "label": b.label,
+                    "memory_bytes": b.memory_bytes,
+                    "spilled_bytes": b.spilled_bytes,
+                    "peak_bytes": b.peak_bytes,
+                    "producing": not b.closed,
+                    "age_s": round(now - b.created, 1),
+                }
+                for b in buffers[:20]
+            ],
+        }
+
+
+streams = StreamRegistry()
+
+
+class StreamBuffer:
+    """
+    FIFO of text chunks between the task running a model and the response reading it.
+
+    Chunks are held in memory up to ``max_bytes`` for the stream, and
+    ``memory_budget`` across all streams. Beyond that, the overflow
+    policy applies. Spilled chunks go to an anonymous temporary file and
+    are read back in order once the memory queue is empty, so a slow client
+    costs disk, not worker memory. Memory is counted with sys.getsizeof,
+    i.e. what the buffered strings actually occupy.
+    """
+
+    def __init__(
+        self,
+        label: str,
+        max_bytes: int,
+        memory_budget: int,
+        policy: str = "spill",
+        spill_max_bytes: int = 0,
+        spill_dir: Optional[str] = None,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown stream overflow policy '{policy}' (expected one of {', '.join(OVERFLOW_POLICIES)})")
+        self.label = label
+        self.max_bytes = max_bytes
+        self.memory_budget = memory_budget
+        self.policy = policy
+        self.spill_max_bytes = spill_max_bytes
+        self.spill_dir = spill_dir
+        self.memory_bytes = 0
+        self.spilled_bytes = 0  # Written to the spill file and not yet read back
+        self.peak_bytes = 0
+        self.closed = False
+        self.created = time.monotonic()
+        self._chunks: Deque[str] = deque()
+        self._changed = asyncio.Condition()
+        self._spill = None
+        self._spilled = False
+        self._read_at = 0
+        self._write_at = 0
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        streams.active[id(self)] = self
+
+    def _fits(self, size: int) -> bool:
+        if not self._chunks:
+            return True  # Always take one chunk, however large, so the stream can progress
+        if self.memory_bytes + size > self.max_bytes:
+            return False
+        return self.policy == "block" or streams.memory_bytes + size <= self.memory_budget
+
+    def _account(self, size: int) -> None:
+        self.memory_bytes += size
+        streams.add_memory(size)
+        self.peak_bytes = max(self.peak_bytes, self.memory_bytes + self.spilled_bytes)
+
+    async def put(self, chunk: str) -> None:
+        """
+        Append a chunk, applying the overflow policy when the buffer is full.
+
+        Raises:
+            StreamOverflow: If the stream is dropped (policy 'drop', or the
+                spill file reached its limit)
+        """
+        size = sys.getsizeof(chunk)
+        async with self._changed:
+            if self.closed:
+                return  # The consumer is gone
+            if self.spilled_bytes == 0 and self._fits(size):
+                self._chunks.append(chunk)
+                self._account(size)
+            elif self.policy == "block":
+                # The per-stream bound alone keeps blocked streams small
+                await self._changed.wait_for(lambda: self.closed or self._fits(size))
+                if self.closed:
+                    return
+                self._chunks.append(chunk)
+                self._account(size)
+            else:
+                data = chunk.encode()
+                if self.policy != "spill" or (
+                    self.spill_max_bytes and self.spilled_bytes + len(data) > self.spill_max_bytes
+                ):
+                    behind = self.memory_bytes + self.spilled_bytes + size
+                    self._drop()
+                    raise StreamOverflow(f"Client fell {behind} bytes behind; stream dropped")
+                await self._write_spill(data)
+            self._changed.notify_all()
+
+    async def _write_spill(self, data: bytes) -> None:
+        if self._spill is None:
+            self._spill = await asyncio.to_thread(tempfile.TemporaryFile, dir=self.spill_dir or None)
+        if not self._spilled:
+            self._spilled = True
+            streams.spilled_streams += 1
+            print(f"[DEBUG] Stream {self.label} spilling to disk ({self.memory_bytes} bytes in memory)")
+        spill, offset = self._spill, self._write_at
+
+        def write() -> None:
+            spill.seek(offset)
+            spill.write(data)
+
+        await asyncio.to_thread(write)
+        self._write_at += len(data)
+        self.spilled_bytes += len(data)
+        self.peak_bytes = max(self.peak_bytes, self.memory_bytes + self.spilled_bytes)
+
+    async def _read_spill(self) -> str:
+        spill, offset = self._spill, self._read_at
+        size = min(SPILL_READ_BYTES, self._write_at - offset)
+
+        def read() -> bytes:
+            spill.seek(offset)
+            return spill.read(size)
+
+        data = await asyncio.to_thread(read)
+        self._read_at += len(data)
+        self.spilled_bytes -= len(data)
+        if self.spilled_bytes == 0:
+            self._read_at = self._write_at = 0  # Reuse the file from the start
+        return self._decoder.decode(data)
+
+    def _drop(self) -> None:
+        streams.dropped_streams += 1
+        print(f"[DEBUG] Stream {self.label} dropped: consumer too slow")
+        self._release()
+
+    def _release(self) -> None:
+        streams.memory_bytes -= self.memory_bytes
+        self.memory_bytes = 0
+        self.spilled_bytes = 0
+        self._chunks.clear()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+
+    async def wait(self) -> None:
+        """Wait until a chunk can be read or the stream has ended (safe to cancel)."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._chunks or self.spilled_bytes or self.closed)
+
+    async def get(self) -> Optional[str]:
+        """Next chunk in order, or None once the producer has closed the buffer and it is drained."""
+        async with self._changed:
+            while True:
+                if self._chunks:
+                    chunk = self._chunks.popleft()
+                    size = sys.getsizeof(chunk)
+                    self.memory_bytes -= size
+                    streams.memory_bytes -= size
+                    self._changed.notify_all()
+                    return chunk
+                if self.spilled_bytes:
+                    text = await self._read_spill()
+                    if text:
+                        return text
+                    continue
+                if self.closed:
+                    return None
+                await self._changed.wait()
+
+    async def close(self) -> None:
+        """Mark the end of the stream (called by the producer)."""
+        async with self._changed:
+            self.closed = True
+            self._changed.notify_all()
+
+    def discard(self) -> None:
+        """Free everything the buffer holds (called when the consumer is done)."""
+        self.closed = True
+        self._release()
+        streams.active.pop(id(self), None)
+
+
+def new_stream_buffer(label: str) -> StreamBuffer:
+    """A stream buffer configured from the STREAM_* settings."""
+    settings = get_settings()
+    return StreamBuffer(
+        label,
+        max_bytes=settings.stream_buffer_bytes,
+        memory_budget=settings.stream_memory_budget_bytes,
+        policy=settings.stream_overflow,
+        spill_max_bytes=settings.stream_spill_max_bytes,
+        spill_dir=settings.stream_spill_dir,
+    )
@@ -0,0 +1,167 @@
+"""Output framing for streamed agent responses: chunk coalescing and optional gzip."""
+import asyncio
+import zlib
+from typing import AsyncGenerator, AsyncIterator, Callable, Dict, List, Optional, Tuple
+from config.settings import get_settings
+from services.stream_buffer import StreamBuffer, new_stream_buffer
+
+# Marks a flush of the coalescing buffer when its latency cap expires
+_TIMEOUT = object()
+
+# Compression level for gzip streams (speed matters more than ratio here)
+GZIP_LEVEL = 6
+
+GZIP_HEADERS = {"Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+
+
+async def coalesce(
+    chunks: AsyncIterator[str],
+    max_chars: int,
+    max_delay_ms: float,
+    unmerged: Optional[Callable[[str], bool]] = None,
+    buffer: Optional[StreamBuffer] = None,
+) -> AsyncGenerator[str, None]:
+    """
+    Merge small chunks into larger frames, Nagle-style.
+
+    The first chunk is sent at once so time to first token is unchanged.
+    After that, chunks are buffered until ``max_chars`` are waiting or the
+    oldest buffered chunk is ``max_delay_ms`` old (0 sends each chunk as it
+    comes). Everything already received is merged, so a consumer that falls
+    behind catches up in a few large frames instead of many small ones.
+
+    The source is read by its own task into a bounded StreamBuffer, so the
+    latency cap holds even while the model is silent, and the source runs
+    to completion at its own pace however slowly the response is read.
+
+    Args:
+        chunks: Source text chunks
+        max_chars: Buffered characters that trigger a frame
+        max_delay_ms: Longest a chunk waits in the buffer
+        unmerged: Chunks it matches (e.g. in-band errors) are sent as their
+            own frame, after the buffered text
+        buffer: Buffer between source and consumer (defaults to one from
+            the STREAM_* settings)
+
+    Raises:
+        StreamOverflow: If the consumer fell so far behind that the
+            buffer dropped the stream
+    """
+    if buffer is None:
+        buffer = new_stream_buffer("stream")
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                if chunk:
+                    await buffer.put(chunk)
+        finally:
+            try:
+                if hasattr(chunks, "aclose"):
+                    await chunks.aclose()  # Release what the source holds (e.g. its agent slot) right away
+            finally:
+                await buffer.close()
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.create_task(produce())
+    parts: List[str] = []
+    size = 0
+    flush_at = None
+    first = True
+    try:
+        while True:
+            try:
+                async with asyncio.timeout_at(flush_at):
+                    await buffer.wait()
+                chunk = await buffer.get()
+            except TimeoutError:
+                chunk = _TIMEOUT
+            if chunk is _TIMEOUT or chunk is None or (unmerged is not None and unmerged(chunk)):
+                if parts:
+                    yield "".join(parts)
+                    parts.clear()
+                    size = 0
+                flush_at = None
+                if chunk is None:
+                    break
+                if chunk is not _TIMEOUT:
+                    yield chunk
+                continue
+            parts.append(chunk)
+            size += len(chunk)
+            if first or size >= max_chars or max_delay_ms <= 0:
+                first = False
+                yield "".join(parts)
+                parts.clear()
+                size = 0
+                flush_at = None
+            elif flush_at is None:
+                flush_at = loop.time() + max_delay_ms / 1000
+        await producer  # Re-raise a failure of the source, or StreamOverflow
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        buffer.discard()
+
+
+def framed(
+    chunks: AsyncIterator[str],
+    label: str = "stream",
+    unmerged: Optional[Callable[[str], bool]] = None,
+) -> AsyncIterator[str]:
+    """Run a stream through a bounded buffer and coalesce it, per the STREAM_* settings."""
+    settings = get_settings()
+    return coalesce(
+        chunks,
+        settings.stream_coalesce_chars,
+        settings.stream_coalesce_ms,
+        unmerged,
+        new_stream_buffer(label),
+    )
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether an Accept-Encoding header allows gzip."""
+    for entry in (accept_encoding or "").split(","):
+        coding, _, params = entry.partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+async def gzip_stream(chunks: AsyncIterator[str]) -> AsyncGenerator[bytes, None]:
+    """
+    Gzip a text stream without holding frames back.
+
+    Each frame is followed by a sync flush, so the client can decompress it
+    as soon as it arrives. Coalesced frames keep the flush overhead (a few
+    bytes each) small next to the savings on long outputs.
+    """
+    compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk.encode()) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+def encode_stream(
+    chunks: AsyncIterator[str], accept_encoding: Optional[str]
+) -> Tuple[AsyncIterator, Dict[str, str]]:
+    """
+    Body and extra headers for a streamed text response.
+
+    The stream is gzipped when STREAM_COMPRESSION is on and the client
+    accepts gzip; otherwise it is passed through.
+    """
+    if not get_settings().stream_compression:
+        return chunks, {}
+    if accepts_gzip(accept_encoding):
+        return gzip_stream(chunks), dict(GZIP_HEADERS)
+    return chunks, {"Vary": "Accept-Encoding"}
@@ -0,0 +1,445 @@
+"""Structured output layer: schema enforcement, tolerant JSON repair and targeted retries."""
+import json
+from typing import Any, Iterator, List, Optional, Tuple, Type, TypeVar, get_args, get_origin
+from pydantic import BaseModel, ValidationError
+from config.settings import get_settings
+from models.model_factory import supports_structured_output
+from services.agent_runner import run_agent
+
+T = TypeVar("T", bound=BaseModel)
+
+# How many '{' / '[' positions to try before giving up on a response
+MAX_CANDIDATES = 8
+
+_LITERALS = {
+    "true": "true", "True": "true",
+    "false": "false", "False": "false",
+    "null": "null", "None": "null", "NaN": "null", "undefined": "null",
+}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when an agent response cannot be turned into the expected structure."""
+
+
+def schema_for(schema: Type[T], model: Optional[str] = None) -> Optional[Type[T]]:
+    """
+    Return the schema to pass to the provider, or None if it cannot enforce one.
+
+    Args:
+        schema: Pydantic model describing the expected response
+        model: Optional model ID the agent will run on
+
+    Returns:
+        The schema when the provider supports constrained decoding, otherwise None
+    """
+    return schema if supports_structured_output(model) else None
+
+
+def _next_significant(text: str, i: int) -> str:
+    """Return the next non-whitespace character at or after i (empty at end)."""
+    n = len(text)
+    while i < n and text[i].isspace():
+        i += 1
+    return text[i] if i < n else ""
+
+
+def _continues_after_comma(text: str, i: int, in_object: bool) -> bool:
+    """
+    Whether the text after a comma at i reads as the next element.
+
+    In an object that is a key (quoted or bare, then ':') or the closing
+    brace; in an array, a value. Used to tell a closing quote followed by a
+    comma from an unescaped quote inside a string.
+    """
+    j = i + 1
+    n = len(text)
+    while j < n and text[j].isspace():
+        j += 1
+    if j >= n:
+        return True  # Truncated after the comma
+    c = text[j]
+    if in_object:
+        if c == "}":
+            return True
+        if c in "\"'":
+            end = text.find(c, j + 1)
+            return end == -1 or _next_significant(text, end + 1) in ("", ":")
+        if c.isalpha() or c == "_":
+            k = j
+            while k < n and (text[k].isalnum() or text[k] == "_"):
+                k += 1
+            return _next_significant(text, k) in ("", ":")
+        return False
+    if c in "\"'{[]-+." or c.isdigit():
+        return True
+    k = j
+    while k < n and (text[k].isalnum() or text[k] == "_"):
+        k += 1
+    return text[j:k] in _LITERALS
+
+
+def repair_json(text: str, start: int = 0) -> str:
+    """
+    Rewrite damaged JSON starting at text[start] into parseable JSON.
+
+    Handles the damage LLMs typically produce: single-quoted strings, unquoted
+    keys, Python literals, comments, trailing or missing commas, unescaped quotes
+    and newlines inside strings, trailing prose, and truncated output (the
+    incomplete trailing element is dropped and open containers are closed).
+
+    Args:
+        text: Raw model output
+        start: Index of the opening '{' or '['
+
+    Returns:
+        Repaired JSON text
+    """
+    out: List[str] = []
+    stack: List[str] = []
+    # Per-container state: is the next string a key, and is a comma owed?
+    expect_key: List[bool] = []
+    need_comma: List[bool] = []
+    # Last point where the output was a valid prefix: (pieces emitted, open containers)
+    safe: Tuple[int, Tuple[str, ...]] = (0, ())
+    i, n = start, len(text)
+
+    def begin_token() -> None:
+        if stack and need_comma[-1]:
+            out.append(",")
+            need_comma[-1] = False
+
+    def value_done() -> None:
+        nonlocal safe
+        if stack:
+            need_comma[-1] = True
+            if stack[-1] == "{":
+                expect_key[-1] = True
+            safe = (len(out), tuple(stack))
+
+    def trim_comma() -> None:
+        while out and (out[-1].isspace() or out[-1] == ","):
+            out.pop()
+
+    while i < n:
+        ch = text[i]
+
+        if ch in "{[":
+            begin_token()
+            out.append(ch)
+            stack.append(ch)
+            expect_key.append(ch == "{")
+            need_comma.append(False)
+            if len(stack) == 1:
+                # Nested containers only become safe once they hold a complete value
+                safe = (len(out), tuple(stack))
+            i += 1
+        elif ch in "}]":
+            if not stack:
+                break
+            trim_comma()
+            if out and out[-1] == ":":
+                # Dangling key without a value
+                out.append("null")
+            opener = stack.pop()
+            expect_key.pop()
+            need_comma.pop()
+            out.append(_CLOSERS[opener])
+            i += 1
+            if not stack:
+                return "".join(out)
+            value_done()
+        elif ch == ",":
+            if stack and need_comma[-1]:
+                out.append(",")
+                need_comma[-1] = False
+            i += 1
+        elif ch == ":":
+            if stack and stack[-1] == "{":
+                out.append(":")
+                expect_key[-1] = False
+                need_comma[-1] = False
+            i += 1
+        elif ch in "\"'":
+            is_key = bool(stack) and stack[-1] == "{" and expect_key[-1]
+            begin_token()
+            quote = ch
+            buf = ['"']
+            i += 1
+            closed = False
+            while i < n:
+                c = text[i]
+                if c == "\\" and i + 1 < n:
+                    nxt = text[i + 1]
+                    buf.append("'" if nxt == "'" else "\\" + nxt)
+                    i += 2
+                    continue
+                if c == quote:
+                    follower = _next_significant(text, i + 1)
+                    # A quote followed by a newline and another string is a missing comma
+                    missing_comma = follower == '"' and "\n" in text[i + 1:text.find('"', i + 1)]
+                    # A quote and comma only end the string if the next element follows
+                    ends_element = follower == "," and _continues_after_comma(
+                        text, text.index(",", i + 1), bool(stack) and stack[-1] == "{"
+                    )
+                    if follower in ("", ":", "}", "]") or ends_element or missing_comma:
+                        closed = True
+                        i += 1
+                        break
+                    buf.append('\\"' if c == '"' else c)
+                elif c == '"':
+                    buf.append('\\"')
+                elif c == "\n":
+                    buf.append("\\n")
+                elif c == "\r":
+                    buf.append("\\r")
+                elif c == "\t":
+                    buf.append("\\t")
+                elif ord(c) < 0x20:
+                    buf.append(f"\\u{ord(c):04x}")
+                else:
+                    buf.append(c)
+                i += 1
+            if not closed:
+                # Truncated inside a string: drop the partial token
+                break
+            buf.append('"')
+            out.append("".join(buf))
+            if is_key:
+                expect_key[-1] = False
+            else:
+                value_done()
+        elif ch == "/" and i + 1 < n and text[i + 1] in "/*":
+            if text[i + 1] == "/":
+                end = text.find("\n", i)
+                i = n if end == -1 else end + 1
+            else:
+                end = text.find("*/", i + 2)
+                i = n if end == -1 else end + 2
+        elif ch.isspace():
+            i += 1
+        elif ch in "-+." or ch.isdigit():
+            j = i
+            while j < n and (text[j].isdigit() or text[j] in "+-.eE"):
+                j += 1
+            token = text[i:j].lstrip("+")
+            i = j
+            if j >= n:
+                # Number may be truncated
+                break
+            try:
+                float(token)
+            except ValueError:
+                continue
+            begin_token()
+            if token.startswith("."):
+                token = "0" + token
+            if token.endswith("."):
+                token += "0"
+            out.append(token)
+            value_done()
+        elif ch.isalpha() or ch == "_":
+            j = i
+            while j < n and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            i = j
+            if not stack or j >= n:
+                break
+            begin_token()
+            if stack[-1] == "{" and expect_key[-1]:
+                out.append(json.dumps(word))
+                expect_key[-1] = False
+            elif word in _LITERALS:
+                out.append(_LITERALS[word])
+                value_done()
+            else:
+                out.append(json.dumps(word))
+                value_done()
+        else:
+            i += 1
+
+    # Truncated: roll back to the last complete element and close what is open
+    pieces, open_stack = safe
+    repaired = "".join(out[:pieces]).rstrip()
+    if repaired.endswith(","):
+        repaired = repaired[:-1]
+    return repaired + "".join(_CLOSERS[c] for c in reversed(open_stack))
+
+
+def iter_json_candidates(text: str) -> Iterator[Any]:
+    """
+    Yield JSON values recoverable from a model response, best candidates first.
+
+    Args:
+        text: Raw model output (may include code fences and surrounding prose)
+
+    Yields:
+        Parsed JSON values, repairing damaged output where needed
+    """
+    stripped = text.strip()
+    try:
+        yield json.loads(stripped)
+        return
+    except json.JSONDecodeError:
+        pass
+
+    candidates = [i for i, c in enumerate(stripped) if c in "{["][:MAX_CANDIDATES]
+    for start in candidates:
+        try:
+            yield json.loads(repair_json(stripped, start))
+        except json.JSONDecodeError:
+            continue
+
+
+def _list_fields(schema: Type[BaseModel]) -> dict:
+    """Map list-typed field names of a schema to their item type."""
+    fields = {}
+    for name, field in schema.model_fields.items():
+        if get_origin(field.annotation) in (list, List):
+            args = get_args(field.annotation)
+            fields[name] = args[0] if args else Any
+    return fields
+
+
+def _wrap(data: Any, schema: Type[BaseModel], list_fields: dict) -> dict:
+    """Normalize a parsed value into the dict shape of the schema."""
+    if isinstance(data, list):
+        if len(list_fields) != 1:
+            raise StructuredOutputError(f"Expected an object for {schema.__name__}, got a list")
+        return {next(iter(list_fields)): data}
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"Expected an object for {schema.__name__}")
+    return data
+
+
+def coerce_structured(data: Any, schema: Type[T], salvage: bool = False) -> T:
+    """
+    Validate parsed JSON against a schema.
+
+    A bare list is wrapped when the schema has exactly one list field. With
+    ``salvage``, missing list fields default to empty and invalid list items are
+    dropped instead of failing the whole response, as long as something usable
+    remains.
+
+    Args:
+        data: Parsed JSON value
+        schema: Pydantic model describing the expected response
+        salvage: Whether to keep the valid parts of partially invalid output
+
+    Returns:
+        Validated schema instance
+
+    Raises:
+        StructuredOutputError: If the data cannot be validated
+    """
+    list_fields = _list_fields(schema)
+    data = _wrap(data, schema, list_fields)
+
+    if not salvage:
+        try:
+            return schema.model_validate(data)
+        except ValidationError as e:
+            raise StructuredOutputError(f"Response does not match {schema.__name__}: {e}") from e
+
+    salvaged = dict(data)
+    for name, item_type in list_fields.items():
+        items = salvaged.get(name)
+        if not isinstance(items, list):
+            salvaged[name] = []
+            continue
+        if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+            kept = []
+            for item in items:
+                try:
+                    kept.append(item_type.model_validate(item))
+                except ValidationError:
+                    continue
+            salvaged[name] = kept
+    if list_fields and not any(salvaged[name] for name in list_fields):
+        raise StructuredOutputError(f"No usable items for {schema.__name__}")
+    try:
+        return schema.model_validate(salvaged)
+    except ValidationError as e:
+        raise StructuredOutputError(f"Response does not match {schema.__name__}: {e}") from e
+
+
+def parse_structured(text: str, schema: Type[T]) -> T:
+    """
+    Parse a model response into a schema instance.
+
+    Every recoverable JSON value is tried strictly first; only if none matches
+    are partially valid values salvaged.
+
+    Args:
+        text: Raw model output
+        schema: Pydantic model describing the expected response
+
+    Returns:
+        Validated schema instance
+
+    Raises:
+        StructuredOutputError: If the response is unrecoverable
+    """
+    candidates = list(iter_json_candidates(text))
+    if not candidates:
+        raise StructuredOutputError("No JSON value could be recovered from the response")
+
+    last_error: Optional[StructuredOutputError] = None
+    for salvage in (False, True):
+        for data in candidates:
+            try:
+                return coerce_structured(data, schema, salvage=salvage)
+            except StructuredOutputError as e:
+                last_error = e
+    raise last_error
+
+
+def build_retry_prompt(response_text: str, schema: Type[BaseModel], error: Exception) -> str:
+    """Build a targeted reformatting prompt for an unrecoverable response."""
+    return f"""
+Your previous response could not be parsed ({error}).
+
+Rewrite it as valid JSON only, with no commentary or code fences, matching this JSON schema:
+{json.dumps(schema.model_json_schema())}
+
+Previous response:
+---
+{response_text}
+---
+    """.strip()
+
+
+async def run_structured(agent, prompt: str, schema: Type[T], retries: Optional[int] = None) -> T:
+    """
+    Run an agent and parse its response into a schema instance.
+
+    Damaged output is repaired locally; only unrecoverable output triggers a
+    retry, and the retry asks the agent to reformat its previous answer rather
+    than regenerate it.
+
+    Args:
+        agent: ADK agent instance
+        prompt: Prompt to send to the agent
+        schema: Pydantic model describing the expected response
+        retries: Max reformatting retries (defaults to settings)
+
+    Returns:
+        Validated schema instance
+
+    Raises:
+        StructuredOutputError: If the output is still unrecoverable after retries
+    """
+    if retries is None:
+        retries = get_settings().structured_output_retries
+
+    response_text = await run_agent(agent, prompt)
+    for attempt in range(retries + 1):
+        try:
+            return parse_structured(response_text, schema)
+        except StructuredOutputError as e:
+            if attempt == retries:
+                raise
+            print(f"[DEBUG] Structured output unrecoverable ({e}), retrying with reformat prompt")
+            response_text = await run_agent(agent, build_retry_prompt(response_text, schema, e))
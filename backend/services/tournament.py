@@ -0,0 +1,152 @@
+"""Optimizer tournament: parallel variation generation with automatic evaluation and ranking."""
+import asyncio
+import itertools
+import time
+from typing import AsyncGenerator, List, Optional, Tuple
+from agents import create_optimizer_agent
+from api.models import (
+    EvaluationResult,
+    OptimizerOutput,
+    OptimizerVariation,
+    OptimizeTournamentRequest,
+    TournamentCandidate,
+)
+from config.settings import get_settings
+from services.evaluation_service import evaluate_with_llm
+from services.prompt_analyzer import analyze_prompt, overall_score
+from services.structured_output import run_structured, schema_for
+
+# Each independent generation call is steered toward a different angle for diversity
+VARIATION_ANGLES = [
+    "clearer structure and unambiguous instructions",
+    "specific, measurable requirements instead of vague wording",
+    "a precise output format with a worked example",
+    "explicit guardrails and edge-case handling",
+    "brevity and token efficiency without losing intent",
+    "a stronger role and richer task context",
+]
+
+
+async def score_prompt(prompt: str, scorer: str, model: Optional[str] = None) -> Tuple[float, EvaluationResult]:
+    """
+    Score a prompt with the local analyzer or the Evaluator Agent.
+
+    Args:
+        prompt: Prompt to score
+        scorer: 'fast' for the local analyzer, 'llm' for the Evaluator Agent
+        model: Optional model ID for the evaluator
+
+    Returns:
+        Tuple of (mean criterion score, full evaluation)
+    """
+    if scorer == "llm":
+        evaluation = await evaluate_with_llm(prompt, model=model)
+    else:
+        evaluation = analyze_prompt(prompt)
+    return overall_score(evaluation), evaluation
+
+
+async def _generate_variation(
+    parent: TournamentCandidate,
+    angle: str,
+    suggestions: List[str],
+    model: Optional[str],
+) -> Optional[OptimizerVariation]:
+    """Generate a single variation of a parent prompt, steered toward one angle."""
+    agent = create_optimizer_agent(model=model, output_schema=schema_for(OptimizerOutput, model))
+    suggestions_text = "\n".join(f"- {s}" for s in suggestions) or "- None provided"
+
+    prompt_text = f"""
+Generate 1 improved variation of the following prompt, focusing on {angle}.
+
+Original Prompt:
+---
+{parent.prompt}
+---
+
+Suggestions to incorporate:
+{suggestions_text}
+
+Return a JSON array with exactly one variation with its prompt and rationale.
+    """.strip()
+
+    output = await run_structured(agent, prompt_text, OptimizerOutput)
+    return next((v for v in output.variations if v.prompt), None)
+
+
+async def run_tournament(request: OptimizeTournamentRequest) -> AsyncGenerator[Tuple[str, object], None]:
+    """
+    Run an optimization tournament.
+
+    Each round generates ``count`` variations of the current survivors in
+    independent parallel calls, scores every candidate as soon as it is
+    generated, and keeps the ``top_k`` best (survivors included) for the next
+    round.
+
+    Args:
+        request: Tournament parameters
+
+    Yields:
+        (event name, payload) tuples: 'baseline', 'candidate' (as each finishes),
+        'round' (ranking after each round) and 'done' (final ranking)
+    """
+    settings = get_settings()
+    semaphore = asyncio.Semaphore(max(1, settings.tournament_concurrency))
+    angles = itertools.cycle(VARIATION_ANGLES)
+
+    score, evaluation = await score_prompt(request.prompt, request.scorer, request.model)
+    baseline = TournamentCandidate(
+        id="baseline",
+        prompt=request.prompt,
+        rationale="Original prompt",
+        score=score,
+        round=0,
+        evaluation=evaluation,
+    )
+    yield "baseline", baseline
+
+    survivors = [baseline]
+    for round_number in range(1, request.rounds + 1):
+
+        async def compete(
+            round_number: int, index: int, parent: TournamentCandidate, angle: str
+        ) -> Optional[TournamentCandidate]:
+            async with semaphore:
+                try:
+                    variation = await _generate_variation(parent, angle, request.suggestions, request.model)
+                    if variation is None:
+                        return None
+                    score, evaluation = await score_prompt(variation.prompt, request.scorer, request.model)
+                except Exception as e:
+                    print(f"[DEBUG] Tournament candidate failed: {e}")
+                    return None
+            return TournamentCandidate(
+                id=f"{int(time.time() * 1000)}-{round_number}-{index}",
+                prompt=variation.prompt,
+                rationale=variation.rationale,
+                score=score,
+                round=round_number,
+                parent_id=parent.id,
+                evaluation=evaluation,
+            )
+
+        tasks = [
+            asyncio.create_task(compete(round_number, i, survivors[i % len(survivors)], next(angles)))
+            for i in range(request.count)
+        ]
+        entrants = list(survivors)
+        try:
+            for finished in asyncio.as_completed(tasks):
+                candidate = await finished
+                if candidate is not None:
+                    entrants.append(candidate)
+                    yield "candidate", candidate
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        entrants.sort(key=lambda c: c.score, reverse=True)
+        survivors = entrants[:request.top_k]
+        yield "round", {"round": round_number, "ranking": [c.model_dump(mode="json") for c in entrants]}
+
+    yield "done", {"ranking": [c.model_dump(mode="json") for c in survivors]}
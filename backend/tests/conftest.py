@@ -0,0 +1,30 @@
+"""Shared test setup: a throwaway SQLite database for the whole session."""
+import asyncio
+import os
+import tempfile
+
+# Must be set before the database package creates its engine
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/test.db"
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def run_db():
+    """Run a coroutine against freshly created tables, on its own event loop."""
+    from database.connection import engine
+    from database.models import Base
+
+    def run(coro_fn):
+        async def main():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.drop_all)
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await coro_fn()
+            finally:
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
@@ -0,0 +1,152 @@
+"""Tests for request budgets, deadline guards and the 504 handler."""
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from config.settings import get_settings
+from services import agent_runner, deadlines, priority_scheduler
+from services.deadlines import DeadlineExceeded, deadline_guard, deadline_scope, request_budget
+
+
+class HangingRunner:
+    """Runner whose event stream yields one chunk and then never ends."""
+
+    def __init__(self, **kwargs):
+        pass
+
+    async def run_async(self, **kwargs):
+        yield SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text="partial answer")]))
+        await asyncio.Event().wait()
+
+
+class FakeSessionService:
+    async def create_session(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "request_timeout_seconds", 120.0)
+    monkeypatch.setattr(settings, "endpoint_timeouts", "/api/agents/rank=600")
+    return settings
+
+
+@pytest.fixture
+def hanging_agent(monkeypatch):
+    async def session_service():
+        return FakeSessionService()
+
+    monkeypatch.setattr(agent_runner, "Runner", HangingRunner)
+    monkeypatch.setattr(agent_runner, "get_session_service", session_service)
+    monkeypatch.setattr(agent_runner, "estimate_ttft_ms", lambda model, prompt: None)
+    # The scheduler's Condition binds to the loop it first waits on
+    monkeypatch.setattr(priority_scheduler, "_scheduler", None)
+    return SimpleNamespace(model="fake-model")
+
+
+@pytest.mark.parametrize(
+    "path,header_ms,expected",
+    [
+        ("/api/agents/create", None, 120.0),
+        ("/api/agents/create", "2500", 2.5),
+        ("/api/agents/create", "999999", 120.0),
+        ("/api/agents/rank/", "300000", 300.0),
+        ("/api/agents/rank", "900000", 600.0),
+        ("/api/agents/create", "-5", 0.0),
+        ("/api/agents/create", "soon", 120.0),
+    ],
+)
+def test_request_budget_header_only_shortens(settings, path, header_ms, expected):
+    assert request_budget(path, header_ms) == expected
+
+
+def test_request_budget_header_applies_without_a_timeout(settings, monkeypatch):
+    monkeypatch.setattr(settings, "request_timeout_seconds", 0.0)
+    assert request_budget("/api/agents/create", None) is None
+    assert request_budget("/api/agents/create", "1500") == 1.5
+
+
+def test_inner_scope_only_tightens():
+    async def main():
+        with deadline_scope(0.5):
+            outer = deadlines.current_deadline()
+            with deadline_scope(60):
+                assert deadlines.current_deadline() == outer
+            with deadline_scope(0.1):
+                assert deadlines.current_deadline() < outer
+        assert deadlines.current_deadline() is None
+
+    asyncio.run(main())
+
+
+def test_deadline_guard_cancels_a_hanging_await():
+    async def main():
+        with deadline_scope(0.05):
+            async with deadline_guard("model call"):
+                await asyncio.Event().wait()
+
+    with pytest.raises(DeadlineExceeded, match="during model call"):
+        asyncio.run(main())
+
+
+def test_deadline_guard_refuses_a_passed_deadline():
+    async def main():
+        with deadline_scope(0):
+            async with deadline_guard("model call"):
+                raise AssertionError("block must not run")
+
+    with pytest.raises(DeadlineExceeded, match="before model call"):
+        asyncio.run(main())
+
+
+def test_run_agent_keeps_partial_text(hanging_agent):
+    async def main():
+        with deadline_scope(0.2):
+            await agent_runner.run_agent(hanging_agent, "hello")
+
+    with pytest.raises(DeadlineExceeded, match="during model call") as raised:
+        asyncio.run(main())
+    assert raised.value.partial == "partial answer"
+
+
+def test_run_agent_fails_fast_when_ttft_exceeds_budget(hanging_agent, monkeypatch):
+    monkeypatch.setattr(agent_runner, "estimate_ttft_ms", lambda model, prompt: 5000.0)
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        with deadline_scope(1.0):
+            started = loop.time()
+            with pytest.raises(DeadlineExceeded, match="expected time to first token of fake-model"):
+                await agent_runner.run_agent(hanging_agent, "hello")
+            return loop.time() - started
+
+    assert asyncio.run(main()) < 0.1
+
+
+def test_check_budget():
+    agent = SimpleNamespace(model="fake-model")
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        agent_runner._check_budget(agent, "hello", None)  # No deadline: nothing to check
+        with pytest.raises(DeadlineExceeded, match="before the agent could start"):
+            agent_runner._check_budget(agent, "hello", loop.time() - 1)
+
+    asyncio.run(main())
+
+
+def test_deadline_handler_returns_504_with_partial_text():
+    from api.server import deadline_exception_handler
+
+    async def main(exc):
+        return await deadline_exception_handler(None, exc)
+
+    response = asyncio.run(main(DeadlineExceeded("Deadline exceeded during model call", partial="half")))
+    assert response.status_code == 504
+    assert json.loads(response.body) == {"detail": "Deadline exceeded during model call", "partial": "half"}
+
+    response = asyncio.run(main(DeadlineExceeded("Deadline exceeded before queue wait")))
+    assert json.loads(response.body)["partial"] is None
@@ -0,0 +1,111 @@
+"""Tests for the vectorized experiment statistics."""
+import numpy as np
+import pytest
+
+from services import experiment_stats
+from services.experiment_stats import bootstrap_counts, bootstrap_means, summarize_scores
+
+NAN = float("nan")
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # 3 rows per resample -> chunks of 4 resamples
+    monkeypatch.setattr(experiment_stats, "MAX_BOOTSTRAP_CELLS", 12)
+
+
+def test_all_nan_scores_skip_the_bootstrap():
+    result = summarize_scores(np.full((4, 2), NAN), n_boot=100, seed=0)
+    assert result["variants"] == [
+        {"variant": 0, "n": 0, "mean": None, "ci": None},
+        {"variant": 1, "n": 0, "mean": None, "ci": None},
+    ]
+    assert result["comparisons"] == [{
+        "variant": 1,
+        "n": 0,
+        "mean_delta": None,
+        "delta_ci": None,
+        "win_rate": None,
+        "win_rate_ci": None,
+        "prob_better": None,
+    }]
+
+
+def test_empty_matrix():
+    result = summarize_scores(np.empty((0, 2)), n_boot=100, seed=0)
+    assert [v["n"] for v in result["variants"]] == [0, 0]
+    assert result["comparisons"][0]["mean_delta"] is None
+
+
+def test_single_row_has_degenerate_intervals():
+    result = summarize_scores(np.array([[1.0, 3.0]]), n_boot=200, seed=0)
+    assert [(v["mean"], v["ci"]) for v in result["variants"]] == [(1.0, (1.0, 1.0)), (3.0, (3.0, 3.0))]
+    comparison = result["comparisons"][0]
+    assert comparison["mean_delta"] == 2.0
+    assert comparison["delta_ci"] == (2.0, 2.0)
+    assert comparison["win_rate"] == 1.0
+    assert comparison["win_rate_ci"] == (1.0, 1.0)
+    assert comparison["prob_better"] == 1.0
+
+
+def test_point_estimates_use_paired_rows_only():
+    scores = np.array([
+        [1.0, 2.0, NAN],
+        [3.0, 3.0, 4.0],
+        [5.0, 4.0, 1.0],
+        [NAN, 9.0, 2.0],
+    ])
+    result = summarize_scores(scores, n_boot=200, seed=0)
+    assert [v["n"] for v in result["variants"]] == [3, 4, 3]
+    assert [v["mean"] for v in result["variants"]] == pytest.approx([3.0, 4.5, 7 / 3])
+
+    first, second = result["comparisons"]
+    assert (first["n"], first["mean_delta"], first["win_rate"]) == (3, pytest.approx(0.0), pytest.approx(0.5))
+    assert (second["n"], second["mean_delta"], second["win_rate"]) == (2, pytest.approx(-1.5), pytest.approx(0.5))
+
+
+def test_seed_makes_intervals_reproducible():
+    scores = np.random.default_rng(7).normal(size=(30, 3))
+    assert summarize_scores(scores, n_boot=300, seed=11) == summarize_scores(scores, n_boot=300, seed=11)
+
+
+def test_bootstrap_counts_chunks(small_chunks):
+    chunks = list(bootstrap_counts(3, 10, np.random.default_rng(0)))
+    assert [c.shape for c in chunks] == [(4, 3), (4, 3), (2, 3)]
+    assert all((c.sum(axis=1) == 3).all() for c in chunks)
+
+
+def test_bootstrap_means_match_the_counts_across_chunks(small_chunks):
+    values = np.array([[1.0, 2.0, 6.0], [0.0, 10.0, 20.0]])
+    mask = np.array([[True, True, True], [False, True, True]])
+    means = bootstrap_means(values, mask, 10, np.random.default_rng(3))
+
+    counts = np.vstack(list(bootstrap_counts(3, 10, np.random.default_rng(3))))
+    expected_first = counts @ values[0] / 3
+    kept = counts[:, 1:]
+    with np.errstate(invalid="ignore"):
+        expected_second = kept @ values[1, 1:] / kept.sum(axis=1)
+    assert means.shape == (2, 10)
+    np.testing.assert_allclose(means[0], expected_first)
+    np.testing.assert_allclose(means[1], expected_second)
+
+
+def test_resamples_without_valid_rows_are_nan(small_chunks):
+    values = np.array([[5.0, 0.0, 0.0]])
+    mask = np.array([[True, False, False]])
+    means = bootstrap_means(values, mask, 200, np.random.default_rng(1))
+    assert set(np.unique(means[~np.isnan(means)])) == {5.0}
+    # P(row 0 absent from a resample of 3) = (2/3)^3, about 30%
+    assert 0.15 < np.isnan(means).mean() < 0.45
+
+
+def test_chunked_summary_matches_unchunked(monkeypatch):
+    scores = np.random.default_rng(5).normal(loc=[0.0, 0.5], size=(40, 2))
+    whole = summarize_scores(scores, n_boot=2000, seed=2)
+    monkeypatch.setattr(experiment_stats, "MAX_BOOTSTRAP_CELLS", 40 * 7)
+    chunked = summarize_scores(scores, n_boot=2000, seed=2)
+
+    assert chunked["comparisons"][0]["mean_delta"] == whole["comparisons"][0]["mean_delta"]
+    for key in ("delta_ci", "win_rate_ci"):
+        np.testing.assert_allclose(chunked["comparisons"][0][key], whole["comparisons"][0][key], atol=0.06)
+    assert chunked["comparisons"][0]["prob_better"] == pytest.approx(whole["comparisons"][0]["prob_better"], abs=0.03)
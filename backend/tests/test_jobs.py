@@ -0,0 +1,162 @@
+"""Tests for job leasing, retries, cancellation and shutdown against SQLite."""
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import update
+from database import crud
+from database.connection import AsyncSessionLocal
+from database.models import Job
+from services import jobs
+from services.jobs import JobWorker
+
+
+async def _create(job_id: str = "job-1", kind: str = "test", max_attempts: int = 3) -> None:
+    async with AsyncSessionLocal() as db:
+        await crud.create_job(db, job_id, "user", kind, {}, max_attempts)
+
+
+async def _lease(worker_id: str, lease_seconds: float = 60.0):
+    async with AsyncSessionLocal() as db:
+        return await crud.lease_next_job(db, worker_id, lease_seconds)
+
+
+async def _get(job_id: str = "job-1") -> Job:
+    async with AsyncSessionLocal() as db:
+        return await crud.get_job(db, job_id)
+
+
+async def _expire_lease(job_id: str = "job-1") -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Job).where(Job.id == job_id).values(lease_expires_at=datetime.utcnow() - timedelta(seconds=1))
+        )
+        await db.commit()
+
+
+def test_a_job_is_leased_by_one_worker_only(run_db):
+    async def scenario():
+        await _create()
+        leases = await asyncio.gather(*(_lease(f"worker-{i}") for i in range(4)))
+        held = [job for job in leases if job is not None]
+        assert len(held) == 1
+        job = await _get()
+        assert job.status == "running"
+        assert job.attempts == 1
+        assert job.lease_owner == held[0].lease_owner
+        assert await _lease("late-worker") is None
+
+    run_db(scenario)
+
+
+def test_an_expired_lease_is_taken_over(run_db):
+    async def scenario():
+        await _create()
+        first = await _lease("worker-a")
+        assert await _lease("worker-b") is None  # Lease still valid
+        await _expire_lease()
+        second = await _lease("worker-b")
+        assert second is not None
+        assert second.lease_owner == "worker-b"
+        assert second.attempts == 2
+        assert second.started_at == first.started_at  # The first start is kept
+
+        # The old worker can no longer heartbeat or finish the job
+        async with AsyncSessionLocal() as db:
+            assert await crud.heartbeat_job(db, "job-1", "worker-a", 60.0) is None
+            assert not await crud.finish_job(db, "job-1", "worker-a", "succeeded")
+
+    run_db(scenario)
+
+
+def test_an_expired_lease_out_of_attempts_fails(run_db):
+    async def scenario():
+        await _create(max_attempts=1)
+        await _lease("worker-a")
+        await _expire_lease()
+        assert await _lease("worker-b") is None
+        job = await _get()
+        assert job.status == "failed"
+        assert job.error == "Worker lost (lease expired)"
+
+    run_db(scenario)
+
+
+def test_a_cancelled_job_is_not_leased_again(run_db):
+    async def scenario():
+        await _create()
+        await _lease("worker-a")
+        async with AsyncSessionLocal() as db:
+            job = await crud.cancel_job(db, "job-1")
+        assert job.status == "running" and job.cancel_requested
+        await _expire_lease()
+        assert await _lease("worker-b") is None
+        job = await _get()
+        assert job.status == "cancelled"
+        assert job.attempts == 1
+
+    run_db(scenario)
+
+
+def test_a_queued_job_is_cancelled_immediately(run_db):
+    async def scenario():
+        await _create()
+        async with AsyncSessionLocal() as db:
+            job = await crud.cancel_job(db, "job-1")
+        assert job.status == "cancelled"
+        assert await _lease("worker-a") is None
+
+    run_db(scenario)
+
+
+def test_shutdown_requeues_running_jobs_and_refunds_the_attempt(run_db, monkeypatch):
+    started = asyncio.Event()
+
+    async def hang(payload, ctx):
+        started.set()
+        await asyncio.sleep(3600)
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "test", hang)
+
+    async def scenario():
+        await _create()
+        worker = JobWorker(concurrency=1)
+        job = await _lease(worker.worker_id)
+        worker._running[job.id] = asyncio.create_task(worker._run(job))
+        await asyncio.wait_for(started.wait(), timeout=5)
+        await worker.stop()
+        job = await _get()
+        assert job.status == "queued"
+        assert job.attempts == 0
+        assert job.lease_owner is None
+
+    run_db(scenario)
+
+
+def test_a_failed_attempt_is_retried_with_backoff(run_db, monkeypatch):
+    async def fail(payload, ctx):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs.JOB_HANDLERS, "test", fail)
+
+    async def scenario():
+        await _create(max_attempts=2)
+        worker = JobWorker(concurrency=1)
+        base = jobs.get_settings().job_retry_base_seconds
+
+        before = datetime.utcnow()
+        await worker._run(await _lease(worker.worker_id))
+        job = await _get()
+        assert job.status == "queued"
+        assert job.error == "boom"
+        assert job.attempts == 1
+        assert job.run_after >= before + timedelta(seconds=base)
+        assert await _lease(worker.worker_id) is None  # Not due yet
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Job).values(run_after=datetime.utcnow()))
+            await db.commit()
+        await worker._run(await _lease(worker.worker_id))
+        job = await _get()
+        assert job.status == "failed"
+        assert job.attempts == 2
+
+    run_db(scenario)
@@ -0,0 +1,78 @@
+"""Tests for Ollama residency tracking against canned /api/ps payloads."""
+import asyncio
+import pytest
+from services import ollama_residency
+from services.ollama_residency import ResidencyManager, tagged_name
+
+PS_PAYLOAD = {
+    "models": [
+        {"name": "llama3.2:latest", "model": "llama3.2:latest"},
+        {"name": "qwen2.5:7b", "model": "qwen2.5:7b"},
+        {"model": "registry.local:5000/team/mistral:latest"},
+    ]
+}
+
+
+class FakeResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeClient:
+    def __init__(self, payload):
+        self.payload = payload
+
+    async def get(self, path):
+        assert path == "/api/ps"
+        return FakeResponse(self.payload)
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(ollama_residency, "get_ollama_client", lambda: FakeClient(PS_PAYLOAD))
+    manager = ResidencyManager()
+    asyncio.run(manager._fetch())
+    return manager
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("llama3.2", "llama3.2:latest"),
+    ("llama3.2:latest", "llama3.2:latest"),
+    ("qwen2.5:7b", "qwen2.5:7b"),
+    ("registry.local:5000/team/mistral", "registry.local:5000/team/mistral:latest"),
+])
+def test_tagged_name(name, expected):
+    assert tagged_name(name) == expected
+
+
+@pytest.mark.parametrize("model_id, warm", [
+    ("ollama/llama3.2", True),
+    ("ollama/llama3.2:latest", True),
+    ("ollama_chat/qwen2.5:7b", True),
+    ("ollama/qwen2.5", False),
+    ("ollama/registry.local:5000/team/mistral", True),
+    ("ollama/phi3", False),
+    ("gemini-2.5-flash", None),
+])
+def test_is_warm_matches_tagged_names(manager, model_id, warm):
+    assert asyncio.run(manager.is_warm(model_id)) is warm
+
+
+def test_marked_model_stays_warm_after_refresh(manager, monkeypatch):
+    manager.mark_loaded("ollama/phi3")
+    assert asyncio.run(manager.is_warm("ollama/phi3")) is True
+    payload = {"models": PS_PAYLOAD["models"] + [{"name": "phi3:latest"}]}
+    monkeypatch.setattr(ollama_residency, "get_ollama_client", lambda: FakeClient(payload))
+    asyncio.run(manager._fetch())
+    assert asyncio.run(manager.is_warm("ollama/phi3")) is True
+
+
+def test_unknown_before_first_snapshot(monkeypatch):
+    monkeypatch.setattr(ResidencyManager, "refresh", lambda self: None)
+    assert asyncio.run(ResidencyManager().is_warm("ollama/llama3.2")) is None
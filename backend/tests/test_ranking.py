@@ -0,0 +1,107 @@
+"""Tests for Swiss pairing, Elo updates, the Bradley-Terry fit and comparison counting."""
+import asyncio
+
+import pytest
+
+from api.models import RankPromptsRequest
+from services import ranking
+from services.ranking import Player, bradley_terry, elo_update, swiss_pairs
+
+
+def _players(*ratings):
+    return [Player(index=i, prompt=f"prompt {i}", rating=r) for i, r in enumerate(ratings)]
+
+
+def _indices(pairs):
+    return [(a.index, b.index) for a, b in pairs]
+
+
+def test_swiss_pairs_neighbours_by_rating():
+    players = _players(1000, 1100, 1050, 900)
+    assert _indices(swiss_pairs(players)) == [(1, 2), (0, 3)]
+
+
+def test_swiss_pairs_avoids_rematches():
+    players = _players(1000, 1100, 1050, 900)
+    players[1].opponents.add(2)
+    players[2].opponents.add(1)
+    assert _indices(swiss_pairs(players)) == [(1, 0), (2, 3)]
+
+
+def test_swiss_pairs_allows_a_rematch_when_unavoidable():
+    players = _players(1100, 1000)
+    players[0].opponents.add(1)
+    players[1].opponents.add(0)
+    assert _indices(swiss_pairs(players)) == [(0, 1)]
+
+
+def test_swiss_pairs_gives_the_odd_player_a_bye():
+    players = _players(1000, 1100, 900)
+    assert _indices(swiss_pairs(players)) == [(1, 0)]
+
+
+def test_swiss_pairs_breaks_rating_ties_by_wins_then_index():
+    players = _players(1000, 1000, 1000, 1000)
+    players[3].wins = 2.0
+    assert _indices(swiss_pairs(players)) == [(3, 0), (1, 2)]
+
+
+@pytest.mark.parametrize(
+    "ratings,score_a,confidence,expected_a",
+    [
+        ((1000, 1000), 1.0, 1.0, 1016.0),
+        ((1000, 1000), 0.0, 1.0, 984.0),
+        ((1000, 1000), 0.5, 1.0, 1000.0),
+        ((1000, 1000), 1.0, 0.0, 1008.0),
+        ((1400, 1000), 1.0, 1.0, 1400 + 32 * (1 - 1 / 1.1)),
+    ],
+)
+def test_elo_update(ratings, score_a, confidence, expected_a):
+    a, b = _players(*ratings)
+    elo_update(a, b, score_a, confidence)
+    assert a.rating == pytest.approx(expected_a)
+    assert a.rating + b.rating == pytest.approx(sum(ratings))
+
+
+def test_bradley_terry_without_games_is_uniform():
+    assert bradley_terry(3, []) == [1.0, 1.0, 1.0]
+
+
+def test_bradley_terry_balanced_cycle_is_uniform():
+    strengths = bradley_terry(3, [(0, 1, 1.0), (1, 2, 1.0), (2, 0, 1.0)])
+    assert strengths == pytest.approx([1.0, 1.0, 1.0])
+
+
+def test_bradley_terry_single_win():
+    # Fixed point of the normalized MM step: s_i is proportional to wins_i / denominator_i,
+    # with 1.5 and 0.5 wins once the virtual tie is counted, and s0 + s1 = 2
+    s0, s1 = bradley_terry(2, [(0, 1, 1.0)])
+    assert s0 + s1 == pytest.approx(2.0)
+    assert s0 / s1 == pytest.approx((1.5 / (1 / (s0 + 1) + 1 / 2)) / (0.5 / (1 / (s1 + 1) + 1 / 2)), rel=1e-5)
+    assert s0 == pytest.approx(1.6113, abs=1e-4)
+
+
+def test_bradley_terry_orders_a_transitive_field():
+    outcomes = [(0, 1, 1.0), (1, 2, 1.0), (0, 2, 1.0), (0, 1, 0.5)]
+    strengths = bradley_terry(3, outcomes)
+    assert strengths[0] > strengths[1] > strengths[2] > 0
+    assert sum(strengths) / 3 == pytest.approx(1.0)
+
+
+def test_rank_prompts_counts_only_successful_judgments(monkeypatch):
+    async def judge_pair(a, b, criteria, model, rng):
+        # Every comparison involving prompt 3 fails
+        if 3 in (a.index, b.index):
+            return None
+        return (1.0 if a.index < b.index else 0.0), 1.0
+
+    monkeypatch.setattr(ranking, "judge_pair", judge_pair)
+    request = RankPromptsRequest(prompts=["a", "b", "c", "d"], top_k=1, max_rounds=3)
+    result = asyncio.run(ranking.rank_prompts(request))
+
+    assert result.rounds == 3
+    assert result.comparisons + result.failed_comparisons == 2 * result.rounds
+    assert result.failed_comparisons == result.rounds
+    assert result.comparisons == sum(p.comparisons for p in result.ranking) // 2
+    assert [p.comparisons for p in result.ranking if p.index == 3] == [0]
+    assert result.ranking[0].index == 0
@@ -0,0 +1,15 @@
+"""Tests for provider classification in the resilient model wrapper."""
+from google.adk.models.google_llm import Gemini
+from google.adk.models.lite_llm import LiteLlm
+from models.ollama_llm import AdaptiveLiteLlm, OllamaLlm
+from models.resilient_llm import provider_of
+
+
+def test_litellm_subclasses_use_the_litellm_breaker():
+    assert provider_of(LiteLlm(model="openai/gpt-4o")) == "litellm"
+    assert provider_of(AdaptiveLiteLlm(model="openai/gpt-4o")) == "litellm"
+    assert provider_of(OllamaLlm(model="ollama/llama3.2")) == "litellm"
+
+
+def test_gemini_uses_the_gemini_breaker():
+    assert provider_of(Gemini(model="gemini-2.5-flash")) == "gemini"
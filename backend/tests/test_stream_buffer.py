@@ -0,0 +1,167 @@
+"""Tests for bounded stream buffers: overflow policies, spill files and memory accounting."""
+import asyncio
+import pytest
+from services import stream_buffer
+from services.stream_buffer import StreamBuffer, StreamOverflow, streams
+from services.stream_framing import coalesce
+
+# Multi-byte text: 2-, 3- and 4-byte UTF-8 sequences
+TEXT = "héllo wörld — ünïcode ✓ 日本語 🌍🚀 " * 40
+
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def _drain(buffer: StreamBuffer) -> str:
+    parts = []
+    while (chunk := await buffer.get()) is not None:
+        parts.append(chunk)
+    return "".join(parts)
+
+
+def _buffer(policy: str, max_bytes: int = 512, **kwargs) -> StreamBuffer:
+    return StreamBuffer("test", max_bytes=max_bytes, memory_budget=1 << 30, policy=policy, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def small_spill_reads(monkeypatch):
+    # Read spill files back in pieces that split multi-byte characters
+    monkeypatch.setattr(stream_buffer, "SPILL_READ_BYTES", 7)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 5, 33])
+def test_spilled_stream_is_reassembled_exactly(chunk_size):
+    async def scenario():
+        buffer = _buffer("spill")
+        for chunk in _chunks(TEXT, chunk_size):
+            await buffer.put(chunk)
+        await buffer.close()
+        assert buffer.spilled_bytes > 0
+        assert buffer.memory_bytes <= buffer.max_bytes + 200  # One chunk may exceed the bound
+        out = await _drain(buffer)
+        buffer.discard()
+        return out
+
+    baseline = streams.memory_bytes
+    spilled = streams.spilled_streams
+    out = asyncio.run(scenario())
+    assert out.encode() == TEXT.encode()
+    assert streams.spilled_streams == spilled + 1
+    assert streams.memory_bytes == baseline
+
+
+def test_interleaved_reads_keep_order_through_the_spill_file():
+    async def scenario():
+        buffer = _buffer("spill", max_bytes=256)
+        parts = []
+        for i, chunk in enumerate(_chunks(TEXT, 9)):
+            await buffer.put(chunk)
+            if i % 5 == 0:
+                parts.append(await buffer.get())
+        await buffer.close()
+        parts.append(await _drain(buffer))
+        buffer.discard()
+        return "".join(parts)
+
+    assert asyncio.run(scenario()) == TEXT
+
+
+def test_block_policy_waits_for_the_consumer():
+    async def scenario():
+        buffer = _buffer("block", max_bytes=256)
+        chunks = _chunks(TEXT, 16)
+
+        async def produce():
+            for chunk in chunks:
+                await buffer.put(chunk)
+            await buffer.close()
+
+        producer = asyncio.create_task(produce())
+        await asyncio.sleep(0.01)
+        assert not producer.done()  # Blocked on the full buffer
+        assert buffer.memory_bytes <= 256
+        assert buffer.spilled_bytes == 0
+        out = await _drain(buffer)
+        await producer
+        buffer.discard()
+        return out
+
+    assert asyncio.run(scenario()) == TEXT
+
+
+def test_drop_policy_raises_and_frees_the_buffer():
+    async def scenario():
+        buffer = _buffer("drop", max_bytes=256)
+        with pytest.raises(StreamOverflow):
+            for chunk in _chunks(TEXT, 16):
+                await buffer.put(chunk)
+        assert buffer.memory_bytes == 0
+        buffer.discard()
+
+    baseline = streams.memory_bytes
+    dropped = streams.dropped_streams
+    asyncio.run(scenario())
+    assert streams.dropped_streams == dropped + 1
+    assert streams.memory_bytes == baseline
+
+
+def test_spill_limit_drops_the_stream():
+    async def scenario():
+        buffer = _buffer("spill", max_bytes=256, spill_max_bytes=512)
+        with pytest.raises(StreamOverflow):
+            for chunk in _chunks(TEXT, 16):
+                await buffer.put(chunk)
+        buffer.discard()
+
+    asyncio.run(scenario())
+
+
+def test_unknown_policy_is_rejected():
+    with pytest.raises(ValueError):
+        _buffer("discard")
+
+
+def test_accounting_returns_to_zero_when_the_consumer_leaves():
+    async def scenario():
+        buffer = _buffer("spill")
+        for chunk in _chunks(TEXT, 8):
+            await buffer.put(chunk)
+        assert streams.memory_bytes > 0
+        assert id(buffer) in streams.active
+        buffer.discard()  # Consumer gone without reading
+        assert id(buffer) not in streams.active
+        await buffer.put("ignored after discard")
+
+    baseline = streams.memory_bytes
+    asyncio.run(scenario())
+    assert streams.memory_bytes == baseline
+
+
+def test_accounting_returns_to_zero_when_a_coalesced_stream_is_cancelled():
+    async def scenario():
+        released = asyncio.Event()
+
+        async def source():
+            try:
+                for chunk in _chunks(TEXT, 4):
+                    yield chunk
+                await asyncio.sleep(3600)  # A model that stops responding
+            finally:
+                released.set()
+
+        buffer = _buffer("spill", max_bytes=128)
+        frames = coalesce(source(), max_chars=64, max_delay_ms=5, buffer=buffer)
+        assert await frames.__anext__()  # First chunk
+        await asyncio.sleep(0.02)  # Let the producer run ahead and spill
+        assert buffer.spilled_bytes > 0
+        await frames.aclose()
+        await asyncio.wait_for(released.wait(), timeout=1)
+        return buffer
+
+    baseline = streams.memory_bytes
+    active = len(streams.active)
+    buffer = asyncio.run(scenario())
+    assert streams.memory_bytes == baseline
+    assert len(streams.active) == active
+    assert buffer.spilled_bytes == 0
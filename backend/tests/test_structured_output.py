@@ -0,0 +1,132 @@
+"""Tests for JSON repair and schema coercion in the structured output layer."""
+import json
+from typing import List
+import pytest
+from pydantic import BaseModel
+from api.models import EnhancerOutput, OptimizerOutput
+from services.structured_output import (
+    StructuredOutputError,
+    coerce_structured,
+    iter_json_candidates,
+    parse_structured,
+    repair_json,
+)
+
+
+class Score(BaseModel):
+    criterion: str
+    score: int
+
+
+class Scores(BaseModel):
+    scores: List[Score]
+    summary: str = ""
+
+
+@pytest.mark.parametrize("damaged, expected", [
+    # Single quotes, and an apostrophe inside a single-quoted string
+    ("{'a': 'b'}", {"a": "b"}),
+    ("{'a': 'it's fine', 'b': 2}", {"a": "it's fine", "b": 2}),
+    # Unquoted keys and Python / JavaScript literals
+    ("{a: True, b: None, c: undefined}", {"a": True, "b": None, "c": None}),
+    ("[NaN, False]", [None, False]),
+    # Comments
+    ('{"a": 1, // count\n "b": /* note */ 2}', {"a": 1, "b": 2}),
+    # Trailing and missing commas
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ('{"a": "x"\n "b": "y"}', {"a": "x", "b": "y"}),
+    ('[{"a": 1} {"a": 2}]', [{"a": 1}, {"a": 2}]),
+    # Unescaped quotes, including one followed by a comma
+    ('{"text": "say "hi" now"}', {"text": 'say "hi" now'}),
+    ('{"text": "a "quoted" , word"}', {"text": 'a "quoted" , word'}),
+    ('{"text": "he said "hi", ok", "n": 1}', {"text": 'he said "hi", ok', "n": 1}),
+    # Raw control characters inside strings
+    ('{"text": "line one\nline two\tend"}', {"text": "line one\nline two\tend"}),
+    # Numbers JSON does not allow
+    ("[.5, 2., +3]", [0.5, 2.0, 3]),
+    # Trailing prose after the value
+    ('{"a": 1} Let me know if you need anything else!', {"a": 1}),
+    # Truncated output: the partial element is dropped and containers closed
+    ('[{"a": 1}, {"a": 2}, {"a": "trunc', [{"a": 1}, {"a": 2}]),
+    ('{"items": [1, 2, 3', {"items": [1, 2]}),
+    ('{"a": "done", "b": "half', {"a": "done"}),
+    ('{"a": {"b": 1}, "c": ', {"a": {"b": 1}}),
+    # Dangling key
+    ('{"a": 1, "b":}', {"a": 1, "b": None}),
+])
+def test_repair_json(damaged, expected):
+    assert json.loads(repair_json(damaged)) == expected
+
+
+def test_repair_json_starts_at_offset():
+    text = 'Here you go: {"a": [1, 2]}'
+    assert json.loads(repair_json(text, text.index("{"))) == {"a": [1, 2]}
+
+
+@pytest.mark.parametrize("response, expected", [
+    ('{"a": 1}', [{"a": 1}]),
+    ('```json\n[{"a": 1}]\n```', [[{"a": 1}]]),
+    ('Sure! Here is the result:\n{"a": 1}\nHope that helps.', [{"a": 1}]),
+])
+def test_iter_json_candidates_best_first(response, expected):
+    assert list(iter_json_candidates(response))[:len(expected)] == expected
+
+
+def test_iter_json_candidates_none_in_prose():
+    assert list(iter_json_candidates("I could not produce an answer.")) == []
+
+
+def test_coerce_wraps_a_bare_list_into_the_only_list_field():
+    result = coerce_structured([{"prompt": "p", "rationale": "r"}], OptimizerOutput)
+    assert [v.prompt for v in result.variations] == ["p"]
+
+
+def test_coerce_rejects_scalars():
+    with pytest.raises(StructuredOutputError):
+        coerce_structured("text", Scores)
+
+
+@pytest.mark.parametrize("data, salvage, expected", [
+    ({"scores": [{"criterion": "clarity", "score": 8}]}, False, ["clarity"]),
+    ({"scores": [{"criterion": "clarity", "score": 8}, {"criterion": "x"}]}, True, ["clarity"]),
+    ({"summary": "ok", "scores": "none"}, False, None),
+    ({"scores": [{"criterion": "x"}]}, True, None),
+])
+def test_coerce_strict_and_salvage(data, salvage, expected):
+    if expected is None:
+        with pytest.raises(StructuredOutputError):
+            coerce_structured(data, Scores, salvage=salvage)
+    else:
+        assert [s.criterion for s in coerce_structured(data, Scores, salvage=salvage).scores] == expected
+
+
+@pytest.mark.parametrize("response, blocks", [
+    # Fenced array, as prompt-only providers return it
+    ('```json\n[{"type": "ROLE", "content": "You are a tutor"}]\n```', [("ROLE", "You are a tutor")]),
+    # Object with prose before and after
+    ('Result:\n{"blocks": [{"type": "TASK", "content": "Explain"}]}\nDone.', [("TASK", "Explain")]),
+    # Single quotes and a truncated final block (its complete fields are kept)
+    ("[{'type': 'ROLE', 'content': 'Tutor'}, {'type': 'TASK', 'content': 'Expl",
+     [("ROLE", "Tutor"), ("TASK", "")]),
+    # Unescaped quotes inside content
+    ('{"blocks": [{"type": "TASK", "content": "Answer "briefly", then stop"}]}',
+     [("TASK", 'Answer "briefly", then stop')]),
+])
+def test_parse_structured(response, blocks):
+    result = parse_structured(response, EnhancerOutput)
+    assert [(b.type, b.content) for b in result.blocks] == blocks
+
+
+def test_parse_structured_salvages_valid_items():
+    response = '{"scores": [{"criterion": "clarity", "score": 7}, {"criterion": "tone", "score": "high"}]}'
+    assert [s.criterion for s in parse_structured(response, Scores).scores] == ["clarity"]
+
+
+@pytest.mark.parametrize("response", [
+    "No JSON here at all.",
+    '{"summary": "fine"}',
+    '{"scores": [{"criterion": "x", "score": "n/a"}]}',
+])
+def test_parse_structured_unrecoverable(response):
+    with pytest.raises(StructuredOutputError):
+        parse_structured(response, Scores)